@@ -0,0 +1,81 @@
+"""API key lookups from memory, with usage counters written behind in bulk.
+
+Keys are cached by value (unknown keys briefly too). Deactivation or a tier change stamps
+`changed_at` and evicts the key on the worker that handled it at once, and on every other worker
+at its next `sync()`, which also flushes the buffered usage counts with a single unordered bulk write.
+"""
+import asyncio, logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from cache import ChangeFeed, TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+KEY_FIELDS = {"_id": 0, "id": 1, "key_value": 1, "owner_id": 1, "name": 1, "is_active": 1, "tier": 1}
+
+
+class ApiKeyStore:
+    def __init__(self, collection, maxsize: int = 10000, ttl: float = 300, negative_ttl: float = 10):
+        self.collection, self.negative_ttl = collection, negative_ttl
+        self.cache = TTLCache(maxsize, ttl)
+        self.pending: Dict[str, List] = {}  # key_value -> [count, last_used_at]
+        self.changes = ChangeFeed(collection, "key_value")
+        self.flushed = 0
+
+    async def lookup(self, key_value: str) -> Optional[dict]:
+        """Return the active key document for `key_value`, or None."""
+        k = self.cache.get(key_value, _MISSING)
+        if k is _MISSING:
+            k = await self.collection.find_one({"key_value": key_value, "is_active": True}, KEY_FIELDS)
+            self.cache.set(key_value, k, None if k else self.negative_ttl)
+        return k
+
+    def forget(self, key_value: str):
+        self.cache.pop(key_value)
+
+    def record(self, key_value: str, n: int = 1):
+        entry = self.pending.get(key_value)
+        now = datetime.now(timezone.utc).isoformat()
+        if entry is None:
+            self.pending[key_value] = [n, now]
+        else:
+            entry[0] += n
+            entry[1] = now
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, {}
+        ops = [UpdateOne({"key_value": kv}, {"$inc": {"usage_count": n}, "$max": {"last_used_at": ts}})
+               for kv, (n, ts) in batch.items()]
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"API key usage flush failed: {e}, retrying next interval")
+            for kv, (n, ts) in batch.items():
+                self.record(kv, n)
+            return 0
+        self.flushed += len(ops)
+        return len(ops)
+
+    async def sync(self):
+        """Flush usage counters and evict keys changed elsewhere since the last sync."""
+        await self.flush()
+        for k in await self.changes.poll():
+            self.forget(k["key_value"])
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"API key sync failed: {e}")
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "pending_keys": len(self.pending),
+                "pending_calls": sum(n for n, _ in self.pending.values()), "flushed_updates": self.flushed}
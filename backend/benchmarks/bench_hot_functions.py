@@ -0,0 +1,116 @@
+"""Microbenchmarks for the pure functions on the submission, approval and download paths.
+
+Each case's mean time is checked against the committed baseline (hot_functions_baseline.json)
+with BENCH_TOLERANCE headroom (default 1.5x); a case over budget fails, so a slowdown shows up as
+a test failure rather than a number nobody reads. BENCH_BUDGET_SCALE stretches every budget on a
+machine slower than the one the baseline was taken on; BENCH_SAVE_BASELINE=1 rewrites the
+baseline from this run instead of checking it. Inputs are generated from a fixed seed and the
+mock analyzers' jitter is seeded, so runs are repeatable. The module is named bench_* so the
+default test run doesn't collect it. Needs pytest-benchmark; run from backend/:
+
+    python -m pytest benchmarks/bench_hot_functions.py --benchmark-only
+    BENCH_SAVE_BASELINE=1 python -m pytest benchmarks/bench_hot_functions.py --benchmark-only
+"""
+import json, os, random, sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")  # server imports without connecting
+os.environ.setdefault("DB_NAME", "trustink_bench")
+
+import server  # noqa: E402
+from certpdf import build_cert_pdf  # noqa: E402
+
+SCALE = float(os.environ.get("BENCH_BUDGET_SCALE", "1"))
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "1.5"))
+SAVE_BASELINE = os.environ.get("BENCH_SAVE_BASELINE") == "1"
+BASELINE_PATH = Path(__file__).with_name("hot_functions_baseline.json")
+# Mean seconds per case, keyed "name" or "name[size]".
+BASELINE = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+measured = {}
+SIZES = [50, 1_000, 50_000, 1_000_000, 4_000_000]
+WORDS = ("the of and a to in is was that for it with as his on be at by had are but from or have an they "
+         "garden river memory light winter quantum notes essay journey city ocean letters silence fragments "
+         "harvest machine archive echo portrait season north dream atlas voice remarkably quietly").split()
+
+
+def make_text(n: int, seed: int = 42) -> str:
+    rng, out, length = random.Random(seed), [], 0
+    while length < n:
+        s = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))).capitalize() + rng.choice(".!?.,")
+        out.append(s)
+        length += len(s) + 1
+    return " ".join(out)[:n]
+
+
+def run(benchmark, name: str, fn, *args, size=None):
+    # Multi-MB inputs take seconds per call; a few rounds are enough there.
+    if size and size >= 1_000_000:
+        benchmark.pedantic(fn, args, rounds=3, iterations=1, warmup_rounds=0)
+    else:
+        benchmark(fn, *args)
+    if benchmark.disabled:  # --benchmark-disable: ran once as a plain test, nothing was timed
+        return
+    key, mean = f"{name}[{size}]" if size else name, benchmark.stats.stats.mean
+    measured[key] = mean
+    if SAVE_BASELINE:
+        return
+    if key not in BASELINE:
+        pytest.fail(f"no baseline for {key}; record one with BENCH_SAVE_BASELINE=1")
+    budget = BASELINE[key] * TOLERANCE * SCALE
+    assert mean <= budget, f"{key} mean {mean * 1e3:.3f} ms over budget {budget * 1e3:.3f} ms (baseline {BASELINE[key] * 1e3:.3f} ms)"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_baseline():
+    yield
+    if SAVE_BASELINE and measured:
+        BASELINE_PATH.write_text(json.dumps({**BASELINE, **{k: float(f"{v:.4g}") for k, v in measured.items()}}, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    server.mock_rng.seed(0)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_content_hash(benchmark, size):
+    run(benchmark, "content_hash", server.content_hash, make_text(size), size=size)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_analyze_style(benchmark, size):
+    run(benchmark, "analyze_style", server.analyze_style, make_text(size), size=size)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_mock_ai(benchmark, size):
+    run(benchmark, "_mock_ai", server._mock_ai, make_text(size), size=size)
+
+
+def test_sign_cert(benchmark):
+    run(benchmark, "sign_cert", server.sign_cert, server.content_hash("x"), "VH-2026-ABC123")
+
+
+def test_tl(benchmark):
+    run(benchmark, "tl", server.tl, 72)
+
+
+@pytest.mark.parametrize("size", [50, 1_000])
+def test_build_cert_pdf(benchmark, size):
+    cert = {"id": "c1", "verification_id": "VH-2026-ABC123", "content_title": make_text(size),
+            "creator_name": "Creator Alice", "content_hash": server.content_hash("x"),
+            "signature": server.sign_cert(server.content_hash("x"), "VH-2026-ABC123"),
+            "timestamp": "2026-01-01T00:00:00+00:00", "status": "active"}
+    run(benchmark, "build_cert_pdf", build_cert_pdf, cert, "https://example.test", size=size)
+
+
+def test_mock_analyzers_are_deterministic_when_seeded():
+    text = make_text(2_000)
+    server.mock_rng.seed(7)
+    first = server._mock_ai(text), server.analyze_style(text)
+    server.mock_rng.seed(7)
+    assert (server._mock_ai(text), server.analyze_style(text)) == first
@@ -0,0 +1,58 @@
+"""Per-key fairness under load: one heavy hitter against many light partner keys.
+
+Replays a simulated minute of traffic through the in-memory token buckets on a virtual clock.
+Without per-key limits the heavy key takes whatever the shared capacity allows; with them every
+key gets its tier's share, so the light keys' success rate should stay at ~100%. Run from backend/:
+
+    python benchmarks/bench_rate_limit_fairness.py --light 50 --heavy-rps 2000
+"""
+import argparse, asyncio, heapq, random, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ratelimit import MemoryBackend, RateLimiter, parse_tiers  # noqa: E402
+
+
+def arrivals(rng: random.Random, key: str, rps: float, seconds: float):
+    t = 0.0
+    while True:
+        t += rng.expovariate(rps)
+        if t >= seconds:
+            return
+        yield t, key
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    rate, burst = parse_tiers(f"t={args.tier}")["t"]
+    streams = [arrivals(rng, "heavy", args.heavy_rps, args.seconds)]
+    streams += [arrivals(rng, f"light{i}", args.light_rps, args.seconds) for i in range(args.light)]
+    clock = [0.0]
+    limiter = RateLimiter(MemoryBackend(clock=lambda: clock[0]))
+    sent, ok = {}, {}
+    for t, key in heapq.merge(*streams):
+        clock[0] = t
+        d = await limiter.take(f"key:{key}", rate, burst)
+        group = "heavy" if key == "heavy" else "light"
+        sent[group] = sent.get(group, 0) + 1
+        ok[group] = ok.get(group, 0) + d.allowed
+    print(f"tier {args.tier}, {args.seconds:.0f}s simulated, {args.light} light keys at {args.light_rps} rps")
+    for group in ("heavy", "light"):
+        n = sent.get(group, 0)
+        print(f"  {group:6s} sent {n:8d}  allowed {ok.get(group, 0):8d}  ({100 * ok.get(group, 0) / max(n, 1):5.1f}%)")
+    print(f"  heavy allowed ≈ rate*seconds+burst = {rate * args.seconds + burst:.0f}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--tier", default="5/20", help="rate-per-second/burst applied to every key")
+    p.add_argument("--light", type=int, default=50)
+    p.add_argument("--light-rps", type=float, default=2)
+    p.add_argument("--heavy-rps", type=float, default=2000)
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(p.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
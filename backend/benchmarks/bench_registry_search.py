@@ -0,0 +1,70 @@
+"""Registry search latency vs. registry size: inverted index against a case-insensitive regex scan.
+
+The regex scan stands in for the old `$regex`/`$options: "i"` query, which cannot use an index
+and so touches every active certificate. Run from backend/:
+
+    python benchmarks/bench_registry_search.py --sizes 1000 10000 100000
+"""
+import argparse, random, re, statistics, string, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from search import RegistryIndex  # noqa: E402
+
+WORDS = ("garden river memory light winter quantum notes essay journey city ocean letters silence "
+         "fragments harvest machine archive echo portrait season north dream atlas voice").split()
+NAMES = ("Alice Bob Carmen Dev Elena Farah Goran Hana Ivo Jun Kemal Lena Mateo Nia Omar Priya").split()
+QUERIES = ["gar", "garden", "quantum notes", "alice", "win", "ocean letters", "zzz", "m"]
+
+
+def make_certs(n: int, rng: random.Random):
+    # A few very common title words plus a long tail, roughly like real titles.
+    tail = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(20000)]
+    word = lambda: rng.choice(WORDS) if rng.random() < 0.25 else rng.choice(tail)
+    for i in range(n):
+        yield {
+            "id": f"c{i}",
+            "content_title": " ".join(word() for _ in range(rng.randint(2, 6))).title(),
+            "creator_name": f"{rng.choice(NAMES)} {''.join(rng.choices(string.ascii_lowercase, k=6)).title()}",
+            "verification_id": f"VH-2026-{i:06X}",
+            "timestamp": f"2026-01-01T00:00:{i % 60:02d}.{i:06d}",
+        }
+
+
+def regex_scan(certs, q):
+    pattern = re.compile(re.escape(q), re.I)
+    return [c["id"] for c in certs if pattern.search(c["content_title"]) or pattern.search(c["creator_name"])]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    print(f"{'size':>8} {'build s':>8} {'index p50 ms':>13} {'index p95 ms':>13} {'scan p50 ms':>12} {'speedup':>8}")
+    for n in args.sizes:
+        certs = list(make_certs(n, random.Random(n)))
+        idx = RegistryIndex()
+        t = time.perf_counter()
+        for c in certs:
+            idx.add(c)
+        build = time.perf_counter() - t
+        idx_p50, idx_p95 = timed(lambda: [idx.search(q, k=20) for q in QUERIES], args.repeat)
+        scan_p50, _ = timed(lambda: [regex_scan(certs, q) for q in QUERIES], max(3, args.repeat // 5))
+        per_q = len(QUERIES)
+        print(f"{n:>8} {build:>8.2f} {idx_p50 / per_q:>13.3f} {idx_p95 / per_q:>13.3f} "
+              f"{scan_p50 / per_q:>12.3f} {scan_p50 / idx_p50:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
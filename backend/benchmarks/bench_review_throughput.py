@@ -0,0 +1,130 @@
+"""Moderation review throughput: decisions per second per reviewer as reviewers are added.
+
+Seeds a throwaway database and starts the API with the stub detector/email server (both from
+load_test.py), then for each --reviewers level runs that many reviewers for --duration
+seconds, each posting decisions (60% approve, 30% reject, 10% revision) back to back. By default
+every reviewer works its own slice of the queue, which measures the review path itself. With
+--contend they all take the head of the shared queue as the UI does, so racing reviews show up
+as 409s. With --batch N each reviewer instead posts N decisions at a time to
+/moderation/review:batch; latencies are then per request. Run from backend/ with mongod
+listening locally:
+
+    python benchmarks/bench_review_throughput.py --reviewers 1 2 4 8 --duration 10
+    python benchmarks/bench_review_throughput.py --reviewers 1 2 4 8 --batch 50
+"""
+import argparse, asyncio, random, statistics, sys, time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from load_test import PASSWORD, seed, start_stack, stop_stack  # noqa: E402
+
+DECISIONS = (["approved"] * 6) + (["rejected"] * 3) + ["revision_requested"]
+
+
+async def level(http: httpx.AsyncClient, tokens: list, pending: list, args, rng: random.Random) -> dict:
+    samples, status = [], {}
+    deadline = time.perf_counter() + args.duration
+    slices = [pending[i::len(tokens)] for i in range(len(tokens))]
+
+    async def reviewer(token: str, mine: list):
+        auth = {"Authorization": f"Bearer {token}"}
+        while time.perf_counter() < deadline:
+            if args.batch > 1:
+                if not mine: break
+                ids = [mine.pop() for _ in range(min(args.batch, len(mine)))]
+                t = time.perf_counter()
+                r = await http.post("/api/moderation/review:batch", headers=auth, json={"items": [
+                    {"submission_id": sid, "decision": rng.choice(DECISIONS), "notes": "bench"} for sid in ids]})
+                samples.append(time.perf_counter() - t)
+                if r.status_code != 200:
+                    status[r.status_code] = status.get(r.status_code, 0) + len(ids)
+                    continue
+                for row in r.json()["results"]:
+                    code = 200 if row["ok"] else 409 if row["error"] == "not_reviewable" else 400
+                    status[code] = status.get(code, 0) + 1
+                continue
+            if args.contend:
+                q = (await http.get("/api/moderation/queue", params={"limit": 1}, headers=auth)).json()
+                if not q: break
+                sid = q[0]["id"]
+            else:
+                if not mine: break
+                sid = mine.pop()
+            t = time.perf_counter()
+            r = await http.post(f"/api/moderation/{sid}/review", headers=auth,
+                                json={"decision": rng.choice(DECISIONS), "notes": "bench"})
+            samples.append(time.perf_counter() - t)
+            status[r.status_code] = status.get(r.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reviewer(t, s) for t, s in zip(tokens, slices)))
+    elapsed = time.perf_counter() - started
+    pending[:] = [sid for s in slices for sid in s]  # reviewed ids were popped; the rest go to the next level
+    samples.sort()
+    done = status.get(200, 0)
+    return {"reviewers": len(tokens), "reviews": done, "rps": done / elapsed, "per_reviewer": done / elapsed / len(tokens),
+            "p50_ms": 1000 * statistics.median(samples) if samples else 0,
+            "p95_ms": 1000 * samples[int(len(samples) * .95) - 1] if samples else 0,
+            "conflicts": status.get(409, 0), "errors": sum(n for c, n in status.items() if c not in (200, 409))}
+
+
+async def run(args, data: dict, rng: random.Random) -> list:
+    reviewers = [u for u in data["users"] if u["role"] == "reviewer"]
+    if len(reviewers) < max(args.reviewers):
+        sys.exit(f"only {len(reviewers)} reviewers seeded; raise --users (one reviewer per 20 users)")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60,
+                                 limits=httpx.Limits(max_connections=max(args.reviewers) * 2)) as http:
+        tokens = [(await http.post("/api/auth/login", json={"email": u["email"], "password": PASSWORD})).json()["token"]
+                  for u in reviewers[:max(args.reviewers)]]
+        pending = list(data["pending"])
+        rng.shuffle(pending)
+        out = []
+        for n in args.reviewers:
+            out.append(await level(http, tokens[:n], pending, args, rng))
+        return out
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    p.add_argument("--db", default=f"trustink_review_{int(time.time())}")
+    p.add_argument("--keep-db", action="store_true")
+    p.add_argument("--port", type=int, default=8792)
+    p.add_argument("--stub-port", type=int, default=8793)
+    p.add_argument("--users", type=int, default=200, help="one in 20 is a reviewer")
+    p.add_argument("--submissions", type=int, default=40000, help="~30%% are seeded pending or flagged")
+    p.add_argument("--reviewers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--duration", type=float, default=10)
+    p.add_argument("--contend", action="store_true", help="all reviewers take the head of the shared queue")
+    p.add_argument("--batch", type=int, default=1, help="decisions per request via review:batch (ignores --contend)")
+    p.add_argument("--detector-latency-ms", type=float, default=0)
+    p.add_argument("--server-workers", type=int, default=1)
+    p.add_argument("--seed", type=int, default=1)
+    args = p.parse_args()
+
+    from pymongo import MongoClient
+    mongo = MongoClient(args.mongo_url, serverSelectionTimeoutMS=3000)
+    try:
+        mongo.admin.command("ping")
+    except Exception as e:
+        sys.exit(f"mongod not reachable at {args.mongo_url}: {e}")
+    rng = random.Random(args.seed)
+    data = seed(mongo[args.db], args, rng)
+    procs = start_stack(args)
+    try:
+        rows = asyncio.run(run(args, data, rng))
+    finally:
+        stop_stack(procs)
+        if not args.keep_db:
+            mongo.drop_database(args.db)
+    print(f"{'reviewers':>9} {'reviews':>8} {'total/s':>8} {'per rev/s':>10} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'409s':>5} {'errors':>6}")
+    for r in rows:
+        print(f"{r['reviewers']:>9} {r['reviews']:>8} {r['rps']:>8.1f} {r['per_reviewer']:>10.1f} {r['p50_ms']:>7.1f} "
+              f"{r['p95_ms']:>7.1f} {r['conflicts']:>5} {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
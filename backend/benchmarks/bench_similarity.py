@@ -0,0 +1,120 @@
+"""Near-duplicate lookup latency and recall vs. index size: LSH bands in Mongo against a linear scan.
+
+The corpus is grown to each size with synthetic fingerprints (random signatures stand in for
+unrelated documents, which share essentially no bands) plus --planted real essays. Each planted
+essay is then queried with a lightly edited copy, so recall is measured on true near-duplicates
+at the configured threshold. The linear scan compares the query signature with every stored one
+in a numpy matrix, which is the best case for any approach that does not index. Needs a mongod;
+the database is dropped afterwards unless --keep-db. Run from backend/:
+
+    python benchmarks/bench_similarity.py --sizes 10000 100000 1000000
+"""
+import argparse, asyncio, random, statistics, sys, time
+from pathlib import Path
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from indexes import INDEXES  # noqa: E402
+from similarity import NUM_PERM, SimilarityIndex, fingerprint_doc, signature  # noqa: E402
+
+WORDS = ("the of and a to in is was that for it with as on be at by had are but from or have an they garden "
+         "river memory light winter quantum notes essay journey city ocean letters silence fragments harvest "
+         "machine archive echo portrait season north dream atlas voice").split()
+
+
+def essay(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def edit(rng: random.Random, text: str, rate: float) -> str:
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * rate)):
+        words[i] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def pct(samples, p):
+    return sorted(samples)[max(0, int(len(samples) * p) - 1)]
+
+
+async def load(coll, sigs: np.ndarray, start: int, batch: int = 10000):
+    for i in range(0, len(sigs), batch):
+        await coll.insert_many([fingerprint_doc(f"r{start + i + j}", "bench", s) for j, s in enumerate(sigs[i:i + batch])],
+                               ordered=False)
+
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    await db.fingerprints.create_indexes(INDEXES["fingerprints"])
+    index = SimilarityIndex(db.fingerprints, args.threshold, limit=5)
+    rng, nrng = random.Random(args.seed), np.random.default_rng(args.seed)
+
+    planted = [essay(rng, args.words) for _ in range(args.planted)]
+    queries = [signature(edit(rng, t, args.edit_rate)) for t in planted]
+    planted_sigs = [signature(t) for t in planted]
+    for i, s in enumerate(planted_sigs):
+        await index.add(f"p{i}", "bench", s, match=False)
+    matrix, size = np.stack(planted_sigs), len(planted_sigs)
+
+    print(f"{'size':>9} {'load s':>7} {'lsh p50 ms':>11} {'lsh p95 ms':>11} {'cands':>6} {'recall':>7} "
+          f"{'scan p50 ms':>12} {'add p50 ms':>11}")
+    try:
+        for n in args.sizes:
+            t = time.perf_counter()
+            extra = nrng.integers(0, 2 ** 32, (max(0, n - size), NUM_PERM), dtype=np.uint32)
+            await load(db.fingerprints, extra, size)
+            matrix, size, load_s = np.concatenate([matrix, extra]), max(n, size), time.perf_counter() - t
+
+            lsh, found, cands = [], 0, 0
+            for i, q in enumerate(queries):
+                before = index.candidates
+                t = time.perf_counter()
+                matches = await index.match(q)
+                lsh.append((time.perf_counter() - t) * 1000)
+                found += any(m["submission_id"] == f"p{i}" for m in matches)
+                cands += index.candidates - before
+
+            scan = []
+            for q in queries[:args.scan_queries]:
+                t = time.perf_counter()
+                sims = np.count_nonzero(matrix == q, axis=1) / NUM_PERM
+                np.flatnonzero(sims >= args.threshold)
+                scan.append((time.perf_counter() - t) * 1000)
+
+            # Incremental maintenance: lookup plus upsert for a new document at this size.
+            adds = []
+            for _ in range(args.adds):
+                s = nrng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint32)
+                t = time.perf_counter()
+                await index.add(f"a{n}-{len(adds)}", "bench", s)
+                adds.append((time.perf_counter() - t) * 1000)
+
+            print(f"{n:>9} {load_s:>7.1f} {statistics.median(lsh):>11.2f} {pct(lsh, .95):>11.2f} "
+                  f"{cands / len(queries):>6.1f} {found / len(queries):>7.1%} {statistics.median(scan):>12.2f} "
+                  f"{statistics.median(adds):>11.2f}")
+    finally:
+        if not args.keep_db:
+            await client.drop_database(args.db)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    ap.add_argument("--db", default=f"trustink_similarity_{int(time.time())}")
+    ap.add_argument("--keep-db", action="store_true")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    ap.add_argument("--planted", type=int, default=200, help="real essays queried with edited copies")
+    ap.add_argument("--words", type=int, default=800)
+    ap.add_argument("--edit-rate", type=float, default=0.03, help="fraction of words replaced in each copy")
+    ap.add_argument("--threshold", type=float, default=0.6)
+    ap.add_argument("--scan-queries", type=int, default=20)
+    ap.add_argument("--adds", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Partner re-verification: one request per ID against POST /api/v1/verify:batch.
+
+Runs against a live server. IDs are collected from the public registry and padded with unknown
+IDs up to --ids. Use a key on a tier whose burst covers the batch size (PUT
+/api/admin/apikeys/{id}/tier) and raise IP_RATE_LIMIT on the server, or the rate limiter
+becomes the thing measured. Run from backend/:
+
+    python benchmarks/bench_verify_batch.py --base-url http://localhost:8001 --api-key vhk_... --ids 2000
+"""
+import argparse, asyncio, statistics, time
+
+import httpx
+
+
+async def collect_ids(c: httpx.AsyncClient, n: int):
+    ids, page = [], 1
+    while len(ids) < n:
+        r = (await c.get("/api/registry", params={"page": page, "limit": 50})).json()
+        ids += [x["verification_id"] for x in r["certificates"]]
+        if page >= r["pages"]: break
+        page += 1
+    return (ids + [f"VH-0000-{i:06X}" for i in range(n)])[:n]
+
+
+async def per_id(c: httpx.AsyncClient, ids, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    async def one(vid):
+        async with sem:
+            r = await c.get(f"/api/v1/verify/{vid}")
+            assert r.status_code in (200, 404), r.text
+    await asyncio.gather(*(one(v) for v in ids))
+
+
+async def batched(c: httpx.AsyncClient, ids, size: int, ndjson: bool):
+    for i in range(0, len(ids), size):
+        r = await c.post("/api/v1/verify:batch", json={"verification_ids": ids[i:i + size]},
+                         params={"format": "ndjson"} if ndjson else None)
+        assert r.status_code == 200, r.text
+
+
+async def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await fn()
+        runs.append(time.perf_counter() - t)
+    return statistics.median(runs)
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, headers={"X-API-Key": args.api_key}, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as c:
+        ids = await collect_ids(c, args.ids)
+        print(f"{len(ids)} IDs, median of {args.repeat} runs")
+        rows = [("per-ID GET, concurrency %d" % args.concurrency, lambda: per_id(c, ids, args.concurrency))]
+        for size in args.batch_sizes:
+            rows.append((f"batch of {size} (json)", lambda s=size: batched(c, ids, s, False)))
+            rows.append((f"batch of {size} (ndjson)", lambda s=size: batched(c, ids, s, True)))
+        for name, fn in rows:
+            t = await timed(fn, args.repeat)
+            print(f"  {name:32s} {t * 1000:9.1f} ms  {len(ids) / t:9.0f} IDs/s")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--base-url", default="http://localhost:8001")
+    p.add_argument("--api-key", required=True)
+    p.add_argument("--ids", type=int, default=1000)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000])
+    p.add_argument("--concurrency", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(p.parse_args()))
@@ -0,0 +1,306 @@
+"""End-to-end load test: server.py against a local mongod, with stub detector and email services.
+
+Seeds a throwaway database with users, submissions and certificates, starts a stub server for
+the HuggingFace detector and the Resend API (fixed latency, deterministic scores), starts the
+API with uvicorn pointed at both, then drives a weighted mix of operations at fixed
+concurrency and reports throughput and p50/p95/p99 latency per operation. Results can be
+saved as a baseline and later runs compared against it; a regression beyond --tolerance
+exits non-zero. Run from backend/ with mongod listening locally:
+
+    python benchmarks/load_test.py --duration 30 --concurrency 32 --save-baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --duration 30 --concurrency 32 --baseline benchmarks/baseline.json
+"""
+import argparse, asyncio, hashlib, hmac, json, os, random, signal, statistics, subprocess, sys, tempfile, time, uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+HMAC_SECRET = "loadtest-hmac-secret"
+PASSWORD = "loadtest123"
+WORDS = ("the of and a to in is was that for it with as his on be at by had are but from or have an they which "
+         "one you were her all she there would their we him been has when who will more no if out so said what up "
+         "its about into than them can only other new some could time these two may then do first any my now "
+         "garden river memory light winter quantum notes essay journey city ocean letters silence fragments "
+         "harvest machine archive echo portrait season north dream atlas voice").split()
+DEFAULT_MIX = "verify=30,partner_verify=15,registry=15,queue=10,submit=10,review=10,pdf=10"
+
+
+# ─── STUB DETECTOR + EMAIL ───────────────────────────────
+def stub_app(latency: float):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def detect(request):
+        await asyncio.sleep(latency)
+        text = (await request.json()).get("inputs", "")
+        human = 0.55 + int(hashlib.md5(text.encode()).hexdigest()[:4], 16) / 0xFFFF * 0.44
+        return JSONResponse([[{"label": "Real", "score": human}, {"label": "Fake", "score": 1 - human}]])
+
+    async def email(request):
+        await asyncio.sleep(latency)
+        return JSONResponse({"id": str(uuid.uuid4())})
+
+    return Starlette(routes=[Route("/detect", detect, methods=["POST"]), Route("/emails", email, methods=["POST"])])
+
+
+# ─── SEEDING ─────────────────────────────────────────────
+def text(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return ". ".join(" ".join(words[i:i + 14]).capitalize() for i in range(0, n_words, 14)) + "."
+
+
+def seed(db, args, rng: random.Random) -> dict:
+    from passwords import hash_pw
+    pw = hash_pw(PASSWORD)
+    now = datetime.now(timezone.utc)
+    ts = lambda i: (now - timedelta(seconds=args.submissions - i)).isoformat()
+
+    users = [{"id": str(uuid.uuid4()), "name": f"Load {role.title()} {i}", "email": f"{role}{i}@load.test",
+              "password_hash": pw, "role": role, "trust_score": rng.randint(20, 95), "verified_posts": 0,
+              "rejected_posts": 0, "identity_verified": False, "status": "active", "created_at": ts(0)}
+             for role, n in (("creator", args.users), ("reviewer", max(1, args.users // 20)), ("admin", 1))
+             for i in range(n)]
+    db.users.insert_many(users)
+    creators = [u for u in users if u["role"] == "creator"]
+
+    subs, certs, pending = [], [], []
+    for i in range(args.submissions):
+        u = rng.choice(creators)
+        body = text(rng, rng.randint(60, 600))
+        status = rng.choices(["approved", "pending", "flagged", "rejected"], [0.6, 0.2, 0.1, 0.1])[0]
+        s = {"id": str(uuid.uuid4()), "creator_id": u["id"], "creator_name": u["name"],
+             "title": text(rng, rng.randint(2, 6)).rstrip(".").title(), "content_text": body, "content_url": None,
+             "ai_human_probability": 0.8, "ai_ai_probability": 0.2, "ai_confidence": "high",
+             "stylometry_score": 0.7, "stylometry_features": None, "status": status, "review_notes": None,
+             "reviewer_id": None, "certificate_id": None, "verification_id": None, "created_at": ts(i),
+             "reviewed_at": None}
+        if status == "approved":
+            ch = hashlib.sha256(body.encode()).hexdigest()
+            vid = f"VH-{now.year}-{uuid.uuid4().hex[:6].upper()}"
+            c = {"id": str(uuid.uuid4()), "submission_id": s["id"], "creator_id": u["id"], "creator_name": u["name"],
+                 "content_title": s["title"], "verification_id": vid, "content_hash": ch,
+                 "signature": hmac.new(HMAC_SECRET.encode(), f"{ch}:{vid}".encode(), hashlib.sha256).hexdigest(),
+                 "timestamp": ts(i), "status": "active", "revoked_at": None, "revocation_reason": None}
+            s["certificate_id"], s["verification_id"] = c["id"], vid
+            certs.append(c)
+        elif status in ("pending", "flagged"):
+            pending.append(s["id"])
+        subs.append(s)
+    for i in range(0, len(subs), 1000):
+        db.submissions.insert_many(subs[i:i + 1000])
+    for i in range(0, len(certs), 1000):
+        db.certificates.insert_many(certs[i:i + 1000])
+    return {"users": users, "certs": certs, "pending": pending}
+
+
+# ─── WORKLOAD ────────────────────────────────────────────
+class Workload:
+    def __init__(self, http: httpx.AsyncClient, data: dict, tokens: dict, api_key: str, rng: random.Random):
+        self.http, self.data, self.tokens, self.api_key, self.rng = http, data, tokens, api_key, rng
+        self.certs, self.pending = data["certs"], list(data["pending"])
+        self.rng.shuffle(self.pending)
+
+    def auth(self, role):
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens[role])}"}
+
+    async def verify(self):
+        return await self.http.get(f"/api/verify/{self.rng.choice(self.certs)['verification_id']}")
+
+    async def partner_verify(self):
+        return await self.http.get(f"/api/v1/verify/{self.rng.choice(self.certs)['verification_id']}",
+                                   headers={"X-API-Key": self.api_key})
+
+    async def registry(self):
+        return await self.http.get("/api/registry", params={"search": self.rng.choice(WORDS[60:])[:self.rng.randint(3, 6)]})
+
+    async def queue(self):
+        return await self.http.get("/api/moderation/queue", params={"limit": 50}, headers=self.auth("reviewer"))
+
+    async def submit(self):
+        return await self.http.post("/api/submissions", headers=self.auth("creator"), json={
+            "title": "Load test", "content_text": text(self.rng, self.rng.randint(60, 600))})
+
+    async def review(self):
+        if not self.pending:
+            return await self.queue()
+        return await self.http.post(f"/api/moderation/{self.pending.pop()}/review", headers=self.auth("reviewer"),
+                                    json={"decision": self.rng.choice(["approved", "rejected"]), "notes": "load"})
+
+    async def pdf(self):
+        return await self.http.get(f"/api/certificates/{self.rng.choice(self.certs)['id']}/pdf")
+
+
+async def drive(base_url: str, data: dict, args, rng: random.Random) -> dict:
+    mix = {k: float(v) for k, v in (p.split("=") for p in args.mix.split(","))}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as http:
+        tokens = {}
+        for role, n in (("creator", 10), ("reviewer", 3), ("admin", 1)):
+            users = [u for u in data["users"] if u["role"] == role][:n]
+            tokens[role] = [(await http.post("/api/auth/login", json={"email": u["email"], "password": PASSWORD}))
+                            .json()["token"] for u in users]
+        admin = {"Authorization": f"Bearer {tokens['admin'][0]}"}
+        key = (await http.post("/api/apikeys", json={"name": "load"}, headers=admin)).json()
+        await http.put(f"/api/admin/apikeys/{key['id']}/tier", json={"tier": "partner"}, headers=admin)
+        w = Workload(http, data, tokens, key["key_value"], rng)
+
+        samples = {op: [] for op in mix}
+        errors = {op: 0 for op in mix}
+        ops, weights = list(mix), list(mix.values())
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                op = rng.choices(ops, weights)[0]
+                t = time.perf_counter()
+                try:
+                    r = await getattr(w, op)()
+                    ok = r.status_code < 400 or r.status_code == 304
+                except httpx.HTTPError:
+                    ok = False
+                samples[op].append(time.perf_counter() - t)
+                errors[op] += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def pct(xs, p):
+        return round(1000 * xs[min(len(xs) - 1, int(p / 100 * len(xs)))], 2) if xs else None
+
+    results = {}
+    for op, xs in samples.items():
+        xs.sort()
+        results[op] = {"count": len(xs), "errors": errors[op], "rps": round(len(xs) / elapsed, 1),
+                       "p50_ms": pct(xs, 50), "p95_ms": pct(xs, 95), "p99_ms": pct(xs, 99),
+                       "mean_ms": round(1000 * statistics.fmean(xs), 2) if xs else None}
+    total = sum(r["count"] for r in results.values())
+    return {"config": {k: getattr(args, k) for k in ("users", "submissions", "concurrency", "duration", "mix",
+                                                     "detector_latency_ms")},
+            "total_rps": round(total / elapsed, 1), "operations": results}
+
+
+def report(res: dict, baseline: dict = None, tolerance: float = 0.2) -> list:
+    print(f"\n{'operation':16s} {'count':>7s} {'err':>5s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s}  vs baseline")
+    regressions = []
+    for op, r in res["operations"].items():
+        note = ""
+        b = (baseline or {}).get("operations", {}).get(op)
+        if b and r["count"] and b.get("p95_ms"):
+            dp95, drps = r["p95_ms"] / b["p95_ms"] - 1, r["rps"] / b["rps"] - 1 if b["rps"] else 0
+            note = f"p95 {dp95:+.0%}, rps {drps:+.0%}"
+            if dp95 > tolerance or drps < -tolerance:
+                regressions.append(op)
+                note += "  REGRESSION"
+        print(f"{op:16s} {r['count']:7d} {r['errors']:5d} {r['rps']:8.1f} {r['p50_ms'] or 0:8.1f} "
+              f"{r['p95_ms'] or 0:8.1f} {r['p99_ms'] or 0:8.1f}  {note}")
+    print(f"total {res['total_rps']} req/s")
+    return regressions
+
+
+# ─── HARNESS ─────────────────────────────────────────────
+def wait_http(url: str, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_stack(args) -> list:
+    """Start the stub detector/email server and the API (uvicorn) on args.db; returns the processes."""
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    env = {**os.environ, "MONGO_URL": args.mongo_url, "DB_NAME": args.db, "AI_DETECTOR": "hf",
+           "HF_API_URL": f"{stub_url}/detect", "RESEND_API_KEY": "re_loadtest", "RESEND_API_URL": stub_url,
+           "HMAC_SECRET_KEY": HMAC_SECRET, "PDF_STORE_DIR": tempfile.mkdtemp(prefix="trustink-pdf-"),
+           "IP_RATE_LIMIT": "100000/100000"}
+    procs = [subprocess.Popen([sys.executable, __file__, "--stub", "--stub-port", str(args.stub_port),
+                               "--detector-latency-ms", str(args.detector_latency_ms)], cwd=BACKEND),
+             subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port),
+                               "--workers", str(args.server_workers), "--log-level", "warning"], cwd=BACKEND, env=env)]
+    try:
+        wait_http(f"{stub_url}/detect")
+        wait_http(f"http://127.0.0.1:{args.port}/api/registry/stats")
+    except Exception:
+        stop_stack(procs)
+        raise
+    return procs
+
+
+def stop_stack(procs: list):
+    for proc in procs:
+        proc.send_signal(signal.SIGINT)
+    for proc in procs:
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    p.add_argument("--db", default=f"trustink_load_{int(time.time())}")
+    p.add_argument("--keep-db", action="store_true")
+    p.add_argument("--port", type=int, default=8790)
+    p.add_argument("--stub-port", type=int, default=8791)
+    p.add_argument("--users", type=int, default=500)
+    p.add_argument("--submissions", type=int, default=20000)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--duration", type=float, default=30)
+    p.add_argument("--mix", default=DEFAULT_MIX, help="op=weight,... over " + DEFAULT_MIX)
+    p.add_argument("--detector-latency-ms", type=float, default=50)
+    p.add_argument("--server-workers", type=int, default=1)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--baseline", help="compare against this results JSON")
+    p.add_argument("--save-baseline", help="write results as the new baseline")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput change vs baseline")
+    p.add_argument("--stub", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.stub:
+        import uvicorn
+        uvicorn.run(stub_app(args.detector_latency_ms / 1000), port=args.stub_port, log_level="warning")
+        return
+
+    from pymongo import MongoClient
+    mongo = MongoClient(args.mongo_url, serverSelectionTimeoutMS=3000)
+    try:
+        mongo.admin.command("ping")
+    except Exception as e:
+        sys.exit(f"mongod not reachable at {args.mongo_url}: {e}")
+    rng = random.Random(args.seed)
+    db = mongo[args.db]
+    t = time.perf_counter()
+    data = seed(db, args, rng)
+    print(f"seeded {len(data['users'])} users, {args.submissions} submissions, {len(data['certs'])} certificates "
+          f"in {time.perf_counter() - t:.1f}s")
+
+    procs = start_stack(args)
+    try:
+        res = asyncio.run(drive(f"http://127.0.0.1:{args.port}", data, args, rng))
+    finally:
+        stop_stack(procs)
+        if not args.keep_db:
+            mongo.drop_database(args.db)
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    regressions = report(res, baseline, args.tolerance)
+    for path in filter(None, (args.out, args.save_baseline)):
+        Path(path).write_text(json.dumps(res, indent=2))
+    if regressions:
+        sys.exit(f"regressions vs baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
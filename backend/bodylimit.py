@@ -0,0 +1,39 @@
+"""Request body size caps, enforced while the body is received.
+
+A Content-Length over the cap is refused before the app runs. Bodies without one (chunked
+transfer encoding) or with one that undercounts are counted as they arrive, and the read that
+crosses the cap raises a 413 in whatever is consuming the body: FastAPI's JSON parsing,
+`request.form()` spooling a multipart part, or a handler iterating `request.stream()`. No
+reader ever holds or spools more than the cap.
+"""
+from typing import Callable
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+
+class BodySizeLimit:
+    """ASGI middleware capping each request body at `limit(path)` bytes."""
+
+    def __init__(self, app, limit: Callable[[str], int]):
+        self.app, self.limit = app, limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        cap = self.limit(scope["path"])
+        n = dict(scope["headers"]).get(b"content-length", b"")
+        if n.isdigit() and int(n) > cap:
+            return await JSONResponse({"detail": f"Request body exceeds {cap} bytes"}, status_code=413)(scope, receive, send)
+        seen = 0
+
+        async def capped():
+            nonlocal seen
+            msg = await receive()
+            if msg["type"] == "http.request":
+                seen += len(msg.get("body", b""))
+                if seen > cap:
+                    raise HTTPException(413, f"Request body exceeds {cap} bytes")
+            return msg
+
+        await self.app(scope, capped, send)
@@ -0,0 +1,294 @@
+"""In-process TTL/LRU cache, the two-tier (memory + Mongo) analysis result cache, the
+authenticated-user cache and the `changed_at` feed other workers' caches evict from."""
+import asyncio, logging, time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def rewind(ts: str, seconds: float) -> str:
+    """The ISO timestamp `seconds` before `ts` ("" stays "")."""
+    if not ts: return ts
+    try:
+        return (datetime.fromisoformat(ts) - timedelta(seconds=seconds)).isoformat()
+    except ValueError:
+        return ""
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire `ttl` seconds after they were set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+        value, expires = item
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class AnalysisCache:
+    """Detection + stylometry results keyed by content SHA-256 and analyzer version.
+
+    Memory tier is a TTLCache; the persistent tier is a Mongo collection whose `created_at` TTL
+    index (see `ensure_indexes`) expires documents. Entries written under another `version`
+    are never read and age out through that index. `invalidate()` is an explicit admin action,
+    not run at startup: during a rolling deploy, or on a worker that fell back to the mock
+    detector, other workers are still reading their own version from the shared tier.
+    """
+
+    def __init__(self, collection, version: str, maxsize: int = 4096, ttl: float = 86400):
+        self.collection, self.version, self.ttl = collection, version, ttl
+        self.memory = TTLCache(maxsize, ttl)
+        self.hits = self.misses = self.db_hits = 0
+
+    def _key(self, ch: str) -> str:
+        return f"{self.version}:{ch}"
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("created_at", expireAfterSeconds=int(self.ttl))
+        await self.collection.create_index("version")
+
+    async def get(self, ch: str) -> Optional[dict]:
+        key = self._key(ch)
+        res = self.memory.get(key)
+        if res is None:
+            doc = await self.collection.find_one({"_id": key})
+            if doc:
+                res = doc["result"]
+                self.memory.set(key, res)
+                self.db_hits += 1
+        if res is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return res
+
+    def fallback(self, result: dict) -> bool:
+        """A mock score under a real detector's version: the detector was down, so don't pin it."""
+        return result["ai"].get("source") == "mock" and not self.version.startswith("mock|")
+
+    async def put(self, ch: str, result: dict) -> bool:
+        if self.fallback(result):
+            return False
+        key = self._key(ch)
+        self.memory.set(key, result)
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "version": self.version, "content_hash": ch, "result": result,
+             "created_at": datetime.now(timezone.utc)},
+            upsert=True)
+        return True
+
+    async def invalidate(self, all_versions: bool = False) -> int:
+        """Drop persisted entries from other analyzer versions (or everything) and flush memory."""
+        self.memory.clear()
+        q = {} if all_versions else {"version": {"$ne": self.version}}
+        res = await self.collection.delete_many(q)
+        return res.deleted_count
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"version": self.version, "hits": self.hits, "misses": self.misses, "persistent_hits": self.db_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0, "memory": self.memory.stats()}
+
+
+class ChangeFeed:
+    """Documents whose `field` timestamp (default `changed_at`) moved since the last `poll()`,
+    projected to `key`, `field` and `extra`.
+
+    The timestamp is stamped before the write commits, so a change can become visible after a
+    later-stamped one already advanced the watermark. Each poll re-reads `lookback` seconds
+    behind it and skips (key, timestamp) pairs it has already reported.
+    """
+
+    def __init__(self, collection, key: str, lookback: float = 10, field: str = "changed_at", extra: tuple = ()):
+        self.collection, self.key, self.lookback, self.field = collection, key, lookback, field
+        self.projection = {"_id": 0, key: 1, field: 1, **{f: 1 for f in extra}}
+        self.last_changed = datetime.now(timezone.utc).isoformat()
+        self._seen: Dict[str, str] = {}  # key -> timestamp, reported inside the lookback
+
+    async def poll(self) -> List[dict]:
+        changed = []
+        async for d in self.collection.find({self.field: {"$gt": rewind(self.last_changed, self.lookback)}},
+                                            self.projection):
+            at = d[self.field]
+            self.last_changed = max(self.last_changed, at)
+            if self._seen.get(d[self.key]) == at: continue
+            self._seen[d[self.key]] = at
+            changed.append(d)
+        cutoff = rewind(self.last_changed, self.lookback)
+        self._seen = {k: at for k, at in self._seen.items() if at > cutoff}
+        return changed
+
+
+class UserCache:
+    """User documents by id for `current_user`, so a page load's burst of calls costs one lookup.
+
+    Writers that change what authorization depends on (status, role, trust) stamp `changed_at`
+    and call `forget()`, which evicts on this worker at once; other workers evict at their next
+    `sync()`, which reads a ChangeFeed. A lookup that raced an eviction is not cached, so a ban is
+    never papered over by a read that started before it.
+    """
+
+    def __init__(self, collection, maxsize: int = 10000, ttl: float = 30):
+        self.collection = collection
+        self.cache = TTLCache(maxsize, ttl)
+        self.generation = 0
+        self.invalidations = self.remote_invalidations = 0
+        self.changes = ChangeFeed(collection, "id")
+        self.synced_at = time.monotonic()
+
+    async def get(self, uid: str) -> Optional[dict]:
+        u = self.cache.get(uid)
+        if u is None:
+            gen = self.generation
+            u = await self.collection.find_one({"id": uid}, {"_id": 0})
+            if u is None: return None
+            if gen == self.generation: self.cache.set(uid, u)
+        return dict(u)
+
+    def forget(self, uid: str):
+        self.generation += 1
+        self.invalidations += 1
+        self.cache.pop(uid)
+
+    def clear(self):
+        self.generation += 1
+        self.cache.clear()
+
+    async def sync(self):
+        """Evict users changed by other workers since the last sync."""
+        for u in await self.changes.poll():
+            self.forget(u["id"])
+            self.remote_invalidations += 1
+        self.synced_at = time.monotonic()
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"User cache sync failed: {e}")
+
+    def sync_age(self) -> float:
+        """Seconds since the last sync: how stale another worker's change can be here."""
+        return time.monotonic() - self.synced_at
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "ttl": self.cache.ttl, "invalidations": self.invalidations,
+                "remote_invalidations": self.remote_invalidations, "sync_age_seconds": round(self.sync_age(), 3)}
+
+
+class CertCache:
+    """Read-through cache for the public certificate lookups, keyed "id:<cid>" and
+    "verification_id:<vid>". Misses are cached for `miss_ttl` seconds.
+
+    A warm hit is served from memory with no query. Revocation is the only change to an issued
+    certificate: revoke() calls `forget()` on its own worker, and every other worker evicts it at
+    its next `sync()`, which reads a ChangeFeed on `revoked_at`. Staleness is therefore bounded by
+    the sync interval. As in UserCache, a read that raced an eviction is not cached.
+    """
+
+    def __init__(self, collection, maxsize: int = 50000, ttl: float = 300, miss_ttl: float = 10):
+        self.collection, self.miss_ttl = collection, miss_ttl
+        self.cache = TTLCache(maxsize, ttl)
+        self.generation = self.remote_invalidations = 0
+        self.revocations = ChangeFeed(collection, "id", field="revoked_at", extra=("verification_id",))
+        self.synced_at = time.monotonic()
+
+    async def get(self, field: str, value: str) -> Optional[dict]:
+        key = f"{field}:{value}"
+        c = self.cache.get(key, _MISSING)
+        if c is _MISSING:
+            gen = self.generation
+            c = await self.collection.find_one({field: value}, {"_id": 0})
+            if gen == self.generation:
+                if c: self.remember(c)
+                else: self.cache.set(key, None, self.miss_ttl)
+        return c
+
+    async def get_many(self, field: str, values: List[str]) -> Dict[str, dict]:
+        """Batch `get`: cache hits first, then one `$in` query for the rest. Returns {value: cert}."""
+        found, missed = {}, []
+        for v in values:
+            c = self.cache.get(f"{field}:{v}", _MISSING)
+            if c is _MISSING: missed.append(v)
+            elif c: found[v] = c
+        if missed:
+            gen = self.generation
+            async for c in self.collection.find({field: {"$in": missed}}, {"_id": 0}):
+                found[c[field]] = c
+                if gen == self.generation: self.remember(c)
+            if gen == self.generation:
+                for v in missed:
+                    if v not in found: self.cache.set(f"{field}:{v}", None, self.miss_ttl)
+        return found
+
+    def remember(self, c: dict):
+        self.cache.set(f"id:{c['id']}", c)
+        self.cache.set(f"verification_id:{c['verification_id']}", c)
+
+    def forget(self, c: dict):
+        self.generation += 1
+        self.cache.pop(f"id:{c['id']}")
+        self.cache.pop(f"verification_id:{c['verification_id']}")
+
+    async def sync(self):
+        """Evict certificates revoked by other workers since the last sync."""
+        for c in await self.revocations.poll():
+            self.forget(c)
+            self.remote_invalidations += 1
+        self.synced_at = time.monotonic()
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Certificate cache sync failed: {e}")
+
+    def sync_age(self) -> float:
+        return time.monotonic() - self.synced_at
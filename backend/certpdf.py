@@ -0,0 +1,88 @@
+"""Certificate PDF layout.
+
+Kept out of server.py so the CPU pool's worker processes can import it without the app.
+"""
+from datetime import datetime, timezone
+from io import BytesIO
+
+from reportlab.lib.colors import HexColor, white
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+
+# Styles are built once at import; only the document itself is per-certificate.
+PDF_EMERALD, PDF_SLATE, PDF_MUTED = HexColor('#10b981'), HexColor('#1e293b'), HexColor('#64748b')
+PDF_STYLES = {
+    "title": ParagraphStyle('title', fontSize=26, textColor=HexColor('#111827'), alignment=TA_CENTER,
+                            spaceAfter=4, fontName='Helvetica-Bold'),
+    "sub": ParagraphStyle('sub', fontSize=12, textColor=PDF_MUTED, alignment=TA_CENTER, spaceAfter=6),
+    "label": ParagraphStyle('label', fontSize=8, textColor=PDF_MUTED, fontName='Helvetica-Bold',
+                            spaceBefore=12, spaceAfter=2),
+    "value": ParagraphStyle('value', fontSize=10, textColor=PDF_SLATE, spaceAfter=4, leading=14),
+    "mono": ParagraphStyle('mono', fontSize=7, textColor=PDF_SLATE, fontName='Courier',
+                           spaceAfter=4, leading=10, wordWrap='CJK'),
+    "cert_active": ParagraphStyle('cert_title', fontSize=20, textColor=PDF_EMERALD,
+                                  alignment=TA_CENTER, fontName='Helvetica-Bold', spaceAfter=4),
+    "cert_revoked": ParagraphStyle('cert_title', fontSize=20, textColor=HexColor('#ef4444'),
+                                   alignment=TA_CENTER, fontName='Helvetica-Bold', spaceAfter=4),
+    "footer": ParagraphStyle('footer', fontSize=8, textColor=PDF_MUTED, alignment=TA_CENTER, spaceBefore=8),
+}
+PDF_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), HexColor('#f1f5f9')),
+    ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#111827')),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('PADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, HexColor('#e2e8f0')),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [white, HexColor('#fafafa')]),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+def build_cert_pdf(cert: dict, frontend_url: str) -> bytes:
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.8*inch, bottomMargin=0.8*inch,
+                            leftMargin=0.8*inch, rightMargin=0.8*inch)
+    st = PDF_STYLES
+
+    ts = datetime.fromisoformat(cert.get('timestamp', datetime.now(timezone.utc).isoformat()))
+    is_active = cert.get('status') == 'active'
+
+    elements = [
+        Paragraph("TrustInk", st["title"]),
+        Paragraph("Verified Human Content Certification", st["sub"]),
+        HRFlowable(width="100%", thickness=2, color=HexColor('#111827'), spaceAfter=16),
+        Spacer(1, 0.1*inch),
+        Paragraph(f"{'Certificate of Authenticity' if is_active else 'REVOKED CERTIFICATE'}",
+                  st["cert_active"] if is_active else st["cert_revoked"]),
+        Paragraph("This certifies that the following content has been verified as human-written" if is_active
+                  else "This certificate has been revoked.", st["sub"]),
+        Spacer(1, 0.2*inch),
+    ]
+
+    data = [
+        ['Content Title', cert.get('content_title', 'N/A')],
+        ['Creator', cert.get('creator_name', 'N/A')],
+        ['Verification ID', cert.get('verification_id', 'N/A')],
+        ['Status', cert.get('status', 'N/A').upper()],
+        ['Issued', ts.strftime('%B %d, %Y at %H:%M UTC')],
+    ]
+    if cert.get('revocation_reason'):
+        data.append(['Revocation Reason', cert['revocation_reason']])
+
+    tbl = Table(data, colWidths=[1.8*inch, 5.0*inch])
+    tbl.setStyle(PDF_TABLE_STYLE)
+    elements.append(tbl)
+    elements.append(Spacer(1, 0.2*inch))
+    elements.append(Paragraph("SHA-256 CONTENT HASH", st["label"]))
+    elements.append(Paragraph(cert.get('content_hash', 'N/A'), st["mono"]))
+    elements.append(Paragraph("HMAC-SHA256 SIGNATURE", st["label"]))
+    elements.append(Paragraph(cert.get('signature', 'N/A'), st["mono"]))
+    elements.append(Spacer(1, 0.2*inch))
+    elements.append(HRFlowable(width="100%", thickness=1, color=HexColor('#e2e8f0')))
+    elements.append(Paragraph(f"Verify at: {frontend_url}/verify/{cert.get('verification_id', '')}",
+                               st["footer"]))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,85 @@
+"""Submission bodies: small ones inline in `submissions`, large ones in GridFS.
+
+`receive()` reads an upload stream once. It hashes and validates UTF-8 as chunks arrive,
+enforces the size cap, and keeps at most `inline_max` bytes in memory; past that the body is
+spilled into a GridFS upload stream, so a book-length upload never sits whole in the worker and
+never bloats the submission documents every list and queue query touches.
+"""
+import codecs, hashlib
+from typing import AsyncIterator, NamedTuple, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+PREVIEW_CHARS = 500
+
+
+class ContentTooLarge(Exception):
+    pass
+
+
+class Received(NamedTuple):
+    text: Optional[str]        # the body, if small enough to keep inline
+    ref: Optional[str]         # GridFS file id otherwise
+    size: int                  # bytes
+    sha256: str                # equals content_hash(text)
+    preview: str               # first PREVIEW_CHARS characters
+
+
+class ContentStore:
+    def __init__(self, db, bucket: str = "submission_content", inline_max: int = 256 * 1024,
+                 max_bytes: int = 20 * 1024 * 1024):
+        self.db, self.bucket_name, self._bucket = db, bucket, None
+        self.inline_max, self.max_bytes = inline_max, max_bytes
+
+    @property
+    def bucket(self):
+        # Built on first use: motor binds the bucket to the running event loop.
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def receive(self, chunks: AsyncIterator[bytes], filename: str, metadata: Optional[dict] = None) -> Received:
+        """Consume `chunks`. Raises ContentTooLarge past `max_bytes` and UnicodeDecodeError on non-UTF-8."""
+        h, dec = hashlib.sha256(), codecs.getincrementaldecoder("utf-8")()
+        buf, size, upload, preview = bytearray(), 0, None, ""
+        try:
+            async for chunk in chunks:
+                if not chunk: continue
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ContentTooLarge(f"Content exceeds {self.max_bytes} bytes")
+                h.update(chunk)
+                text = dec.decode(chunk)
+                if len(preview) < PREVIEW_CHARS:
+                    preview += text[:PREVIEW_CHARS - len(preview)]
+                if upload is not None:
+                    await upload.write(chunk)
+                    continue
+                buf += chunk
+                if len(buf) > self.inline_max:
+                    upload = self.bucket.open_upload_stream(filename, metadata=metadata)
+                    await upload.write(bytes(buf))
+                    buf = None
+            dec.decode(b"", final=True)
+        except BaseException:
+            if upload is not None:
+                await upload.abort()
+            raise
+        if upload is not None:
+            await upload.close()
+            return Received(None, str(upload._id), size, h.hexdigest(), preview)
+        return Received(buf.decode(), None, size, h.hexdigest(), preview)
+
+    async def read(self, ref: str, limit: int = -1) -> str:
+        """The body as text. With `limit`, only its first `limit` bytes are fetched and a character
+        cut in half at the end is dropped."""
+        stream = await self.bucket.open_download_stream(ObjectId(ref))
+        return codecs.getincrementaldecoder("utf-8")().decode(await stream.read(limit), final=limit < 0)
+
+    async def stream(self, ref: str) -> AsyncIterator[bytes]:
+        stream = await self.bucket.open_download_stream(ObjectId(ref))
+        while True:
+            chunk = await stream.readchunk()
+            if not chunk: break
+            yield chunk
@@ -0,0 +1,94 @@
+"""Precomputed counts kept in one document per scope and bumped on every status transition.
+
+A missing or stale document is rebuilt from a single `$facet` aggregation over the scope's
+source collection. A write to a source collection is bracketed by `writing()`. Before the write,
+it leaves an in-flight marker on each scope's document. Afterwards, it adds its deltas and
+removes the marker. Both steps increment the document's version `v`.
+
+A rebuild marks the document stale and reads `v` and the markers. It counts only if no writer is
+in flight, and it stores the count only if `v` has not moved since. Otherwise it counts again.
+So every write is either in the count or bumped after it, never both and never neither. A
+marker older than INFLIGHT_TIMEOUT is taken to be from a writer that died; its write, if any,
+is in the count and its bump will never come.
+"""
+import asyncio, logging, time, uuid
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+Source = Callable[[str], Tuple[object, Optional[dict], dict]]
+INFLIGHT_TIMEOUT = 30  # seconds
+
+
+async def facet_counts(coll, match: Optional[dict], groups: dict) -> dict:
+    pipeline = ([{"$match": match}] if match else []) + [{"$facet": {
+        "total": [{"$count": "n"}],
+        **{name: [{"$group": {"_id": f"${field}", "n": {"$sum": 1}}}] for name, field in groups.items()}
+    }}]
+    row = (await coll.aggregate(pipeline).to_list(1))[0]
+    out = {"total": row["total"][0]["n"] if row["total"] else 0}
+    for name in groups:
+        for g in row[name]:
+            out[f"{name}_{str(g['_id']).lower()}"] = g["n"]
+    return out
+
+
+class Counters:
+    def __init__(self, collection, source: Source, tries: int = 5):
+        """`source(scope)` returns (collection, match, {name: field}) to count the scope from."""
+        self.collection, self.source, self.tries = collection, source, tries
+        self.rebuilds = self.retries = 0
+
+    async def get(self, scope: str) -> dict:
+        doc = await self.collection.find_one({"_id": scope}, {"inflight": 0})
+        if doc and not doc.get("stale"):
+            return doc
+        return await self.rebuild(scope)
+
+    async def rebuild(self, scope: str) -> dict:
+        self.rebuilds += 1
+        for attempt in range(self.tries):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(0.01 * 2 ** attempt)
+            doc = await self.collection.find_one_and_update(
+                {"_id": scope}, {"$set": {"stale": True}, "$inc": {"v": 0}}, {"v": 1, "inflight": 1},
+                upsert=True, return_document=ReturnDocument.AFTER)
+            busy = any(at > time.time() - INFLIGHT_TIMEOUT for at in doc.get("inflight", {}).values())
+            if busy and attempt + 1 < self.tries: continue
+            counts = await facet_counts(*self.source(scope))
+            if busy: break
+            # Replacing also drops the markers of writers that timed out.
+            res = await self.collection.replace_one({"_id": scope, "v": doc["v"]}, {**counts, "v": doc["v"]})
+            if res.matched_count:
+                return counts
+        # Still busy: serve this count and leave the doc stale for the next reader to retry.
+        logger.warning(f"Stats counters for {scope} kept changing during rebuild")
+        return counts
+
+    @asynccontextmanager
+    async def writing(self, *scopes: str):
+        """Bracket a write to the source collections of `scopes`. Put what it changed in the
+        yielded dict as {scope: deltas}; they are applied on exit, also when the write raised."""
+        marker = f"inflight.{uuid.uuid4().hex}"
+        await self.collection.bulk_write([UpdateOne(
+            {"_id": scope}, {"$set": {marker: time.time()}, "$inc": {"v": 1}, "$setOnInsert": {"stale": True}},
+            upsert=True) for scope in scopes], ordered=False)
+        deltas: Dict[str, dict] = {}
+        try:
+            yield deltas
+        finally:
+            await self.collection.bulk_write([UpdateOne(
+                {"_id": scope}, {"$inc": {**deltas.get(scope, {}), "v": 1}, "$unset": {marker: ""}})
+                for scope in scopes], ordered=False)
+
+    async def invalidate(self, scope: Optional[str] = None) -> int:
+        """Mark one scope (or all) stale so the next read recounts it."""
+        res = await self.collection.update_many({"_id": scope} if scope else {}, {"$set": {"stale": True}})
+        return res.modified_count
+
+    def stats(self) -> dict:
+        return {"rebuilds": self.rebuilds, "retries": self.retries}
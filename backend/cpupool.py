@@ -0,0 +1,118 @@
+"""Process pool for CPU-bound work (PDF rendering, password hashing, feature extraction).
+
+Work runs in separate processes so it neither holds the GIL nor stalls the event loop. At most
+`workers + max_queue` tasks are submitted at once; further callers wait for a slot, and give
+up with `PoolBusy` after `queue_timeout` so overload turns into fast 503s instead of an
+ever-growing backlog. `workers=0` runs tasks in threads instead (tests, single-core hosts).
+A worker process that dies breaks the whole executor; it is replaced and the task retried
+once. After `close()`, `run()` raises `PoolClosed` until the pool is started again.
+Tasks must be picklable module-level functions that don't import the app.
+"""
+import asyncio, logging, multiprocessing, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusy(Exception):
+    """Raised when no slot frees up within the queue timeout."""
+
+
+class PoolClosed(RuntimeError):
+    """Raised by `run()` after `close()`."""
+
+
+class CpuPool:
+    def __init__(self, workers: int = 2, max_queue: int = 64, queue_timeout: float = 5.0,
+                 start_method: Optional[str] = None):
+        self.workers, self.max_queue, self.queue_timeout = workers, max_queue, queue_timeout
+        self.start_method = start_method
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.closed = False
+        self.waiting = self.running = self.rejected = self.restarts = 0
+        self.tasks: Dict[str, list] = {}  # kind -> [count, errors, total wait s, total run s, max run s]
+
+    def start(self):
+        self.closed = False
+        if self._slots is not None:
+            return
+        if self.workers > 0:
+            self._spawn()
+        self._slots = asyncio.Semaphore(max(1, self.workers) + self.max_queue)
+
+    def _spawn(self):
+        ctx = multiprocessing.get_context(self.start_method) if self.start_method else None
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=ctx)
+
+    def close(self):
+        self.closed = True
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self._slots = None
+
+    async def _in_process(self, fn: Callable, *args):
+        loop, executor = asyncio.get_running_loop(), self.executor
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            if self.closed: raise
+            # Every task in flight fails with the executor; only the first replaces it.
+            if self.executor is executor:
+                logger.warning("CPU pool worker died, restarting the pool")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._spawn()
+                self.restarts += 1
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def run(self, fn: Callable, *args, kind: str = "task"):
+        if self.closed:
+            raise PoolClosed("CPU pool is closed")
+        if self._slots is None:
+            self.start()
+        t0 = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PoolBusy(f"CPU pool saturated ({self.running} tasks in flight)")
+        finally:
+            self.waiting -= 1
+        t1 = time.perf_counter()
+        self.running += 1
+        ok = False
+        try:
+            if self.executor:
+                result = await self._in_process(fn, *args)
+            else:
+                result = await asyncio.to_thread(fn, *args)
+            ok = True
+            return result
+        finally:
+            self.running -= 1
+            self._slots.release()
+            self._record(kind, t1 - t0, time.perf_counter() - t1, ok)
+
+    def _record(self, kind: str, wait: float, run: float, ok: bool):
+        s = self.tasks.get(kind)
+        if s is None:
+            s = self.tasks[kind] = [0, 0, 0.0, 0.0, 0.0]
+        s[0] += 1
+        s[1] += not ok
+        s[2] += wait
+        s[3] += run
+        s[4] = max(s[4], run)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers, "mode": "process" if self.workers > 0 else "thread",
+            "capacity": max(1, self.workers) + self.max_queue, "running": self.running,
+            "waiting": self.waiting, "rejected": self.rejected, "restarts": self.restarts,
+            "tasks": {k: {"count": n, "errors": e, "avg_wait_ms": round(1000 * w / n, 2),
+                          "avg_run_ms": round(1000 * r / n, 2), "max_run_ms": round(1000 * m, 2)}
+                      for k, (n, e, w, r, m) in self.tasks.items()},
+        }
@@ -0,0 +1,282 @@
+"""Pluggable AI-text detector backends.
+
+`hf` calls the hosted HuggingFace inference endpoint, `local` runs the model in-process on CPU
+(transformers/torch are only needed for that backend), `mock` always defers to the heuristic.
+A backend's `detect()` returns None when it has no answer, and the caller falls back to the mock.
+"""
+import os, asyncio, logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HF_API_URL = "https://api-inference.huggingface.co/models/roberta-base-openai-detector"
+
+
+def _confidence(top: float) -> str:
+    return "high" if top > 0.85 else ("medium" if top > 0.65 else "low")
+
+
+def _label_scores(results, human_label: str, ai_label: str):
+    """Pull (human, ai) scores out of a [{label, score}, ...] list, or None if either is missing."""
+    human = next((r['score'] for r in results if r.get('label') == human_label), None)
+    ai = next((r['score'] for r in results if r.get('label') == ai_label), None)
+    if human is None or ai is None:
+        return None
+    return human, ai
+
+
+class Detector:
+    name = "mock"
+    version = "mock"
+
+    async def start(self): pass
+
+    async def close(self): pass
+
+    async def detect(self, text: str) -> Optional[dict]:
+        return None
+
+
+# ─── REMOTE (HuggingFace inference API) ───────────────────
+class HFDetector(Detector):
+    """Shared keep-alive client with bounded pool, split timeouts and a cap on in-flight calls."""
+    name = "hf"
+
+    def __init__(self, url: str = HF_API_URL, token: str = "", connect_timeout: float = 3,
+                 read_timeout: float = 10, max_connections: int = 64, max_concurrency: int = 32,
+                 queue_timeout: float = 2, max_chars: int = 1500):
+        self.url, self.token, self.max_chars = url, token, max_chars
+        self.connect_timeout, self.read_timeout, self.queue_timeout = connect_timeout, read_timeout, queue_timeout
+        self.max_connections = max_connections
+        self.version = f"hf:{url.rsplit('/', 1)[-1]}"
+        self.http: Optional[httpx.AsyncClient] = None
+        self.slots = asyncio.Semaphore(max_concurrency)
+
+    async def start(self):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        self.http = httpx.AsyncClient(
+            headers=headers,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout, pool=self.queue_timeout),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections, keepalive_expiry=30),
+        )
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    async def detect(self, text: str) -> Optional[dict]:
+        if self.http is None:
+            return None
+        # Bound in-flight detector calls; past the queue timeout, fall back rather than pile up.
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("HuggingFace concurrency limit reached, using mock fallback")
+            return None
+        try:
+            resp = await self.http.post(self.url, json={"inputs": text[:self.max_chars]})
+            if resp.status_code == 200:
+                data = resp.json()
+                # Response: [[{label,score},...]] or [{label,score},...]
+                results = data[0] if (data and isinstance(data[0], list)) else data
+                if isinstance(results, list) and results:
+                    scores = _label_scores(results, "Real", "Fake")
+                    if scores:
+                        human, ai = scores
+                        return {"human_probability": round(human, 3), "ai_probability": round(ai, 3),
+                                "confidence": _confidence(max(human, ai)), "source": "roberta-openai-detector"}
+            logger.warning(f"HuggingFace API returned {resp.status_code}, using mock fallback")
+        except Exception as e:
+            logger.warning(f"HuggingFace API error: {e}, using mock fallback")
+        finally:
+            self.slots.release()
+        return None
+
+
+# ─── LOCAL (in-process model, micro-batched) ──────────────
+class MicroBatcher:
+    """Groups concurrent `submit()` calls into batches of at most `max_batch_size` items, waiting
+    at most `max_wait` seconds for a batch to fill, and runs `fn(batch) -> results` in `executor`."""
+
+    def __init__(self, fn: Callable[[list], list], max_batch_size: int = 16, max_wait: float = 0.01,
+                 executor=None, max_inflight: int = 1):
+        self.fn, self.max_batch_size, self.max_wait = fn, max_batch_size, max_wait
+        self.executor, self.max_inflight = executor, max_inflight
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, fut = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Batcher closed"))
+
+    async def submit(self, item):
+        if self._task is None:
+            raise RuntimeError("Batcher not started")
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_inflight)
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch, slots))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch, slots):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.fn, [i for i, _ in batch])
+            self.batches += 1
+            for (_, fut), res in zip(batch, results):
+                if not fut.done(): fut.set_result(res)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done(): fut.set_exception(e)
+        finally:
+            slots.release()
+
+
+def chunk_text(text: str, size: int = 1500, max_chunks: int = 16) -> List[str]:
+    """Split text into whitespace-aligned windows of ~`size` chars, capped at `max_chunks`."""
+    chunks, start, n = [], 0, len(text)
+    while start < n and len(chunks) < max_chunks:
+        end = min(start + size, n)
+        if end < n:
+            cut = text.rfind(" ", start, end)
+            if cut > start: end = cut
+        piece = text[start:end].strip()
+        if piece: chunks.append(piece)
+        start = end
+    return chunks
+
+
+class LocalDetector(Detector):
+    """Runs roberta-base-openai-detector (or a distilled/quantized variant) on CPU in a worker pool.
+
+    Long texts are scored as length-weighted chunks instead of being truncated. `classifier` may be
+    passed in (list[str] -> list[list[{label, score}]]) to run without transformers, e.g. in tests.
+    """
+    name = "local"
+
+    def __init__(self, model: str = "roberta-base-openai-detector", classifier: Optional[Callable] = None,
+                 workers: int = 2, max_batch_size: int = 16, max_wait_ms: float = 10, quantize: bool = False,
+                 human_label: str = "Real", ai_label: str = "Fake", chunk_chars: int = 1500, max_chunks: int = 16):
+        self.model, self.classifier, self.quantize = model, classifier, quantize
+        self.human_label, self.ai_label = human_label, ai_label
+        self.chunk_chars, self.max_chunks = chunk_chars, max_chunks
+        self.version = f"local:{model}{':q8' if quantize else ''}"
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detector")
+        self.batcher = MicroBatcher(self._classify, max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000,
+                                    executor=self.executor, max_inflight=workers)
+
+    def _load(self):
+        try:
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+        except ImportError as e:
+            raise RuntimeError("AI_DETECTOR=local requires the transformers and torch packages") from e
+        tokenizer = AutoTokenizer.from_pretrained(self.model)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model).eval()
+        if self.quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        clf = pipeline("text-classification", model=model, tokenizer=tokenizer, device=-1, top_k=None)
+        return lambda texts: clf(texts, truncation=True, max_length=512, batch_size=len(texts))
+
+    def _classify(self, texts: List[str]) -> list:
+        return self.classifier(texts)
+
+    async def start(self):
+        if self.classifier is None:
+            self.classifier = await asyncio.get_running_loop().run_in_executor(self.executor, self._load)
+            logger.info(f"Local AI detector loaded: {self.version}")
+        await self.batcher.start()
+
+    async def close(self):
+        await self.batcher.close()
+        self.executor.shutdown(wait=False)
+
+    async def detect(self, text: str) -> Optional[dict]:
+        chunks = chunk_text(text, self.chunk_chars, self.max_chunks)
+        if not chunks:
+            return None
+        try:
+            results = await asyncio.gather(*(self.batcher.submit(c) for c in chunks))
+        except Exception as e:
+            logger.warning(f"Local detector error: {e}, using mock fallback")
+            return None
+        human = ai = total = 0.0
+        for chunk, res in zip(chunks, results):
+            scores = _label_scores(res, self.human_label, self.ai_label)
+            if not scores: continue
+            w = len(chunk)
+            human += scores[0] * w
+            ai += scores[1] * w
+            total += w
+        if not total:
+            return None
+        human, ai = human / total, ai / total
+        return {"human_probability": round(human, 3), "ai_probability": round(ai, 3),
+                "confidence": _confidence(max(human, ai)), "source": "roberta-openai-detector-local"}
+
+
+def make_detector(kind: str) -> Detector:
+    """Build the backend selected by AI_DETECTOR (hf | local | mock) from environment settings."""
+    env = os.environ.get
+    if kind == "local":
+        return LocalDetector(
+            model=env('LOCAL_DETECTOR_MODEL', 'roberta-base-openai-detector'),
+            workers=int(env('LOCAL_DETECTOR_WORKERS', '2')),
+            max_batch_size=int(env('LOCAL_DETECTOR_MAX_BATCH', '16')),
+            max_wait_ms=float(env('LOCAL_DETECTOR_MAX_WAIT_MS', '10')),
+            quantize=env('LOCAL_DETECTOR_QUANTIZE', '') in ('1', 'true', 'yes'),
+            human_label=env('LOCAL_DETECTOR_HUMAN_LABEL', 'Real'),
+            ai_label=env('LOCAL_DETECTOR_AI_LABEL', 'Fake'),
+            max_chunks=int(env('LOCAL_DETECTOR_MAX_CHUNKS', '16')),
+        )
+    if kind == "hf":
+        return HFDetector(
+            url=env('HF_API_URL', HF_API_URL), token=env('HF_API_TOKEN', ''),
+            connect_timeout=float(env('HF_CONNECT_TIMEOUT', '3')), read_timeout=float(env('HF_READ_TIMEOUT', '10')),
+            max_connections=int(env('HF_MAX_CONNECTIONS', '64')), max_concurrency=int(env('HF_MAX_CONCURRENCY', '32')),
+            queue_timeout=float(env('HF_QUEUE_TIMEOUT', '2')),
+        )
+    return Detector()
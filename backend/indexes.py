@@ -0,0 +1,106 @@
+"""Managed MongoDB index set and the query shapes it has to cover.
+
+`INDEXES` is applied at startup by `ensure_indexes`. `QUERY_SHAPES` lists the filter/sort of each
+hot endpoint query; tests/test_query_plans.py explains every shape against a real mongod and
+fails on a COLLSCAN or an in-memory SORT, so a new query shape belongs here with its index.
+"""
+import logging
+
+from pymongo import ASCENDING as ASC, DESCENDING as DESC, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("id"),
+        IndexModel([("created_at", ASC), ("id", ASC)]),                    # admin user listing
+        IndexModel("changed_at", sparse=True),                             # cross-worker user cache eviction
+    ],
+    "submissions": [
+        IndexModel("id"),
+        IndexModel([("status", ASC), ("created_at", ASC), ("id", ASC)]),   # moderation queue, status counts
+        IndexModel([("creator_id", ASC), ("created_at", DESC), ("id", DESC)]),  # creator submission list
+        IndexModel([("creator_id", ASC), ("status", ASC)]),                # dashboard counts
+        IndexModel([("created_at", DESC), ("id", DESC)]),                  # reviewer submission list
+    ],
+    "certificates": [
+        IndexModel("verification_id", unique=True),
+        IndexModel("id"),
+        IndexModel([("status", ASC), ("timestamp", DESC)]),                # registry listing, index refresh
+        IndexModel([("creator_id", ASC), ("status", ASC)]),                # creator profile
+        IndexModel("revoked_at"),                                          # index refresh
+    ],
+    "api_keys": [
+        IndexModel("key_value", unique=True),
+        IndexModel([("owner_id", ASC), ("created_at", DESC)]),             # key listing
+        IndexModel([("owner_id", ASC), ("is_active", ASC)]),               # active key count
+        IndexModel("changed_at", sparse=True),                             # cross-worker key eviction
+    ],
+    "trust_events": [
+        IndexModel([("user_id", ASC), ("seq", ASC)], unique=True,           # outbox delivery upserts
+                   partialFilterExpression={"seq": {"$exists": True}}),
+        IndexModel([("user_id", ASC), ("seq", ASC), ("created_at", ASC), ("_id", ASC)]),  # recompute fold
+    ],
+    "analysis_jobs": [
+        IndexModel([("payload.submission_id", ASC), ("status", ASC)]),     # stranded analysis sweep
+    ],
+    "fingerprints": [
+        IndexModel("id", unique=True),
+        IndexModel("bands"),                                               # LSH candidate lookup (multikey)
+    ],
+}
+
+# Indexes from earlier releases that a compound index above replaces.
+RETIRED = {"submissions": ["creator_id_1", "status_1"], "api_keys": ["owner_id_1"],
+           "trust_events": ["user_id_1_created_at_1__id_1"]}
+
+QUERY_SHAPES = [
+    # (name, collection, filter, sort)
+    ("moderation_queue", "submissions", {"status": {"$in": ["pending", "flagged"]}}, [("created_at", 1), ("id", 1)]),
+    ("moderation_queue_page", "submissions",
+     {"$and": [{"status": {"$in": ["pending", "flagged"]}}, {"created_at": {"$gte": "2026-01-01"}},
+               {"$or": [{"created_at": {"$gt": "2026-01-01"}}, {"created_at": "2026-01-01", "id": {"$gt": "x"}}]}]},
+     [("created_at", 1), ("id", 1)]),
+    ("status_count", "submissions", {"status": "pending"}, None),
+    ("creator_submissions", "submissions", {"creator_id": "u1"}, [("created_at", -1), ("id", -1)]),
+    ("all_submissions", "submissions", {}, [("created_at", -1), ("id", -1)]),
+    ("dashboard_counts", "submissions", {"creator_id": "u1", "status": "approved"}, None),
+    ("submission_by_id", "submissions", {"id": "s1"}, None),
+    ("stranded_analyses", "submissions", {"status": "analyzing", "created_at": {"$lt": "2026-01-01"}}, None),
+    ("live_analysis_jobs", "analysis_jobs",
+     {"payload.submission_id": {"$in": ["s1", "s2"]}, "status": {"$in": ["queued", "running"]}}, None),
+    ("registry", "certificates", {"status": "active"}, [("timestamp", -1)]),
+    ("registry_refresh", "certificates", {"timestamp": {"$gt": "2026-01-01"}, "status": "active"}, None),
+    ("revocation_refresh", "certificates", {"revoked_at": {"$gt": "2026-01-01"}}, None),
+    ("creator_profile", "certificates", {"creator_id": "u1", "status": "active"}, None),
+    ("verify", "certificates", {"verification_id": "VH-2026-000000"}, None),
+    ("verify_batch", "certificates", {"verification_id": {"$in": ["VH-2026-000000", "VH-2026-000001"]}}, None),
+    ("certificate_by_id", "certificates", {"id": "c1"}, None),
+    ("cert_revocations", "certificates", {"revoked_at": {"$gt": "2026-01-01"}}, None),
+    ("api_key_auth", "api_keys", {"key_value": "vhk_x", "is_active": True}, None),
+    ("api_key_list", "api_keys", {"owner_id": "u1"}, [("created_at", -1)]),
+    ("api_key_active_count", "api_keys", {"owner_id": "u1", "is_active": True}, None),
+    ("api_key_changes", "api_keys", {"changed_at": {"$gt": "2026-01-01"}}, None),
+    ("trust_ledger", "trust_events", {"user_id": "u1"}, [("seq", 1)]),
+    ("similar_candidates", "fingerprints", {"bands": {"$in": [1, 2, 3]}, "id": {"$ne": "s1"}}, None),
+    ("fingerprint_by_id", "fingerprints", {"id": "s1"}, None),
+    ("login", "users", {"email": "a@b.c"}, None),
+    ("user_by_id", "users", {"id": "u1"}, None),
+    ("admin_users", "users", {}, [("created_at", 1), ("id", 1)]),
+    ("user_changes", "users", {"changed_at": {"$gt": "2026-01-01"}}, None),
+]
+
+
+async def ensure_indexes(db):
+    for coll, models in INDEXES.items():
+        await db[coll].create_indexes(models)
+    for coll, names in RETIRED.items():
+        existing = await db[coll].index_information()
+        for name in names:
+            if name in existing:
+                try:
+                    await db[coll].drop_index(name)
+                except OperationFailure as e:
+                    logger.warning(f"Could not drop retired index {coll}.{name}: {e}")
@@ -0,0 +1,146 @@
+"""Persistent background job queue stored in MongoDB.
+
+Jobs are claimed atomically with `find_one_and_update` and held under a lease, so a worker that
+dies mid-job leaves it to be reclaimed once the lease expires. The claim counts the attempt, so
+a job that keeps killing its worker is dead-lettered like one that keeps raising: failed jobs are
+retried with exponential backoff until `max_attempts`, after which `on_failure` is called.
+`close()` hands the jobs it was running back to the queue without using up an attempt, and
+finished jobs expire after `done_ttl` seconds.
+"""
+import asyncio, logging, uuid
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class JobQueue:
+    def __init__(self, collection, handler: Handler, on_failure: Optional[Handler] = None, workers: int = 4,
+                 max_attempts: int = 5, lease: float = 120, backoff_base: float = 2, backoff_max: float = 300,
+                 poll_interval: float = 1.0, done_ttl: float = 7 * 86400):
+        self.collection, self.handler, self.on_failure = collection, handler, on_failure
+        self.workers, self.max_attempts, self.lease = workers, max_attempts, lease
+        self.backoff_base, self.backoff_max, self.poll_interval = backoff_base, backoff_max, poll_interval
+        self.done_ttl = done_ttl
+        self._tasks: list = []
+        self._running: dict = {}  # job id -> worker name, for releasing leases on close()
+        self._wake: Optional[asyncio.Event] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index([("status", 1), ("run_at", 1)])
+        await self.collection.create_index([("status", 1), ("lease_until", 1)])
+        await self.collection.create_index("finished_at", expireAfterSeconds=int(self.done_ttl),
+                                           partialFilterExpression={"status": "done"})
+
+    async def enqueue(self, kind: str, payload: dict) -> str:
+        now = datetime.now(timezone.utc)
+        job = {"id": str(uuid.uuid4()), "kind": kind, "payload": payload, "status": "queued", "attempts": 0,
+               "run_at": now, "lease_until": None, "last_error": None, "created_at": now, "finished_at": None}
+        await self.collection.insert_one(job)
+        if self._wake is not None:
+            self._wake.set()
+        return job["id"]
+
+    async def claim(self, worker: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [{"status": "queued", "run_at": {"$lte": now}},
+                     {"status": "running", "lease_until": {"$lt": now}}]},
+            {"$set": {"status": "running", "worker": worker, "lease_until": now + timedelta(seconds=self.lease)},
+             "$inc": {"attempts": 1}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def fail(self, job: dict, error: str):
+        """Dead-letter `job` and hand it to on_failure."""
+        logger.error(f"Job {job['id']} ({job['kind']}) failed permanently: {error}")
+        job["last_error"] = error
+        await self.collection.update_one({"id": job["id"]}, {"$set": {
+            "status": "failed", "last_error": error, "lease_until": None, "finished_at": datetime.now(timezone.utc)}})
+        if self.on_failure:
+            try:
+                await self.on_failure(job)
+            except Exception as fe:
+                logger.error(f"Job {job['id']} failure handler error: {fe}")
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.backoff_max, self.backoff_base ** attempts)
+
+    async def run_one(self, job: dict):
+        if job["attempts"] > self.max_attempts:
+            # Reclaimed after its lease expired with every attempt used: the worker running it died.
+            await self.fail(job, job.get("last_error") or f"lease expired after {self.max_attempts} attempts")
+            return
+        try:
+            await self.handler(job)
+        except Exception as e:
+            now = datetime.now(timezone.utc)
+            if job["attempts"] >= self.max_attempts:
+                await self.fail(job, str(e))
+            else:
+                delay = self.backoff(job["attempts"])
+                logger.warning(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {e}, retrying in {delay}s")
+                await self.collection.update_one({"id": job["id"]}, {"$set": {
+                    "status": "queued", "last_error": str(e), "lease_until": None,
+                    "run_at": now + timedelta(seconds=delay)}})
+            return
+        await self.collection.update_one({"id": job["id"]}, {"$set": {
+            "status": "done", "lease_until": None, "finished_at": datetime.now(timezone.utc)}})
+
+    async def _worker(self, name: str):
+        while True:
+            try:
+                job = await self.claim(name)
+            except Exception as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._running[job["id"]] = name
+            try:
+                await self.run_one(job)
+            except Exception as e:
+                # Recording the outcome failed; the lease runs out and the job is claimed again.
+                logger.warning(f"Job {job['id']} ({job['kind']}) status update failed: {e}")
+            finally:
+                self._running.pop(job["id"], None)
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        prefix = uuid.uuid4().hex[:8]
+        self._tasks = [asyncio.create_task(self._worker(f"{prefix}-{i}")) for i in range(self.workers)]
+
+    async def close(self):
+        running = dict(self._running)
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.release(running)
+
+    async def release(self, running: dict):
+        """Requeue jobs this process still holds, without counting the interrupted attempt."""
+        if not running: return
+        res = await self.collection.update_many(
+            {"id": {"$in": list(running)}, "worker": {"$in": list(set(running.values()))}, "status": "running"},
+            {"$set": {"status": "queued", "lease_until": None, "run_at": datetime.now(timezone.utc)},
+             "$inc": {"attempts": -1}})
+        if res.modified_count: logger.info(f"Released {res.modified_count} running job(s) on shutdown")
+
+    async def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["n"]
+        counts["workers"] = len(self._tasks)
+        return counts
@@ -0,0 +1,159 @@
+"""Prometheus metrics for the API, exposed at /metrics.
+
+- request latency per method/route template/status (`instrument` middleware)
+- per-stage timers (`stage("detector")`, ...) and Mongo command timings (`MongoCommandTimer`)
+- detector fallbacks to the mock analyzer
+- cache hit/miss counters and CPU pool gauges, read from the owning objects at scrape time
+- event-loop lag (`watch_loop_lag`) and default thread-pool saturation (`InstrumentedThreadPool`)
+
+Metrics are per process; with several workers, scrape each one or aggregate upstream.
+"""
+import asyncio, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+from starlette.responses import Response
+
+REGISTRY = CollectorRegistry()
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+REQUESTS = Histogram("trustink_http_request_duration_seconds", "HTTP request latency (to response start)",
+                     ["method", "route", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+IN_FLIGHT = Gauge("trustink_http_requests_in_flight", "Requests being handled", registry=REGISTRY)
+STAGES = Histogram("trustink_stage_duration_seconds", "Time spent in a processing stage",
+                   ["stage"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+STAGE_ERRORS = Counter("trustink_stage_errors_total", "Stages that raised", ["stage"], registry=REGISTRY)
+MONGO = Histogram("trustink_mongo_command_duration_seconds", "MongoDB command round trips",
+                  ["command", "collection"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+MONGO_FAILURES = Counter("trustink_mongo_command_failures_total", "Failed MongoDB commands", ["command"],
+                         registry=REGISTRY)
+FALLBACKS = Counter("trustink_detector_fallbacks_total", "Detections served by the mock analyzer instead of "
+                    "the configured detector", ["detector"], registry=REGISTRY)
+LOOP_LAG = Gauge("trustink_event_loop_lag_seconds", "Last measured event-loop scheduling delay", registry=REGISTRY)
+LOOP_LAG_MAX = Gauge("trustink_event_loop_lag_max_seconds", "Worst event-loop delay since the last scrape",
+                     registry=REGISTRY)
+_lag_max = 0.0
+
+
+@contextmanager
+def stage(name: str):
+    t = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        STAGES.labels(name).observe(time.perf_counter() - t)
+
+
+def instrument(app):
+    """Record request latency labelled by the matched route template (not the raw path)."""
+    @app.middleware("http")
+    async def _timed(request, call_next):
+        t = time.perf_counter()
+        status = 500
+        IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            REQUESTS.labels(request.method, getattr(route, "path", "unmatched"), str(status)) \
+                .observe(time.perf_counter() - t)
+
+
+def metrics_response() -> Response:
+    global _lag_max
+    LOOP_LAG_MAX.set(_lag_max)
+    _lag_max = 0.0
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo command listener; pass as `event_listeners=[MongoCommandTimer()]` to the client."""
+    def __init__(self):
+        self.pending: Dict[Tuple[int, object], Tuple[str, str]] = {}
+
+    def started(self, event):
+        coll = event.command.get(event.command_name)
+        self.pending[(event.request_id, event.connection_id)] = (event.command_name, coll if isinstance(coll, str) else "")
+
+    def succeeded(self, event):
+        name, coll = self.pending.pop((event.request_id, event.connection_id), (event.command_name, ""))
+        MONGO.labels(name, coll).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.pending.pop((event.request_id, event.connection_id), None)
+        MONGO_FAILURES.labels(event.command_name).inc()
+
+
+class InstrumentedThreadPool(ThreadPoolExecutor):
+    """Default executor (asyncio.to_thread, run_in_executor) that counts busy and queued work."""
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers, thread_name_prefix="trustink")
+        self.size, self.busy, self.queued = max_workers, 0, 0
+        self._lock = threading.Lock()
+
+    def _count(self, queued: int, busy: int):
+        with self._lock:
+            self.queued += queued
+            self.busy += busy
+
+    def submit(self, fn, *args, **kwargs):
+        self._count(1, 0)
+
+        def run():
+            self._count(-1, 1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._count(0, -1)
+        return super().submit(run)
+
+
+async def watch_loop_lag(interval: float = 0.5):
+    global _lag_max
+    loop = asyncio.get_running_loop()
+    while True:
+        t = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - t - interval)
+        LOOP_LAG.set(lag)
+        _lag_max = max(_lag_max, lag)
+
+
+class _StatsCollector:
+    """Exports counters/gauges read from live objects (caches, pools) when Prometheus scrapes."""
+    def __init__(self):
+        self.caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self.gauges: Dict[str, Tuple[str, Callable[[], float], bool]] = {}
+
+    def collect(self):
+        c = CounterMetricFamily("trustink_cache_lookups", "Cache lookups by result", labels=["cache", "result"])
+        for name, fn in self.caches.items():
+            hits, misses = fn()
+            c.add_metric([name, "hit"], hits)
+            c.add_metric([name, "miss"], misses)
+        yield c
+        for name, (doc, fn, counter) in self.gauges.items():
+            yield (CounterMetricFamily if counter else GaugeMetricFamily)(name, doc, value=fn())
+
+
+_stats = _StatsCollector()
+REGISTRY.register(_stats)
+
+
+def track_cache(name: str, hits_misses: Callable[[], Tuple[int, int]]):
+    _stats.caches[name] = hits_misses
+
+
+def track_gauge(name: str, doc: str, fn: Callable[[], float], counter: bool = False):
+    """Export fn() at scrape time; `counter=True` for monotonic totals (exported with a _total suffix)."""
+    _stats.gauges[name] = (doc, fn, counter)
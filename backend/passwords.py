@@ -0,0 +1,12 @@
+"""bcrypt password hashing, run in the CPU pool's worker processes (see cpupool.py)."""
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_pw(pw: str) -> str:
+    return pwd_context.hash(pw)
+
+
+def verify_pw(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
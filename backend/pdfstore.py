@@ -0,0 +1,126 @@
+"""On-disk store of rendered certificate PDFs.
+
+Files are keyed by certificate ID, status and template version, so each certificate is rendered
+once per state: at issuance (or on its first download) and again after revocation. Files are
+written to a temporary name and renamed into place, so workers sharing the directory never serve
+a partial file, and concurrent renders of the same key within a process are coalesced. Writing
+a state removes the files of earlier states (the active PDF once revoked) but never a later one,
+so an active render that finishes after the revocation can't delete the revoked PDF; `read()`
+re-renders if a file disappears between lookup and read.
+`file_response` serves a stored file with ETag revalidation and single byte-range requests.
+"""
+import asyncio, logging, os, re
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+STATES = {"active": 0, "revoked": 1}  # certificates only move forward through these
+
+
+class PdfStore:
+    def __init__(self, root, render: Callable[[dict], Awaitable[bytes]], version: str = "pdf-1"):
+        self.root, self.render, self.version = Path(root), render, version
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.hits = self.renders = 0
+
+    def key(self, cert: dict) -> str:
+        return f"{cert['id']}-{cert['status']}-{self.version}"
+
+    def path(self, cert: dict) -> Path:
+        return self.root / cert["id"][:2] / f"{self.key(cert)}.pdf"
+
+    async def get(self, cert: dict) -> Path:
+        """Path of the rendered PDF for `cert` in its current state, rendering it if needed."""
+        p = self.path(cert)
+        if p.exists():
+            self.hits += 1
+            return p
+        return await asyncio.shield(self._task(cert, p))
+
+    async def read(self, cert: dict) -> bytes:
+        """The rendered PDF's bytes; re-renders if the file is removed before it can be read."""
+        for _ in range(2):
+            p = await self.get(cert)
+            try:
+                return await asyncio.to_thread(p.read_bytes)
+            except FileNotFoundError:
+                logger.info(f"PDF for {self.key(cert)} removed before it was read, rendering again")
+        return await self.render(cert)
+
+    def prerender(self, cert: dict):
+        """Render `cert` in the background unless it is already stored or being rendered."""
+        p = self.path(cert)
+        if not p.exists():
+            self._task(cert, p)
+
+    def _task(self, cert: dict, p: Path) -> asyncio.Task:
+        k = self.key(cert)
+        t = self.inflight.get(k)
+        if t is None:
+            t = self.inflight[k] = asyncio.create_task(self._render(cert, p))
+            t.add_done_callback(lambda t: self._done(k, t))
+        return t
+
+    def _done(self, k: str, t: asyncio.Task):
+        self.inflight.pop(k, None)
+        if not t.cancelled() and t.exception():
+            logger.warning(f"PDF render for {k} failed: {t.exception()}")
+
+    async def _render(self, cert: dict, p: Path) -> Path:
+        data = await self.render(cert)
+        await asyncio.to_thread(self._write, cert["id"], cert["status"], p, data)
+        self.renders += 1
+        return p
+
+    def _write(self, cid: str, status: str, p: Path, data: bytes):
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+        # Earlier states (and other template versions of this one) are stale; later states are not.
+        rank = STATES.get(status, 0)
+        for old in p.parent.glob(f"{cid}-*.pdf"):
+            state = old.name[len(cid) + 1:].split("-", 1)[0]
+            if old != p and STATES.get(state, 0) <= rank: old.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "renders": self.renders, "rendering": len(self.inflight)}
+
+
+def _read(path: Path, start: int, length: int, chunk: int = 65536):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk, length))
+            if not data: break
+            length -= len(data)
+            yield data
+
+
+def file_response(path: Path, request: Request, headers: dict, media_type: str = "application/pdf") -> Response:
+    """Serve `path` with the given headers (which must include an ETag), honouring If-None-Match
+    and a single `Range: bytes=` request. Full-file responses go out as a FileResponse, which
+    the server may send with sendfile."""
+    etag = headers["ETag"]
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    m = RANGE.match(request.headers.get("range", "").strip())
+    if m and m.group(0) != "bytes=-" and request.headers.get("if-range", etag) == etag:
+        size = path.stat().st_size
+        first, last = m.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        return StreamingResponse(_read(path, start, end - start + 1), status_code=206, media_type=media_type,
+                                 headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}",
+                                          "Content-Length": str(end - start + 1)})
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,112 @@
+"""Token-bucket rate limiting for the partner API.
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens per second; a request spends
+`cost` tokens or is refused with the time until enough have refilled. `MemoryBackend` keeps
+buckets in-process, at most `max_keys` of them, evicting the least recently used; `MongoBackend` keeps them in a shared collection, updated atomically with a
+single pipeline update, so every worker draws from the same bucket.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from pymongo import ReturnDocument
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the request would be allowed (0 if allowed)
+    reset: float        # seconds until the bucket is full again
+
+    def headers(self) -> dict:
+        h = {"X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(self.remaining),
+             "X-RateLimit-Reset": str(int(self.reset + 0.999))}
+        if not self.allowed:
+            h["Retry-After"] = str(max(1, int(self.retry_after + 0.999)))
+        return h
+
+
+def _decide(tokens: float, allowed: bool, rate: float, burst: int, cost: int) -> Decision:
+    retry = 0.0 if allowed else (cost - tokens) / rate
+    return Decision(allowed, burst, int(tokens), retry, (burst - tokens) / rate)
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.buckets: OrderedDict = OrderedDict()  # key -> (tokens, last refill time), oldest use first
+        self.max_keys, self.clock = max_keys, clock
+        self.evictions = 0
+
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Decision:
+        now = self.clock()
+        tokens, ts = self.buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - ts) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        # O(1) per request and a hard bound, however many keys are sprayed at it. An evicted
+        # bucket starts full if its key comes back.
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+            self.evictions += 1
+        return _decide(tokens, allowed, rate, burst, cost)
+
+
+class MongoBackend:
+    def __init__(self, collection, idle_ttl: int = 3600):
+        self.collection, self.idle_ttl = collection, idle_ttl
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("ts", expireAfterSeconds=self.idle_ttl)
+
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Decision:
+        now = datetime.now(timezone.utc)
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, 1000]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": {"$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]},
+                                                                 {"$multiply": [elapsed, rate]}]}]}, "ts": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+            ],
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        return _decide(doc["tokens"], doc["allowed"], rate, burst, cost)
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = self.limited = 0
+
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Decision:
+        d = await self.backend.take(key, rate, burst, cost)
+        if d.allowed: self.allowed += 1
+        else: self.limited += 1
+        return d
+
+    def stats(self) -> dict:
+        return {"backend": type(self.backend).__name__, "allowed": self.allowed, "limited": self.limited}
+
+
+def parse_tiers(spec: str) -> dict:
+    """'free=5/20,standard=50/200' -> {'free': (5.0, 20), 'standard': (50.0, 200)} (rate per s / burst)."""
+    tiers = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, limits = part.split("=")
+        rate, burst = limits.split("/")
+        tiers[name.strip()] = (float(rate), int(burst))
+    return tiers
+
+
+def client_ip(headers, peer: Optional[str], trust_proxy: bool) -> str:
+    if trust_proxy:
+        fwd = headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",")[0].strip()
+    return peer or "unknown"
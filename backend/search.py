@@ -0,0 +1,135 @@
+"""In-process inverted index over active certificates for the public registry search.
+
+Every query term is matched as a prefix (search-as-you-type) and all terms must match.
+Results are ranked by field weight (title over creator), exact-vs-prefix match and term rarity,
+then by recency. The index is kept in sync by `add`/`remove` on issuance and revocation, and by
+`refresh()` polling for changes made by other processes. Timestamps are stamped before the write
+commits, so a certificate can become visible after a later-stamped one was already seen; each
+poll therefore re-reads `lookback` seconds behind its watermarks and skips what it has already
+applied.
+"""
+import heapq, math, re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from cache import rewind
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+FIELDS = (("content_title", 2.0), ("creator_name", 1.5), ("verification_id", 3.0))
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall((text or "").lower())
+
+
+class RegistryIndex:
+    def __init__(self, lookback: float = 10):
+        self.postings: Dict[str, Dict[str, float]] = {}  # token -> {cert_id: field weight}
+        self.docs: Dict[str, tuple] = {}  # cert_id -> (timestamp, tokens)
+        self._sorted: Optional[List[str]] = None
+        self.ready = False
+        self.last_issued = ""
+        self.last_revoked = ""
+        self.lookback = lookback
+        self._revoked: Dict[str, str] = {}  # cert_id -> revoked_at, revocations inside the lookback
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, cert: dict):
+        cid = cert["id"]
+        if cid in self.docs:
+            self.remove(cid)
+        tokens = set()
+        for field, weight in FIELDS:
+            for t in tokenize(cert.get(field)):
+                post = self.postings.get(t)
+                if post is None:
+                    post = self.postings[t] = {}
+                    if self._sorted is not None: insort(self._sorted, t)
+                if weight > post.get(cid, 0):
+                    post[cid] = weight
+                tokens.add(t)
+        self.docs[cid] = (cert.get("timestamp") or "", tokens)
+        self.last_issued = max(self.last_issued, cert.get("timestamp") or "")
+
+    def remove(self, cid: str):
+        doc = self.docs.pop(cid, None)
+        if not doc:
+            return
+        for t in doc[1]:
+            post = self.postings.get(t)
+            if post is None: continue
+            post.pop(cid, None)
+            if not post:
+                del self.postings[t]
+                if self._sorted is not None:
+                    del self._sorted[bisect_left(self._sorted, t)]
+
+    def _terms_with_prefix(self, prefix: str) -> List[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.postings)
+        out, i = [], bisect_left(self._sorted, prefix)
+        while i < len(self._sorted) and self._sorted[i].startswith(prefix):
+            out.append(self._sorted[i])
+            i += 1
+        return out
+
+    def search(self, query: str, k: Optional[int] = None) -> Tuple[int, List[str]]:
+        """Return (total matches, ids of the best `k` matches, best first)."""
+        terms = tokenize(query)
+        if not terms or not self.docs:
+            return 0, []
+        n = len(self.docs)
+        scores: Optional[Dict[str, float]] = None
+        for term in dict.fromkeys(terms):
+            term_scores: Dict[str, float] = {}
+            for tok in self._terms_with_prefix(term):
+                post = self.postings[tok]
+                idf = math.log(1 + n / len(post))
+                exact = 2.0 if tok == term else 1.0
+                for cid, weight in post.items():
+                    s = weight * exact * idf
+                    if s > term_scores.get(cid, 0):
+                        term_scores[cid] = s
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {cid: sc + term_scores[cid] for cid, sc in scores.items() if cid in term_scores}
+            if not scores:
+                return 0, []
+        docs = self.docs
+        key = lambda cid: (scores[cid], docs[cid][0])  # ties go to the newest certificate
+        if k is None or k >= len(scores):
+            return len(scores), sorted(scores, key=key, reverse=True)
+        return len(scores), heapq.nlargest(k, scores, key=key)
+
+    async def load(self, collection, batch_size: int = 2000):
+        projection = {"_id": 0, "id": 1, "content_title": 1, "creator_name": 1, "verification_id": 1, "timestamp": 1}
+        async for cert in collection.find({"status": "active"}, projection).batch_size(batch_size):
+            self.add(cert)
+        last = await collection.find({"revoked_at": {"$ne": None}}, {"revoked_at": 1}) \
+            .sort("revoked_at", -1).limit(1).to_list(1)
+        self.last_revoked = last[0]["revoked_at"] if last else ""
+        self.ready = True
+
+    async def refresh(self, collection) -> List[dict]:
+        """Pick up certificates issued or revoked since the last sync (e.g. by another worker).
+        Returns the newly revoked certificates."""
+        projection = {"_id": 0, "id": 1, "content_title": 1, "creator_name": 1, "verification_id": 1,
+                      "timestamp": 1, "status": 1, "revoked_at": 1}
+        issued = {"$gt": rewind(self.last_issued, self.lookback)}
+        async for cert in collection.find({"timestamp": issued, "status": "active"}, projection):
+            if cert["id"] not in self.docs:
+                self.add(cert)
+        revoked = []
+        async for cert in collection.find({"revoked_at": {"$gt": rewind(self.last_revoked, self.lookback)}}, projection):
+            self.last_revoked = max(self.last_revoked, cert["revoked_at"])
+            if cert["id"] in self._revoked: continue
+            self._revoked[cert["id"]] = cert["revoked_at"]
+            self.remove(cert["id"])
+            revoked.append(cert)
+        cutoff = rewind(self.last_revoked, self.lookback)
+        self._revoked = {cid: at for cid, at in self._revoked.items() if at > cutoff}
+        return revoked
+
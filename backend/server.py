@@ -1,23 +1,38 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Header, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-import os, logging, hashlib, hmac, secrets, random, re, uuid, asyncio, resend, requests
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+import os, logging, hashlib, hmac, secrets, random, re, uuid, asyncio, json, base64, resend
+from collections import deque
 from pathlib import Path
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 from jose import jwt, JWTError
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.colors import HexColor, white, black
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from detector import Detector, make_detector
+from cache import AnalysisCache, CertCache, UserCache
+from stylometry import extract_features
+from jobs import JobQueue
+from search import RegistryIndex
+from trust import TRUST_DELTAS, TrustLedger
+from counters import Counters
+from similarity import SimilarityIndex, signature
+from indexes import ensure_indexes
+from apikeys import ApiKeyStore
+from pdfstore import PdfStore, file_response
+from zipstream import zip_stream
+from contentstore import ContentStore, ContentTooLarge
+from bodylimit import BodySizeLimit
+import metrics
+from metrics import stage
+from certpdf import build_cert_pdf
+from cpupool import CpuPool, PoolBusy, PoolClosed
+import passwords
+from ratelimit import MemoryBackend, MongoBackend, RateLimiter, client_ip, parse_tiers
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,26 +43,74 @@ JWT_SECRET = os.environ.get('JWT_SECRET_KEY', 'vhccs-dev-secret-2026-change-in-p
 JWT_ALGORITHM = 'HS256'
 HMAC_SECRET = os.environ.get('HMAC_SECRET_KEY', 'vhccs-hmac-dev-2026-change-in-prod')
 HIGH_TRUST_THRESHOLD = 80
-HF_API_URL = "https://api-inference.huggingface.co/models/roberta-base-openai-detector"
-HF_TOKEN = os.environ.get('HF_API_TOKEN', '')
+AI_DETECTOR = os.environ.get('AI_DETECTOR', 'hf')  # hf | local | mock
+STYLOMETRY_VERSION = "style-3"  # bump when analyze_style changes so cached results are ignored
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', '4096'))
+ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', str(7 * 86400)))
+SIMILARITY_THRESHOLD = float(os.environ.get('SIMILARITY_THRESHOLD', '0.6'))  # estimated Jaccard of word 5-grams
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '4'))
+ANALYSIS_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_MAX_ATTEMPTS', '5'))
+ANALYSIS_SWEEP_INTERVAL = float(os.environ.get('ANALYSIS_SWEEP_INTERVAL', '60'))  # re-enqueue stranded submissions
+ANALYSIS_SWEEP_AGE = float(os.environ.get('ANALYSIS_SWEEP_AGE', '120'))  # seconds analyzing before a submission counts
+REGISTRY_INDEX_REFRESH = float(os.environ.get('REGISTRY_INDEX_REFRESH', '5'))
+CERT_CACHE_SIZE = int(os.environ.get('CERT_CACHE_SIZE', '50000'))
+CERT_CACHE_TTL = float(os.environ.get('CERT_CACHE_TTL', '300'))
+CERT_REVOCATION_SYNC = float(os.environ.get('CERT_REVOCATION_SYNC', '1'))  # cross-worker revocation propagation
+THREAD_POOL_SIZE = int(os.environ.get('THREAD_POOL_SIZE', str(min(32, (os.cpu_count() or 1) + 4))))
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true') in ('1', 'true', 'yes')
+API_KEY_CACHE_TTL = float(os.environ.get('API_KEY_CACHE_TTL', '300'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+USER_CACHE_SYNC_INTERVAL = float(os.environ.get('USER_CACHE_SYNC_INTERVAL', '1'))  # cross-worker ban/role propagation
+API_KEY_SYNC_INTERVAL = float(os.environ.get('API_KEY_SYNC_INTERVAL', '5'))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # memory | mongo
+# Per-key tiers as rate-per-second/burst; the tier name is stored on the api_keys document.
+RATE_TIERS = parse_tiers(os.environ.get('RATE_TIERS', 'free=5/20,standard=50/200,partner=500/2000'))
+DEFAULT_API_TIER = os.environ.get('DEFAULT_API_TIER', 'free')
+IP_RATE_LIMIT = parse_tiers(f"ip={os.environ.get('IP_RATE_LIMIT', '100/400')}")["ip"]
+TRUST_PROXY = os.environ.get('TRUST_PROXY', '') in ('1', 'true', 'yes')
+CPU_POOL_WORKERS = int(os.environ.get('CPU_POOL_WORKERS', str(min(4, os.cpu_count() or 1))))  # 0 = threads
+CPU_POOL_QUEUE = int(os.environ.get('CPU_POOL_QUEUE', '64'))
+CPU_POOL_TIMEOUT = float(os.environ.get('CPU_POOL_TIMEOUT', '5'))
+CPU_POOL_START_METHOD = os.environ.get('CPU_POOL_START_METHOD', 'spawn')
+STYLOMETRY_OFFLOAD_CHARS = int(os.environ.get('STYLOMETRY_OFFLOAD_CHARS', '20000'))  # smaller texts stay inline
+EXPORT_CONCURRENCY = int(os.environ.get('EXPORT_CONCURRENCY', str(max(2, 2 * CPU_POOL_WORKERS))))
+SUBMISSION_INLINE_MAX = int(os.environ.get('SUBMISSION_INLINE_MAX', str(256 * 1024)))  # bytes; larger goes to GridFS
+SUBMISSION_MAX_BYTES = int(os.environ.get('SUBMISSION_MAX_BYTES', str(20 * 1024 * 1024)))
+# Analysis and similarity fingerprints read at most this much of a GridFS body.
+ANALYSIS_MAX_BYTES = int(os.environ.get('ANALYSIS_MAX_BYTES', str(4 * 1024 * 1024)))
+MAX_JSON_BODY = int(os.environ.get('MAX_JSON_BODY', str(SUBMISSION_INLINE_MAX + 64 * 1024)))
+PDF_STORE_DIR = os.environ.get('PDF_STORE_DIR', str(ROOT_DIR / 'pdf_store'))
+PDF_TEMPLATE_VERSION = "pdf-1"  # bump when build_cert_pdf changes so stored PDFs are re-rendered
+VERIFY_BATCH_MAX = int(os.environ.get('VERIFY_BATCH_MAX', '1000'))
+REVIEW_BATCH_MAX = int(os.environ.get('REVIEW_BATCH_MAX', '200'))
+VERIFY_MAX_AGE = int(os.environ.get('VERIFY_MAX_AGE', '0'))  # seconds browsers/CDNs may reuse without revalidating
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'onboarding@resend.dev')
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://content-cert.preview.emergentagent.com')
 resend.api_key = os.environ.get('RESEND_API_KEY', '')
 
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[metrics.MongoCommandTimer()])
 db = client[DB_NAME]
 
 app = FastAPI(title="TrustInk API")
+
+def request_body_cap(path: str) -> int:
+    # JSON bodies are parsed whole before any handler runs, so they get a small cap; uploads get
+    # the content cap plus room for multipart framing. Enforced on chunked bodies too.
+    return SUBMISSION_MAX_BYTES + 64 * 1024 if path == "/api/submissions/upload" else MAX_JSON_BODY
+
+app.add_middleware(BodySizeLimit, limit=request_body_cap)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Content-Range", "ETag", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"],
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+cpu_pool = CpuPool(CPU_POOL_WORKERS, CPU_POOL_QUEUE, CPU_POOL_TIMEOUT, CPU_POOL_START_METHOD)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -71,6 +134,12 @@ class ReviewDecision(BaseModel):
     decision: str
     notes: str = ""
 
+class ReviewBatchItem(ReviewDecision):
+    submission_id: str
+
+class ReviewBatch(BaseModel):
+    items: List[ReviewBatchItem]
+
 class RevocationReq(BaseModel):
     reason: str
 
@@ -83,9 +152,15 @@ class UserStatusUpdate(BaseModel):
 class TrustScoreUpdate(BaseModel):
     trust_score: int
 
+class APIKeyTierUpdate(BaseModel):
+    tier: str
+
+class VerifyBatch(BaseModel):
+    verification_ids: List[str]
+
 # ─── HELPERS ──────────────────────────────────────────────
-def hash_pw(pw): return pwd_context.hash(pw)
-def verify_pw(plain, hashed): return pwd_context.verify(plain, hashed)
+async def hash_pw(pw): return await cpu_pool.run(passwords.hash_pw, pw, kind="bcrypt")
+async def verify_pw(plain, hashed): return await cpu_pool.run(passwords.verify_pw, plain, hashed, kind="bcrypt")
 
 def make_token(uid: str, email: str, role: str) -> str:
     exp = datetime.now(timezone.utc) + timedelta(hours=24)
@@ -99,6 +174,14 @@ def clean(d):
 
 def tl(score): return "high" if score >= HIGH_TRUST_THRESHOLD else ("medium" if score >= 50 else "low")
 
+user_cache = UserCache(db.users, ttl=USER_CACHE_TTL)
+
+async def update_user(uid: str, upd: dict):
+    """Write fields that authorization or the profile depends on, then evict the cached user here;
+    the `changed_at` stamp evicts it on other workers at their next sync."""
+    await db.users.update_one({"id": uid}, {"$set": {**upd, "changed_at": datetime.now(timezone.utc).isoformat()}})
+    user_cache.forget(uid)
+
 async def current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(creds.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
@@ -106,9 +189,10 @@ async def current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
         if not uid: raise HTTPException(401, "Invalid token")
     except JWTError:
         raise HTTPException(401, "Invalid token")
-    u = await db.users.find_one({"id": uid})
+    u = await user_cache.get(uid)
     if not u: raise HTTPException(401, "User not found")
-    return clean(u)
+    if u.get("status", "active") != "active": raise HTTPException(403, f"Account {u['status']}")
+    return u
 
 async def reviewer_only(u=Depends(current_user)):
     if u["role"] not in ["reviewer", "admin"]: raise HTTPException(403, "Reviewer access required")
@@ -118,96 +202,178 @@ async def admin_only(u=Depends(current_user)):
     if u["role"] != "admin": raise HTTPException(403, "Admin access required")
     return u
 
-# ─── AI DETECTION (HuggingFace roberta-base-openai-detector + mock fallback) ─
-def _mock_ai(text: str) -> dict:
-    words = text.split()
-    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-    if not sentences:
+# ─── PAGINATION ───────────────────────────────────────────
+# Keyset pagination on (created_at, id): the cursor is the last row's sort key, so every page is
+# an index range scan regardless of depth. The next cursor goes in the X-Next-Cursor header to
+# keep list responses plain JSON arrays.
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc.get("created_at"), doc.get("id")]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        ca, i = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return ca, i
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+def after_cursor(q: dict, cursor: Optional[str], desc: bool) -> dict:
+    if not cursor:
+        return q
+    ca, i = decode_cursor(cursor)
+    op = "$lt" if desc else "$gt"
+    # The inclusive range on created_at gives the planner index bounds; the $or breaks ties on id.
+    return {"$and": [q, {"created_at": {op + "e": ca}},
+                     {"$or": [{"created_at": {op: ca}}, {"created_at": ca, "id": {op: i}}]}]}
+
+def keyset_sort(desc: bool) -> dict:
+    d = -1 if desc else 1
+    return {"created_at": d, "id": d}
+
+def page_out(rows: list, limit: int, response: Response) -> list:
+    """Trim the look-ahead row and advertise the next cursor if there was one."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return rows
+
+def ndjson(rows, transform=None) -> StreamingResponse:
+    async def gen():
+        async for row in rows:
+            row.pop("_id", None)
+            if transform: row = transform(row)
+            yield json.dumps(row, default=str) + "\n"
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+# ─── AI DETECTION (roberta-base-openai-detector backends + mock fallback) ─
+# Jitter for the mock scores. Set MOCK_SEED (or call mock_rng.seed()) for reproducible runs.
+mock_rng = random.Random(int(os.environ['MOCK_SEED']) if os.environ.get('MOCK_SEED') else None)
+
+def _mock_ai(text: str, f: Optional[dict] = None) -> dict:
+    f = f or extract_features(text)
+    if not f["sentence_count"]:
         return {"human_probability": 0.5, "ai_probability": 0.5, "confidence": "low", "source": "mock"}
-    avg_sl = len(words) / max(len(sentences), 1)
-    vocab_r = len(set(w.lower() for w in words)) / max(len(words), 1)
-    variance = 0
-    if len(sentences) > 1:
-        sl = [len(s.split()) for s in sentences]
-        variance = sum((x - avg_sl) ** 2 for x in sl) / len(sl)
+    avg_sl, vocab_r, variance = f["avg_sentence_length"], f["vocabulary_richness"], f["sentence_length_variance"]
     score = 0.62
     if vocab_r > 0.5: score += 0.10
     if variance > 10: score += 0.07
     if avg_sl < 25: score += 0.05
-    if any(c in text for c in ['!', '?', '—', '…', '\u201c', '\u201d']): score += 0.04
+    if f["expressive_punctuation"]: score += 0.04
     if len(text) > 500: score += 0.03
-    score += random.uniform(-0.07, 0.07)
+    score += mock_rng.uniform(-0.07, 0.07)
     score = max(0.28, min(0.97, score))
     conf = "high" if score > 0.82 or score < 0.35 else ("medium" if score > 0.6 else "low")
     return {"human_probability": round(score, 3), "ai_probability": round(1 - score, 3), "confidence": conf, "source": "mock"}
 
-async def analyze_ai(text: str) -> dict:
-    """Real AI detection via HuggingFace roberta-base-openai-detector, fallback to mock."""
-    headers = {"Content-Type": "application/json"}
-    if HF_TOKEN:
-        headers["Authorization"] = f"Bearer {HF_TOKEN}"
-    text_truncated = text[:1500]
+# Selected backend; started in startup(), closed in shutdown().
+detector: Detector = make_detector(AI_DETECTOR)
 
-    def call_hf():
-        return requests.post(HF_API_URL, headers=headers, json={"inputs": text_truncated}, timeout=12)
-
-    try:
-        resp = await asyncio.to_thread(call_hf)
-        if resp.status_code == 200:
-            data = resp.json()
-            # Response: [[{label,score},...]] or [{label,score},...]
-            results = data[0] if (data and isinstance(data[0], list)) else data
-            if isinstance(results, list) and results:
-                human_score = next((r['score'] for r in results if r.get('label') == 'Real'), None)
-                ai_score = next((r['score'] for r in results if r.get('label') == 'Fake'), None)
-                if human_score is not None and ai_score is not None:
-                    top = max(human_score, ai_score)
-                    conf = "high" if top > 0.85 else ("medium" if top > 0.65 else "low")
-                    return {"human_probability": round(human_score, 3), "ai_probability": round(ai_score, 3),
-                            "confidence": conf, "source": "roberta-openai-detector"}
-        logger.warning(f"HuggingFace API returned {resp.status_code}, using mock fallback")
-    except Exception as e:
-        logger.warning(f"HuggingFace API error: {e}, using mock fallback")
-    return _mock_ai(text)
+async def analyze_ai(text: str, f: Optional[dict] = None) -> dict:
+    """AI detection via the configured detector backend, fallback to mock."""
+    with stage("detector"):
+        ai = await detector.detect(text)
+    if ai: return ai
+    if detector.name != "mock": metrics.FALLBACKS.labels(detector.name).inc()
+    return _mock_ai(text, f)
 
 # ─── STYLOMETRY (MOCKED) ──────────────────────────────────
-def analyze_style(text: str) -> dict:
-    words = text.split()
-    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-    avg_wl = sum(len(w) for w in words) / max(len(words), 1)
-    avg_sl = len(words) / max(len(sentences), 1)
-    vr = len(set(w.lower() for w in words)) / max(len(words), 1)
-    pd = sum(1 for c in text if c in '.,!?;:\u2014"\'') / max(len(text), 1)
+def analyze_style(text: str, f: Optional[dict] = None) -> dict:
+    f = f or extract_features(text)
+    avg_wl, avg_sl = f["avg_word_length"], f["avg_sentence_length"]
+    vr, pd = f["vocabulary_richness"], f["punctuation_density"]
 
     s = 0.5
     if 3 < avg_wl < 8: s += 0.12
     if 10 < avg_sl < 30: s += 0.12
     if vr > 0.4: s += 0.14
     if pd > 0.02: s += 0.08
-    s += random.uniform(-0.04, 0.04)
+    s += mock_rng.uniform(-0.04, 0.04)
     s = max(0.1, min(0.99, s))
     return {
         "score": round(s, 3),
         "avg_word_length": round(avg_wl, 2),
         "avg_sentence_length": round(avg_sl, 2),
         "vocabulary_richness": round(vr, 3),
-        "word_count": len(words),
-        "sentence_count": len(sentences)
+        "word_count": f["word_count"],
+        "sentence_count": f["sentence_count"],
+        "punctuation_density": round(pd, 4),
+        "function_word_ratio": round(f["function_word_ratio"], 3),
+        "bigram_entropy": round(f["bigram_entropy"], 3)
     }
 
+# ─── ANALYSIS CACHE ───────────────────────────────────────
+def analysis_version() -> str:
+    return f"{detector.version}|{STYLOMETRY_VERSION}"
+
+analysis_cache = AnalysisCache(db.analysis_cache, analysis_version(), ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL)
+similarity_index = SimilarityIndex(db.fingerprints, SIMILARITY_THRESHOLD)
+
+async def text_signature(text: str):
+    return (await cpu_pool.run(signature, text, kind="minhash") if len(text) > STYLOMETRY_OFFLOAD_CHARS
+            else signature(text))
+
+async def find_similar(sub: dict, text: str) -> list:
+    """Fingerprint the submission into the near-duplicate index; returns earlier near-copies."""
+    with stage("similarity"):
+        sig = await text_signature(text)
+        return await similarity_index.add(sub["id"], sub["creator_id"], sig) if sig is not None else []
+
+async def analyze(text: str, ch: Optional[str] = None):
+    """Return (ai, style) for text, served from the content-hash cache when possible."""
+    ch = ch or content_hash(text)
+    cached = await analysis_cache.get(ch)
+    if cached:
+        return cached["ai"], cached["style"]
+    with stage("stylometry"):
+        f = (await cpu_pool.run(extract_features, text, kind="stylometry") if len(text) > STYLOMETRY_OFFLOAD_CHARS
+             else extract_features(text))
+        style = analyze_style(text, f)
+    ai = await analyze_ai(text, f)
+    await analysis_cache.put(ch, {"ai": ai, "style": style})  # skipped for a mock fallback
+    return ai, style
+
 # ─── TRUST ENGINE ─────────────────────────────────────────
-TRUST_DELTAS = {"approved": 10, "rejected": -20, "fraud": -50, "identity_verified": 5}
-
-async def update_trust(uid: str, action: str):
-    delta = TRUST_DELTAS.get(action, 0)
-    if not delta: return
-    u = await db.users.find_one({"id": uid})
-    if not u: return
-    new_score = max(0, min(100, u.get("trust_score", 50) + delta))
-    upd = {"trust_score": new_score}
-    if action == "approved": upd["verified_posts"] = u.get("verified_posts", 0) + 1
-    if action == "rejected": upd["rejected_posts"] = u.get("rejected_posts", 0) + 1
-    await db.users.update_one({"id": uid}, {"$set": upd})
+trust_ledger = TrustLedger(db.users, db.trust_events, on_change=user_cache.forget)
+
+async def update_trust(uid: str, action: str, ref: Optional[str] = None) -> Optional[dict]:
+    """Apply a trust action; returns the creator's updated USER_FIELDS, or None."""
+    return await trust_ledger.record(uid, action, ref)
+
+# ─── STATS COUNTERS ───────────────────────────────────────
+# Precomputed counts in `stats_counters`, one doc per scope; see counters.py. Every write that
+# changes a counted field runs inside `counters.writing(<scopes>)` and records its transitions in
+# the yielded dict. POST /admin/stats/rebuild marks every scope stale.
+def counter_source(scope: str):
+    if scope.startswith("creator:"):
+        return db.submissions, {"creator_id": scope.split(":", 1)[1]}, {"status": "status"}
+    return {
+        "users": (db.users, None, {"role": "role", "status": "status"}),
+        "submissions": (db.submissions, None, {"status": "status"}),
+        "certificates": (db.certificates, None, {"status": "status"}),
+        "api_keys": (db.api_keys, None, {"active": "is_active"}),
+    }[scope]
+
+counters = Counters(db.stats_counters, counter_source)
+get_counters = counters.get
+
+def transition(old: Optional[str], new: Optional[str], prefix: str = "status") -> dict:
+    d = {}
+    if old is None: d["total"] = 1
+    else: d[f"{prefix}_{old}"] = -1
+    if new is None: d["total"] = d.get("total", 0) - 1
+    else: d[f"{prefix}_{new}"] = d.get(f"{prefix}_{new}", 0) + 1
+    return {k: v for k, v in d.items() if v}
+
+def add_transition(deltas: dict, scope: str, old: Optional[str], new: Optional[str], prefix: str = "status"):
+    acc = deltas.setdefault(scope, {})
+    for k, v in transition(old, new, prefix).items(): acc[k] = acc.get(k, 0) + v
+
+def submission_scopes(*creator_ids: str) -> list:
+    return ["submissions", *{f"creator:{cid}" for cid in creator_ids}]
+
+def track_submission(deltas: dict, creator_id: str, old: Optional[str], new: Optional[str]):
+    for scope in submission_scopes(creator_id):
+        add_transition(deltas, scope, old, new)
 
 # ─── CERTIFICATES ─────────────────────────────────────────
 def content_hash(text: str) -> str:
@@ -220,29 +386,81 @@ def sign_cert(ch: str, vid: str) -> str:
 def new_vid() -> str:
     return f"VH-{datetime.now(timezone.utc).year}-{secrets.token_hex(3).upper()}"
 
-async def issue_cert(sub: dict) -> dict:
-    ch = content_hash(sub.get("content_text", ""))
-    vid = new_vid()
-    sig = sign_cert(ch, vid)
-    cert = {
-        "id": str(uuid.uuid4()),
+def new_cert(sub: dict, ch: str, cid: Optional[str] = None, vid: Optional[str] = None) -> dict:
+    cid, vid = cid or str(uuid.uuid4()), vid or new_vid()
+    return {
+        "id": cid,
         "submission_id": sub["id"],
         "creator_id": sub["creator_id"],
         "creator_name": sub.get("creator_name", ""),
         "content_title": sub.get("title", ""),
         "verification_id": vid,
         "content_hash": ch,
-        "signature": sig,
+        "signature": sign_cert(ch, vid),
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "status": "active",
         "revoked_at": None,
         "revocation_reason": None
     }
-    await db.certificates.insert_one(cert.copy())
-    await db.submissions.update_one(
-        {"id": sub["id"]},
-        {"$set": {"certificate_id": cert["id"], "verification_id": vid}}
-    )
+
+async def store_cert(cert: dict):
+    failed = await store_certs([cert])
+    if failed: raise RuntimeError(f"Certificate {cert['id']} not stored: {failed[cert['submission_id']]}")
+
+CERT_INSERT_TRIES = 3  # the first insert plus retries under a fresh verification id
+
+async def insert_certs(certs: List[dict]) -> dict:
+    """Insert certificates. One whose verification id is already taken is re-issued in place under
+    a fresh id (re-signed, its submission repointed) and retried. Returns {submission_id: error}
+    for those that could not be stored."""
+    failed, todo = {}, certs
+    for attempt in range(CERT_INSERT_TRIES):
+        try:
+            await db.certificates.insert_many([c.copy() for c in todo], ordered=False)
+            break
+        except BulkWriteError as e:
+            retry = []
+            for err in e.details["writeErrors"]:
+                c = todo[err["index"]]
+                if err["code"] == 11000 and "verification_id" in err["errmsg"] and attempt + 1 < CERT_INSERT_TRIES:
+                    vid = new_vid()
+                    c.update(verification_id=vid, signature=sign_cert(c["content_hash"], vid))
+                    retry.append(c)
+                else:
+                    failed[c["submission_id"]] = err["errmsg"]
+            if retry:
+                await db.submissions.bulk_write([UpdateOne({"id": c["submission_id"], "certificate_id": c["id"]},
+                                                           {"$set": {"verification_id": c["verification_id"]}}) for c in retry])
+            todo = retry
+        if not todo: break
+    for sid, err in failed.items():
+        logger.error(f"Certificate for submission {sid} not stored: {err}")
+    return failed
+
+async def store_certs(certs: List[dict]) -> dict:
+    """Persist issued certificates and publish the stored ones to the in-process indexes. The
+    submissions must already point at them (or be updated alongside). Returns insert_certs()'s
+    {submission_id: error} for the certificates that could not be stored."""
+    with stage("issuance"):
+        async with counters.writing("certificates") as deltas:
+            failed = await insert_certs(certs)
+            stored = [c for c in certs if c["submission_id"] not in failed]
+            deltas["certificates"] = {k: v * len(stored) for k, v in transition(None, "active").items()}
+        await similarity_index.certified_many({c["submission_id"]: c["verification_id"] for c in stored})
+        for cert in stored:
+            registry_index.add(cert)
+            remember_cert(cert)
+            pdf_store.prerender(cert)
+    return failed
+
+async def issue_cert(sub: dict) -> dict:
+    cert = new_cert(sub, sub.get("content_hash") or content_hash(sub.get("content_text", "")))
+    vid = cert["verification_id"]
+    await asyncio.gather(store_cert(cert), db.submissions.update_one(
+        {"id": sub["id"]}, {"$set": {"certificate_id": cert["id"], "verification_id": vid}}))
+    if cert["verification_id"] != vid:
+        # Re-issued under a fresh id; the link above may have landed after store_cert repointed it.
+        await db.submissions.update_one({"id": sub["id"]}, {"$set": {"verification_id": cert["verification_id"]}})
     return cert
 
 # ─── EMAIL NOTIFICATIONS (Resend) ─────────────────────────
@@ -275,81 +493,54 @@ async def send_status_email(creator_email: str, creator_name: str, title: str, s
     try:
         params = {"from": SENDER_EMAIL, "to": [creator_email],
                   "subject": f"TrustInk: {subject_suffix} — {title}", "html": html}
-        await asyncio.to_thread(resend.Emails.send, params)
+        with stage("email"):
+            await asyncio.to_thread(resend.Emails.send, params)
         logger.info(f"Email sent to {creator_email} status={status}")
     except Exception as e:
         logger.warning(f"Email send failed: {e}")
 
+async def send_review_digest(creator_email: str, creator_name: str, items: List[dict]):
+    """One email for several decisions on a creator's submissions; items are send_status_email kwargs."""
+    if len(items) == 1:
+        return await send_status_email(creator_email, creator_name, **items[0])
+    if not resend.api_key:
+        return
+    labels = {'approved': ('#10b981', 'Approved'), 'rejected': ('#ef4444', 'Not approved'),
+              'revision_requested': ('#f59e0b', 'Revision requested')}
+    rows = ""
+    for it in items:
+        color, label = labels.get(it['status'], ('#6366f1', 'Updated'))
+        link = f' — <a href="{FRONTEND_URL}/verify/{it["vid"]}" style="color:{color};">View Certificate</a>' if it.get('vid') else ''
+        notes = f'<br><span style="color:#64748b;font-size:13px;">{it["notes"]}</span>' if it.get('notes') else ''
+        rows += (f'<tr><td style="padding:10px 0;border-top:1px solid #e2e8f0;color:#1e293b;"><strong>"{it["title"]}"</strong>'
+                 f'{notes}</td><td style="padding:10px 0 10px 12px;border-top:1px solid #e2e8f0;white-space:nowrap;'
+                 f'color:{color};font-weight:600;font-size:13px;">{label}{link}</td></tr>')
+    html = f"""
+    <div style="font-family:-apple-system,BlinkMacSystemFont,sans-serif;max-width:600px;margin:0 auto;background:#f8fafc;padding:20px;">
+      <div style="background:white;border-radius:16px;padding:40px;border:1px solid #e2e8f0;">
+        <h2 style="color:#1e293b;margin:0 0 24px;font-size:22px;text-align:center;">{len(items)} Submissions Reviewed</h2>
+        <p style="color:#475569;">Hi <strong>{creator_name}</strong>,</p>
+        <p style="color:#475569;">A reviewer has made decisions on the following submissions:</p>
+        <table style="width:100%;border-collapse:collapse;">{rows}</table>
+        <hr style="border:none;border-top:1px solid #e2e8f0;margin:24px 0;">
+        <p style="color:#94a3b8;font-size:12px;text-align:center;">TrustInk — Verified Human Content Certification</p>
+      </div>
+    </div>"""
+    try:
+        params = {"from": SENDER_EMAIL, "to": [creator_email],
+                  "subject": f"TrustInk: {len(items)} submissions reviewed", "html": html}
+        with stage("email"):
+            await asyncio.to_thread(resend.Emails.send, params)
+        logger.info(f"Email sent to {creator_email} digest={len(items)}")
+    except Exception as e:
+        logger.warning(f"Email send failed: {e}")
+
 # ─── PDF CERTIFICATE GENERATION ───────────────────────────
-def build_cert_pdf(cert: dict) -> bytes:
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.8*inch, bottomMargin=0.8*inch,
-                            leftMargin=0.8*inch, rightMargin=0.8*inch)
-    styles = getSampleStyleSheet()
-    indigo = HexColor('#4f46e5')
-    emerald = HexColor('#10b981')
-    slate = HexColor('#1e293b')
-    muted = HexColor('#64748b')
-
-    title_style = ParagraphStyle('title', fontSize=26, textColor=HexColor('#111827'), alignment=TA_CENTER,
-                                  spaceAfter=4, fontName='Helvetica-Bold')
-    sub_style = ParagraphStyle('sub', fontSize=12, textColor=muted, alignment=TA_CENTER, spaceAfter=6)
-    label_style = ParagraphStyle('label', fontSize=8, textColor=muted, fontName='Helvetica-Bold',
-                                  spaceBefore=12, spaceAfter=2)
-    value_style = ParagraphStyle('value', fontSize=10, textColor=slate, spaceAfter=4, leading=14)
-    mono_style = ParagraphStyle('mono', fontSize=7, textColor=slate, fontName='Courier',
-                                 spaceAfter=4, leading=10, wordWrap='CJK')
-
-    ts = datetime.fromisoformat(cert.get('timestamp', datetime.now(timezone.utc).isoformat()))
-    is_active = cert.get('status') == 'active'
-
-    elements = [
-        Paragraph("TrustInk", title_style),
-        Paragraph("Verified Human Content Certification", sub_style),
-        HRFlowable(width="100%", thickness=2, color=HexColor('#111827'), spaceAfter=16),
-        Spacer(1, 0.1*inch),
-        Paragraph(f"{'Certificate of Authenticity' if is_active else 'REVOKED CERTIFICATE'}", ParagraphStyle(
-            'cert_title', fontSize=20, textColor=emerald if is_active else HexColor('#ef4444'),
-            alignment=TA_CENTER, fontName='Helvetica-Bold', spaceAfter=4)),
-        Paragraph("This certifies that the following content has been verified as human-written" if is_active
-                  else "This certificate has been revoked.", sub_style),
-        Spacer(1, 0.2*inch),
-    ]
+async def render_pdf(cert: dict) -> bytes:
+    with stage("pdf"):
+        return await cpu_pool.run(build_cert_pdf, cert, FRONTEND_URL, kind="pdf")
 
-    data = [
-        ['Content Title', cert.get('content_title', 'N/A')],
-        ['Creator', cert.get('creator_name', 'N/A')],
-        ['Verification ID', cert.get('verification_id', 'N/A')],
-        ['Status', cert.get('status', 'N/A').upper()],
-        ['Issued', ts.strftime('%B %d, %Y at %H:%M UTC')],
-    ]
-    if cert.get('revocation_reason'):
-        data.append(['Revocation Reason', cert['revocation_reason']])
-
-    tbl = Table(data, colWidths=[1.8*inch, 5.0*inch])
-    tbl.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), HexColor('#f1f5f9')),
-        ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#111827')),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('PADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, HexColor('#e2e8f0')),
-        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [white, HexColor('#fafafa')]),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    elements.append(tbl)
-    elements.append(Spacer(1, 0.2*inch))
-    elements.append(Paragraph("SHA-256 CONTENT HASH", label_style))
-    elements.append(Paragraph(cert.get('content_hash', 'N/A'), mono_style))
-    elements.append(Paragraph("HMAC-SHA256 SIGNATURE", label_style))
-    elements.append(Paragraph(cert.get('signature', 'N/A'), mono_style))
-    elements.append(Spacer(1, 0.2*inch))
-    elements.append(HRFlowable(width="100%", thickness=1, color=HexColor('#e2e8f0')))
-    elements.append(Paragraph(f"Verify at: {FRONTEND_URL}/verify/{cert.get('verification_id', '')}",
-                               ParagraphStyle('footer', fontSize=8, textColor=muted, alignment=TA_CENTER, spaceBefore=8)))
-
-    doc.build(elements)
-    return buffer.getvalue()
+pdf_store = PdfStore(PDF_STORE_DIR, render_pdf, PDF_TEMPLATE_VERSION)
 r = APIRouter(prefix="/api")
 
 # AUTH
@@ -361,12 +552,14 @@ async def register(d: UserRegister):
     role = d.role if d.role in ["creator", "reviewer", "admin"] else "creator"
     u = {
         "id": uid, "name": d.name, "email": d.email,
-        "password_hash": hash_pw(d.password), "role": role,
+        "password_hash": await hash_pw(d.password), "role": role,
         "trust_score": 50, "verified_posts": 0, "rejected_posts": 0,
         "identity_verified": False, "status": "active",
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(u.copy())
+    async with counters.writing("users") as deltas:
+        await db.users.insert_one(u.copy())
+        deltas["users"] = {"total": 1, f"role_{role}": 1, "status_active": 1}
     return {
         "token": make_token(uid, d.email, role),
         "user": {"id": uid, "name": u["name"], "email": u["email"],
@@ -376,10 +569,10 @@ async def register(d: UserRegister):
 @r.post("/auth/login")
 async def login(d: UserLogin):
     u = await db.users.find_one({"email": d.email})
-    if not u or not verify_pw(d.password, u["password_hash"]):
+    if not u or not await verify_pw(d.password, u["password_hash"]):
         raise HTTPException(401, "Invalid credentials")
-    if u.get("status") == "banned":
-        raise HTTPException(403, "Account banned")
+    if u.get("status", "active") != "active":
+        raise HTTPException(403, f"Account {u['status']}")
     return {
         "token": make_token(u["id"], u["email"], u["role"]),
         "user": {"id": u["id"], "name": u["name"], "email": u["email"],
@@ -391,54 +584,178 @@ async def login(d: UserLogin):
 async def me(u=Depends(current_user)):
     u = dict(u)
     u.pop("password_hash", None)
+    u.pop("trust_outbox", None)
     u["trust_level"] = tl(u.get("trust_score", 50))
     return u
 
 # SUBMISSIONS
-@r.post("/submissions")
-async def submit(d: SubmissionCreate, u=Depends(current_user)):
-    if len(d.content_text.strip()) < 50:
-        raise HTTPException(400, "Content must be at least 50 characters")
-
-    ai = await analyze_ai(d.content_text)
-    style = analyze_style(d.content_text)
-    trust = tl(u.get("trust_score", 50))
-
-    if trust == "high" and ai["human_probability"] >= 0.75:
-        status = "approved"
-    elif ai["human_probability"] < 0.40:
-        status = "flagged"
-    else:
-        status = "pending"
-
-    sid = str(uuid.uuid4())
-    sub = {
-        "id": sid, "creator_id": u["id"], "creator_name": u["name"],
-        "title": d.title, "content_text": d.content_text, "content_url": d.content_url,
+def route_submission(ai: dict, trust_score: int, copies: list = ()) -> str:
+    # A near-copy of certified content never earns a second certificate without a human.
+    if copies:
+        return "flagged"
+    if tl(trust_score) == "high" and ai["human_probability"] >= 0.75:
+        return "approved"
+    if ai["human_probability"] < 0.40:
+        return "flagged"
+    return "pending"
+
+async def finish_analysis(sub: dict, ai: dict, style: dict, trust_score: int,
+                          similar: Optional[list] = None) -> Optional[dict]:
+    """Move an analyzing submission to approved/flagged/pending; returns the updated doc, or None
+    if another worker already finished it. `similar` are the near-duplicates found for it."""
+    similar = similar or []
+    status = route_submission(ai, trust_score, [m for m in similar if m["verification_id"]])
+    upd = {
         "ai_human_probability": ai["human_probability"],
         "ai_ai_probability": ai["ai_probability"],
         "ai_confidence": ai["confidence"],
         "stylometry_score": style["score"],
-        "stylometry_features": style,
-        "status": status, "review_notes": None, "reviewer_id": None,
-        "certificate_id": None, "verification_id": None,
-        "created_at": datetime.now(timezone.utc).isoformat(), "reviewed_at": None
+        "stylometry_features": style, "similar_submissions": similar,
+        "status": status, "analyzed_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.submissions.insert_one(sub.copy())
-
+    async with counters.writing(*submission_scopes(sub["creator_id"])) as deltas:
+        res = await db.submissions.update_one({"id": sub["id"], "status": "analyzing"}, {"$set": upd})
+        if res.modified_count: track_submission(deltas, sub["creator_id"], "analyzing", status)
+    if not res.modified_count:
+        return None
+    sub = {**sub, **upd}
     if status == "approved":
-        cert = await issue_cert(sub)
-        await update_trust(u["id"], "approved")
+        cert, _ = await asyncio.gather(issue_cert(sub), update_trust(sub["creator_id"], "approved", sub["id"]))
         sub["verification_id"] = cert["verification_id"]
         sub["certificate_id"] = cert["id"]
+    return sub
 
-    sub.pop("_id", None)
+async def run_analysis_job(job: dict):
+    sub = await db.submissions.find_one({"id": job["payload"]["submission_id"]}, {"_id": 0})
+    if not sub or sub["status"] != "analyzing":
+        return
+    text = await submission_text(sub, ANALYSIS_MAX_BYTES)
+    ai, style = await analyze(text, sub.get("content_hash"))
+    similar = await find_similar(sub, text)
+    creator = await db.users.find_one({"id": sub["creator_id"]}, {"_id": 0, "trust_score": 1})
+    await finish_analysis(sub, ai, style, (creator or {}).get("trust_score", 50), similar)
+
+async def analysis_failed(job: dict):
+    # Out of retries: hand the submission to a human instead of leaving it stuck.
+    q = {"id": job["payload"]["submission_id"], "status": "analyzing"}
+    sub = await db.submissions.find_one(q, {"creator_id": 1})
+    if not sub: return
+    async with counters.writing(*submission_scopes(sub["creator_id"])) as deltas:
+        res = await db.submissions.update_one(q, {"$set": {"status": "pending", "analysis_error": job.get("last_error")}})
+        if res.modified_count: track_submission(deltas, sub["creator_id"], "analyzing", "pending")
+
+analysis_jobs = JobQueue(db.analysis_jobs, run_analysis_job, on_failure=analysis_failed,
+                         workers=ANALYSIS_WORKERS, max_attempts=ANALYSIS_MAX_ATTEMPTS)
+
+async def requeue_stranded_analyses(limit: int = 500) -> int:
+    """Enqueue a job for each submission left analyzing with no queued or running job: its enqueue
+    failed after the insert, or its job ended without moving it on. A duplicate job is harmless,
+    since only a job that finds the submission still analyzing does anything."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=ANALYSIS_SWEEP_AGE)).isoformat()
+    sids = [s["id"] async for s in db.submissions.find(
+        {"status": "analyzing", "created_at": {"$lt": cutoff}}, {"_id": 0, "id": 1}).limit(limit)]
+    if not sids: return 0
+    live = set(await db.analysis_jobs.distinct("payload.submission_id", {
+        "payload.submission_id": {"$in": sids}, "status": {"$in": ["queued", "running"]}}))
+    stranded = [sid for sid in sids if sid not in live]
+    for sid in stranded:
+        await analysis_jobs.enqueue("analyze_submission", {"submission_id": sid})
+    if stranded: logger.warning(f"Re-enqueued analysis for {len(stranded)} stranded submission(s)")
+    return len(stranded)
+
+async def sweep_stranded_analyses():
+    while True:
+        try:
+            await requeue_stranded_analyses()
+        except Exception as e:
+            logger.warning(f"Stranded analysis sweep failed: {e}")
+        await asyncio.sleep(ANALYSIS_SWEEP_INTERVAL)
+
+content_store = ContentStore(db, inline_max=SUBMISSION_INLINE_MAX, max_bytes=SUBMISSION_MAX_BYTES)
+
+async def submission_text(sub: dict, limit: int = -1) -> str:
+    """The submission body; with `limit`, a GridFS body is read only up to `limit` bytes."""
+    if sub.get("content_text") is not None:
+        return sub["content_text"]
+    return await content_store.read(sub["content_ref"], limit)
+
+async def create_submission(u: dict, title: str, content_url: Optional[str], text: Optional[str], ch: str,
+                            size: int, ref: Optional[str] = None, preview: Optional[str] = None) -> dict:
+    """Insert an analyzing submission. The body is either inline `text` or a GridFS `ref` plus `preview`."""
+    sid = str(uuid.uuid4())
+    sub = {
+        "id": sid, "creator_id": u["id"], "creator_name": u["name"],
+        "title": title, "content_text": text, "content_url": content_url,
+        "content_hash": ch, "content_size": size, "content_ref": ref,
+        "ai_human_probability": None, "ai_ai_probability": None, "ai_confidence": None,
+        "stylometry_score": None, "stylometry_features": None,
+        "status": "analyzing", "review_notes": None, "reviewer_id": None,
+        "certificate_id": None, "verification_id": None,
+        "created_at": datetime.now(timezone.utc).isoformat(), "reviewed_at": None
+    }
+    if ref: sub["content_preview"] = preview
+    async with counters.writing(*submission_scopes(u["id"])) as deltas:
+        await db.submissions.insert_one(sub.copy())
+        track_submission(deltas, u["id"], None, "analyzing")
+
+    # Resubmitted text is already scored: route it now instead of queueing. GridFS bodies go
+    # through the job, which has to read them back for the similarity index anyway.
+    cached = text is not None and await analysis_cache.get(ch)
+    if cached:
+        similar = await find_similar(sub, text)
+        done = await finish_analysis(sub, cached["ai"], cached["style"], u.get("trust_score", 50), similar)
+        return done or sub
+    # Should this fail, the submission is picked up by requeue_stranded_analyses.
+    await analysis_jobs.enqueue("analyze_submission", {"submission_id": sid})
     return sub
 
+@r.post("/submissions")
+async def submit(d: SubmissionCreate, u=Depends(current_user)):
+    if len(d.content_text.strip()) < 50:
+        raise HTTPException(400, "Content must be at least 50 characters")
+    body = d.content_text.encode()
+    if len(body) > SUBMISSION_INLINE_MAX:
+        raise HTTPException(413, f"Content over {SUBMISSION_INLINE_MAX} bytes must be sent to /api/submissions/upload")
+    return await create_submission(u, d.title, d.content_url, d.content_text, hashlib.sha256(body).hexdigest(), len(body))
+
+@r.post("/submissions/upload")
+async def upload_submission(request: Request, u=Depends(current_user), title: Optional[str] = Query(None),
+                            content_url: Optional[str] = Query(None)):
+    """Long-form submissions. Send the UTF-8 text as the raw request body (title etc. as query
+    params), or as multipart/form-data with a `file` part and `title`/`content_url` fields."""
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # Starlette spools the file part to disk past 1 MB, at most request_body_cap() bytes of it;
+        # it is then read back in chunks.
+        form = await request.form(max_files=1, max_fields=4)
+        upload, title, content_url = form.get("file"), form.get("title") or title, form.get("content_url") or content_url
+        if not hasattr(upload, "read"): raise HTTPException(400, "Missing file part")
+        async def chunks():
+            while chunk := await upload.read(256 * 1024): yield chunk
+        source = chunks()
+    else:
+        source = request.stream()
+    if not title: raise HTTPException(400, "title is required")
+    try:
+        got = await content_store.receive(source, f"{u['id']}/{title}", {"creator_id": u["id"]})
+    except ContentTooLarge as e:
+        raise HTTPException(413, str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(400, "Content must be UTF-8 text")
+    if got.size < 50 or (got.text is not None and len(got.text.strip()) < 50):
+        raise HTTPException(400, "Content must be at least 50 characters")
+    return await create_submission(u, title, content_url, got.text, got.sha256, got.size, got.ref, got.preview)
+
+SUBMISSION_LIST_FIELDS = {"_id": 0, "content_text": 0}
+
 @r.get("/submissions")
-async def list_subs(u=Depends(current_user)):
+async def list_subs(response: Response, u=Depends(current_user), cursor: Optional[str] = Query(None),
+                    limit: int = Query(200, ge=1, le=1000), format: str = Query("json", pattern="^(json|ndjson)$")):
     q = {} if u["role"] in ["reviewer", "admin"] else {"creator_id": u["id"]}
-    return await db.submissions.find(q, {"_id": 0}).sort("created_at", -1).to_list(200)
+    q = after_cursor(q, cursor, desc=True)
+    rows = db.submissions.find(q, SUBMISSION_LIST_FIELDS).sort(list(keyset_sort(True).items()))
+    if format == "ndjson":
+        return ndjson(rows.batch_size(500))
+    return page_out(await rows.limit(limit + 1).to_list(limit + 1), limit, response)
 
 @r.get("/submissions/{sid}")
 async def get_sub(sid: str, u=Depends(current_user)):
@@ -448,131 +765,279 @@ async def get_sub(sid: str, u=Depends(current_user)):
         raise HTTPException(403, "Access denied")
     return s
 
+@r.get("/submissions/{sid}/content")
+async def get_sub_content(sid: str, u=Depends(current_user)):
+    """Full submission text as text/plain, streamed from GridFS for large uploads."""
+    s = await db.submissions.find_one({"id": sid}, {"_id": 0, "creator_id": 1, "content_text": 1, "content_ref": 1})
+    if not s: raise HTTPException(404, "Not found")
+    if u["role"] not in ["reviewer", "admin"] and s["creator_id"] != u["id"]:
+        raise HTTPException(403, "Access denied")
+    if s.get("content_text") is not None:
+        return Response(s["content_text"], media_type="text/plain; charset=utf-8")
+    return StreamingResponse(content_store.stream(s["content_ref"]), media_type="text/plain; charset=utf-8")
+
+@r.get("/submissions/{sid}/events")
+async def sub_events(sid: str, timeout: int = Query(60, ge=1, le=300), u=Depends(current_user)):
+    """Server-sent events: emits `complete` with the submission once analysis has finished."""
+    s = await get_sub(sid, u)
+
+    async def stream():
+        nonlocal s
+        deadline = asyncio.get_running_loop().time() + timeout
+        while s["status"] == "analyzing" and asyncio.get_running_loop().time() < deadline:
+            yield ": waiting\n\n"
+            await asyncio.sleep(1)
+            s = await db.submissions.find_one({"id": sid}, {"_id": 0}) or s
+        event = "timeout" if s["status"] == "analyzing" else "complete"
+        yield f"event: {event}\ndata: {json.dumps(s)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 # MODERATION
 @r.get("/moderation/stats")
 async def mod_stats(u=Depends(reviewer_only)):
-    return {
-        "pending": await db.submissions.count_documents({"status": "pending"}),
-        "flagged": await db.submissions.count_documents({"status": "flagged"}),
-        "approved": await db.submissions.count_documents({"status": "approved"}),
-        "rejected": await db.submissions.count_documents({"status": "rejected"})
-    }
+    c = await get_counters("submissions")
+    return {k: c.get(f"status_{k}", 0) for k in ("pending", "flagged", "approved", "rejected")}
+
+def queue_row(s: dict) -> dict:
+    s["creator_trust_score"] = s.get("creator_trust_score", 50)
+    s["creator_trust_level"] = tl(s["creator_trust_score"])
+    return s
 
 @r.get("/moderation/queue")
-async def queue(u=Depends(reviewer_only)):
+async def queue(response: Response, u=Depends(reviewer_only), cursor: Optional[str] = Query(None),
+                limit: int = Query(100, ge=1, le=1000), format: str = Query("json", pattern="^(json|ndjson)$")):
+    """Oldest first. Rows carry a content_preview; the full text comes from GET /submissions/{sid}."""
     pipeline = [
-        {"$match": {"status": {"$in": ["pending", "flagged"]}}},
+        {"$match": after_cursor({"status": {"$in": ["pending", "flagged"]}}, cursor, desc=False)},
+        {"$sort": keyset_sort(False)},
+        *([] if format == "ndjson" else [{"$limit": limit + 1}]),
         {"$lookup": {"from": "users", "localField": "creator_id", "foreignField": "id", "as": "creator_doc"}},
-        {"$sort": {"created_at": 1}},
-        {"$limit": 100}
+        {"$addFields": {
+            "content_preview": {"$ifNull": ["$content_preview", {"$substrCP": [{"$ifNull": ["$content_text", ""]}, 0, 500]}]},
+            "creator_trust_score": {"$ifNull": [{"$arrayElemAt": ["$creator_doc.trust_score", 0]}, 50]}}},
+        {"$project": {"_id": 0, "content_text": 0, "creator_doc": 0}},
     ]
-    subs = await db.submissions.aggregate(pipeline).to_list(100)
-    result = []
-    for s in subs:
-        s.pop("_id", None)
-        creator_list = s.pop("creator_doc", [])
-        creator = creator_list[0] if creator_list else {}
-        s["creator_trust_score"] = creator.get("trust_score", 50)
-        s["creator_trust_level"] = tl(s["creator_trust_score"])
-        result.append(s)
-    return result
+    if format == "ndjson":
+        return ndjson(db.submissions.aggregate(pipeline, batchSize=500), queue_row)
+    subs = await db.submissions.aggregate(pipeline).to_list(limit + 1)
+    return [queue_row(s) for s in page_out(subs, limit, response)]
+
+REVIEWABLE = ["pending", "flagged", "reviewing"]
+REVIEW_DECISIONS = ["approved", "rejected", "revision_requested"]
+REVIEW_FIELDS = {"_id": 0, "id": 1, "creator_id": 1, "creator_name": 1, "title": 1, "status": 1,
+                 "content_hash": 1, "content_ref": 1}
 
 @r.post("/moderation/{sid}/review")
 async def review(sid: str, d: ReviewDecision, u=Depends(reviewer_only)):
-    s = await db.submissions.find_one({"id": sid})
-    if not s: raise HTTPException(404, "Not found")
-    if s["status"] not in ["pending", "flagged", "reviewing"]:
-        raise HTTPException(400, "Submission not reviewable")
-    if d.decision not in ["approved", "rejected", "revision_requested"]:
+    if d.decision not in REVIEW_DECISIONS:
         raise HTTPException(400, "Invalid decision")
-
     upd = {"status": d.decision, "review_notes": d.notes,
            "reviewer_id": u["id"], "reviewed_at": datetime.now(timezone.utc).isoformat()}
-    await db.submissions.update_one({"id": sid}, {"$set": upd})
-
     if d.decision == "approved":
-        s_dict = clean(s)
-        s_dict.update(upd)
-        cert = await issue_cert(s_dict)
-        await update_trust(s["creator_id"], "approved")
-        # Email notification
-        creator = await db.users.find_one({"id": s["creator_id"]}, {"_id": 0})
-        if creator:
-            asyncio.create_task(send_status_email(
-                creator["email"], creator["name"], s["title"], "approved", d.notes,
-                cert.get("verification_id", "")))
-    elif d.decision == "rejected":
-        await update_trust(s["creator_id"], "rejected")
-        creator = await db.users.find_one({"id": s["creator_id"]}, {"_id": 0})
-        if creator:
-            asyncio.create_task(send_status_email(
-                creator["email"], creator["name"], s["title"], "rejected", d.notes))
-    elif d.decision == "revision_requested":
-        creator = await db.users.find_one({"id": s["creator_id"]}, {"_id": 0})
-        if creator:
-            asyncio.create_task(send_status_email(
-                creator["email"], creator["name"], s["title"], "revision_requested", d.notes))
-
+        # Certificate ids are assigned up front so the transition links them in the same write.
+        upd.update(certificate_id=str(uuid.uuid4()), verification_id=new_vid())
+    # The counters are marked before the transition, so its scopes are looked up first.
+    owner = await db.submissions.find_one({"id": sid}, {"_id": 0, "creator_id": 1})
+    if not owner: raise HTTPException(404, "Not found")
+    async with counters.writing(*submission_scopes(owner["creator_id"])) as deltas:
+        # The status filter makes the transition the lock: of two racing reviews only one matches.
+        s = await db.submissions.find_one_and_update({"id": sid, "status": {"$in": REVIEWABLE}}, {"$set": upd}, REVIEW_FIELDS)
+        if not s: raise HTTPException(409, "Submission already reviewed or not reviewable")
+
+        if d.decision == "approved":
+            # Submissions from before content_hash was stored need their text to be hashed.
+            ch = s.get("content_hash") or content_hash(await submission_text(
+                await db.submissions.find_one({"id": sid}, {"_id": 0, "content_text": 1, "content_ref": 1})))
+            # Stored before any other effect; if that fails the review is undone, as in review_batch.
+            cert = new_cert(s, ch, upd["certificate_id"], upd["verification_id"])
+            if await store_certs([cert]):
+                await db.submissions.update_one({"id": sid, "certificate_id": cert["id"]}, {"$set": {
+                    "status": s["status"], "certificate_id": None, "verification_id": None}})
+                raise HTTPException(500, "Certificate could not be stored; the submission was not reviewed")
+            upd["verification_id"] = cert["verification_id"]
+        track_submission(deltas, s["creator_id"], s["status"], d.decision)
+    # The trust update returns the creator, so the email needs no separate lookup.
+    creator = await (update_trust(s["creator_id"], d.decision, sid) if d.decision in TRUST_DELTAS
+                     else user_cache.get(s["creator_id"]))
+    if creator:
+        asyncio.create_task(send_status_email(
+            creator["email"], creator["name"], s["title"], d.decision, d.notes, upd.get("verification_id", "")))
     return {"message": f"Submission {d.decision}", "submission_id": sid}
 
+@r.post("/moderation/review:batch")
+async def review_batch(d: ReviewBatch, u=Depends(reviewer_only)):
+    """review() for many submissions: each item is its own conditional transition, so items
+    succeed or fail independently; the side effects are written in bulk."""
+    if not d.items: raise HTTPException(400, "items must not be empty")
+    if len(d.items) > REVIEW_BATCH_MAX:
+        raise HTTPException(413, f"At most {REVIEW_BATCH_MAX} items per request")
+    batch_id, now = str(uuid.uuid4()), datetime.now(timezone.utc).isoformat()
+    results, todo = [None] * len(d.items), {}
+    for i, it in enumerate(d.items):
+        if it.decision not in REVIEW_DECISIONS: results[i] = "invalid_decision"
+        elif it.submission_id in todo: results[i] = "duplicate"
+        else:
+            upd = {"status": it.decision, "review_notes": it.notes, "reviewer_id": u["id"],
+                   "reviewed_at": now, "review_batch": batch_id}
+            if it.decision == "approved": upd.update(certificate_id=str(uuid.uuid4()), verification_id=new_vid())
+            todo[it.submission_id] = (i, it, upd)
+
+    subs = {s["id"]: s async for s in db.submissions.find({"id": {"$in": list(todo)}}, REVIEW_FIELDS)}
+    ops, tried = [], []
+    for sid, (i, it, upd) in todo.items():
+        s = subs.get(sid)
+        if not s: results[i] = "not_found"
+        elif s["status"] not in REVIEWABLE: results[i] = "not_reviewable"
+        # Filtering on the status just read keeps the counter transitions exact; a racing review
+        # (or any other change) makes this item miss instead of overwriting it.
+        else:
+            ops.append(UpdateOne({"id": sid, "status": s["status"]}, {"$set": upd}))
+            tried.append(sid)
+    # Every transition, certificate and revert happens inside the counters' write marker.
+    async with counters.writing(*submission_scopes(*(subs[sid]["creator_id"] for sid in tried))) as deltas:
+        won = tried
+        if ops and (await db.submissions.bulk_write(ops, ordered=False)).modified_count < len(ops):
+            # Bulk results only count matches; the batch id marks which items this request won.
+            won = [s["id"] async for s in db.submissions.find({"id": {"$in": tried}, "review_batch": batch_id}, {"_id": 0, "id": 1})]
+            for sid in set(tried) - set(won): results[todo[sid][0]] = "not_reviewable"
+
+        # Submissions from before content_hash was stored need their text to be hashed.
+        approved = [sid for sid in won if todo[sid][1].decision == "approved"]
+        legacy = [sid for sid in approved if not subs[sid].get("content_hash")]
+        if legacy:
+            docs = await db.submissions.find({"id": {"$in": legacy}}, {"_id": 0, "id": 1, "content_text": 1, "content_ref": 1}).to_list(None)
+            for doc, text in zip(docs, await asyncio.gather(*map(submission_text, docs))):
+                subs[doc["id"]]["content_hash"] = content_hash(text)
+        certs = [new_cert(subs[sid], subs[sid]["content_hash"], todo[sid][2]["certificate_id"],
+                          todo[sid][2]["verification_id"]) for sid in approved]
+        # Certificates are stored before any other effect. An item whose certificate still cannot be
+        # stored goes back to its previous status, unlinked, and is reported as failed.
+        failed = await store_certs(certs) if certs else {}
+        if failed:
+            await db.submissions.bulk_write([UpdateOne(
+                {"id": sid, "review_batch": batch_id},
+                {"$set": {"status": subs[sid]["status"], "certificate_id": None, "verification_id": None},
+                 "$unset": {"review_batch": ""}}) for sid in failed], ordered=False)
+            for sid in failed: results[todo[sid][0]] = "certificate_failed"
+            won = [sid for sid in won if sid not in failed]
+        vids = {c["submission_id"]: c["verification_id"] for c in certs}
+
+        actions, mail = {}, {}
+        for sid in won:
+            i, it, upd = todo[sid]
+            s = subs[sid]
+            track_submission(deltas, s["creator_id"], s["status"], it.decision)
+            actions.setdefault(s["creator_id"], []).append((it.decision, sid))
+            mail.setdefault(s["creator_id"], []).append(
+                {"title": s["title"], "status": it.decision, "notes": it.notes, "vid": vids.get(sid, "")})
+            results[i] = {"submission_id": sid, "ok": True, "status": it.decision,
+                          **({"verification_id": vids[sid]} if sid in vids else {})}
+
+    # One trust update per creator covers all of their items; creators with no trust change are
+    # looked up for the email.
+    creators = await asyncio.gather(*[
+        trust_ledger.record_many(cid, acts) if any(a in TRUST_DELTAS for a, _ in acts) else user_cache.get(cid)
+        for cid, acts in actions.items()])
+    for cid, creator in zip(actions, creators):
+        if creator:
+            asyncio.create_task(send_review_digest(creator["email"], creator["name"], mail[cid]))
+    results = [r if isinstance(r, dict) else {"submission_id": it.submission_id, "ok": False, "error": r}
+               for r, it in zip(results, d.items)]
+    return {"results": results, "count": len(results), "reviewed": len(won)}
+
 # CERTIFICATES
+# Warm lookups are served from memory; revocations on other workers are evicted here within
+# CERT_REVOCATION_SYNC seconds (see CertCache).
+cert_cache = CertCache(db.certificates, CERT_CACHE_SIZE, CERT_CACHE_TTL)
+cached_cert, cached_certs = cert_cache.get, cert_cache.get_many
+remember_cert, forget_cert = cert_cache.remember, cert_cache.forget
+
+def revalidatable(request: Request, c: dict, payload: dict) -> Response:
+    """JSON response with an ETag that changes on revocation; answers If-None-Match with 304."""
+    etag = f'"{c["id"]}-{c["status"]}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={VERIFY_MAX_AGE}, must-revalidate"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
 @r.get("/certificates/{cid}")
-async def get_cert(cid: str):
-    c = await db.certificates.find_one({"id": cid}, {"_id": 0})
+async def get_cert(cid: str, request: Request):
+    c = await cached_cert("id", cid)
     if not c: raise HTTPException(404, "Certificate not found")
-    return c
+    return revalidatable(request, c, c)
 
 @r.get("/verify/{vid}")
-async def verify(vid: str):
-    c = await db.certificates.find_one({"verification_id": vid}, {"_id": 0})
+async def verify(vid: str, request: Request):
+    c = await cached_cert("verification_id", vid)
     if not c: raise HTTPException(404, "Verification ID not found")
-    return {
+    return revalidatable(request, c, {
         "valid": c["status"] == "active", "verification_id": vid,
         "status": c["status"], "creator_name": c.get("creator_name"),
         "content_title": c.get("content_title"), "content_hash": c.get("content_hash"),
         "timestamp": c.get("timestamp"), "revoked_at": c.get("revoked_at"),
         "revocation_reason": c.get("revocation_reason"), "signature": c.get("signature")
-    }
+    })
 
 # REGISTRY
+registry_index = RegistryIndex()
+
+async def refresh_registry_index():
+    while True:
+        await asyncio.sleep(REGISTRY_INDEX_REFRESH)
+        try:
+            await registry_index.refresh(db.certificates)
+        except Exception as e:
+            logger.warning(f"Registry index refresh failed: {e}")
+
 @r.get("/registry")
 async def registry(
-    search: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, max_length=200),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=50)
 ):
+    skip = (page - 1) * limit
+    if search and registry_index.ready:
+        total, ids = registry_index.search(search, k=skip + limit)
+        page_ids = ids[skip:]
+        docs = await db.certificates.find({"id": {"$in": page_ids}, "status": "active"}, {"_id": 0}).to_list(limit)
+        by_id = {c["id"]: c for c in docs}
+        certs = [by_id[i] for i in page_ids if i in by_id]
+        return {"certificates": certs, "total": total, "page": page, "pages": (total + limit - 1) // limit}
     q = {"status": "active"}
     if search:
+        # Index still loading: fall back to a scan, with the user's input treated literally.
+        pattern = re.escape(search)
         q["$or"] = [
-            {"content_title": {"$regex": search, "$options": "i"}},
-            {"creator_name": {"$regex": search, "$options": "i"}}
+            {"content_title": {"$regex": pattern, "$options": "i"}},
+            {"creator_name": {"$regex": pattern, "$options": "i"}}
         ]
-    skip = (page - 1) * limit
     certs = await db.certificates.find(q, {"_id": 0}).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
     total = await db.certificates.count_documents(q)
     return {"certificates": certs, "total": total, "page": page, "pages": (total + limit - 1) // limit}
 
 @r.get("/registry/stats")
 async def reg_stats():
+    certs, users, subs = await asyncio.gather(
+        get_counters("certificates"), get_counters("users"), get_counters("submissions"))
     return {
-        "total_certificates": await db.certificates.count_documents({"status": "active"}),
-        "total_creators": await db.users.count_documents({"role": "creator"}),
-        "total_submissions": await db.submissions.count_documents({}),
-        "pending_review": await db.submissions.count_documents({"status": "pending"}),
-        "revoked": await db.certificates.count_documents({"status": "revoked"})
+        "total_certificates": certs.get("status_active", 0),
+        "total_creators": users.get("role_creator", 0),
+        "total_submissions": subs["total"],
+        "pending_review": subs.get("status_pending", 0),
+        "revoked": certs.get("status_revoked", 0)
     }
 
 # DASHBOARD
 @r.get("/dashboard/stats")
 async def dash_stats(u=Depends(current_user)):
-    uid = u["id"]
+    c = await get_counters(f"creator:{u['id']}")
     return {
-        "total": await db.submissions.count_documents({"creator_id": uid}),
-        "approved": await db.submissions.count_documents({"creator_id": uid, "status": "approved"}),
-        "pending": await db.submissions.count_documents(
-            {"creator_id": uid, "status": {"$in": ["pending", "revision_requested"]}}),
-        "rejected": await db.submissions.count_documents({"creator_id": uid, "status": "rejected"}),
-        "flagged": await db.submissions.count_documents({"creator_id": uid, "status": "flagged"}),
+        "total": c["total"],
+        "approved": c.get("status_approved", 0),
+        "pending": c.get("status_pending", 0) + c.get("status_revision_requested", 0),
+        "rejected": c.get("status_rejected", 0),
+        "flagged": c.get("status_flagged", 0),
         "trust_score": u.get("trust_score", 50),
         "trust_level": tl(u.get("trust_score", 50)),
         "verified_posts": u.get("verified_posts", 0),
@@ -580,24 +1045,39 @@ async def dash_stats(u=Depends(current_user)):
     }
 
 # ADMIN
+def user_row(usr: dict) -> dict:
+    usr["trust_level"] = tl(usr.get("trust_score", 50))
+    return usr
+
 @r.get("/admin/users")
-async def get_users(u=Depends(admin_only)):
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(200)
-    for usr in users:
-        usr["trust_level"] = tl(usr.get("trust_score", 50))
-    return users
+async def get_users(response: Response, u=Depends(admin_only), cursor: Optional[str] = Query(None),
+                    limit: int = Query(200, ge=1, le=1000), format: str = Query("json", pattern="^(json|ndjson)$")):
+    rows = db.users.find(after_cursor({}, cursor, desc=False), {"_id": 0, "password_hash": 0, "trust_outbox": 0}) \
+        .sort(list(keyset_sort(False).items()))
+    if format == "ndjson":
+        return ndjson(rows.batch_size(500), user_row)
+    return [user_row(usr) for usr in page_out(await rows.limit(limit + 1).to_list(limit + 1), limit, response)]
 
 @r.post("/admin/revoke/{cid}")
 async def revoke(cid: str, req: RevocationReq, u=Depends(reviewer_only)):
     c = await db.certificates.find_one({"id": cid})
     if not c: raise HTTPException(404, "Certificate not found")
-    await db.certificates.update_one({"id": cid}, {"$set": {
-        "status": "revoked",
-        "revoked_at": datetime.now(timezone.utc).isoformat(),
-        "revocation_reason": req.reason
-    }})
-    await db.submissions.update_one({"id": c["submission_id"]}, {"$set": {"status": "flagged"}})
-    await update_trust(c["creator_id"], "fraud")
+    registry_index.remove(cid)
+    async with counters.writing("certificates", *submission_scopes(c["creator_id"])) as deltas:
+        revoked = await db.certificates.find_one_and_update({"id": cid}, {"$set": {
+            "status": "revoked",
+            "revoked_at": datetime.now(timezone.utc).isoformat(),
+            "revocation_reason": req.reason
+        }}, {"_id": 0}, return_document=ReturnDocument.AFTER)
+        forget_cert(c)  # only after the write, so a concurrent read can't re-cache the active doc
+        prev = await db.submissions.find_one_and_update(
+            {"id": c["submission_id"]}, {"$set": {"status": "flagged"}}, {"status": 1, "creator_id": 1})
+        if c["status"] == "active":
+            add_transition(deltas, "certificates", "active", "revoked")
+        if prev and prev["status"] != "flagged":
+            track_submission(deltas, prev["creator_id"], prev["status"], "flagged")
+    pdf_store.prerender(revoked)
+    await update_trust(c["creator_id"], "fraud", c["id"])
     return {"message": "Certificate revoked"}
 
 @r.get("/creators/{uid}/profile")
@@ -608,26 +1088,72 @@ async def creator_profile(uid: str):
     certs = await db.certificates.find({"creator_id": uid, "status": "active"}, {"_id": 0}).to_list(20)
     return {"creator": u, "certificates": certs, "certificate_count": len(certs)}
 
+@r.get("/creators/{uid}/certificates/export")
+async def export_certificates(uid: str, u=Depends(current_user)):
+    """ZIP of every active certificate PDF plus manifest.json, streamed while it is built."""
+    if uid != u["id"] and u["role"] != "admin":
+        raise HTTPException(403, "You can only export your own certificates")
+    creator = await db.users.find_one({"id": uid}, {"_id": 0, "name": 1})
+    if not creator: raise HTTPException(404, "Creator not found")
+    certs = await db.certificates.find({"creator_id": uid, "status": "active"}, {"_id": 0}).to_list(None)
+    # Every PDF is rendered into the store (most already are) before the first byte goes out, so a
+    # busy pool or a failed render is an error status instead of a truncated archive. They are on
+    # disk, so no PDF is held in memory meanwhile.
+    sem = asyncio.Semaphore(EXPORT_CONCURRENCY)
+    async def ready(c):
+        async with sem: await pdf_store.get(c)
+    await asyncio.gather(*map(ready, certs))
+
+    async def entries():
+        # Read up to EXPORT_CONCURRENCY PDFs ahead of the one being written, keeping archive order.
+        pending, todo, manifest = deque(), iter(certs), []
+        def schedule():
+            c = next(todo, None)
+            if c: pending.append((c, asyncio.ensure_future(pdf_store.read(c))))
+        for _ in range(EXPORT_CONCURRENCY): schedule()
+        try:
+            while pending:
+                c, fut = pending.popleft()
+                data = await fut
+                schedule()
+                name = f"TrustInk-{c['verification_id']}.pdf"
+                manifest.append({"file": name, "verification_id": c["verification_id"], "certificate_id": c["id"],
+                                 "content_title": c.get("content_title"), "content_hash": c.get("content_hash"),
+                                 "signature": c.get("signature"), "timestamp": c.get("timestamp"),
+                                 "pdf_sha256": hashlib.sha256(data).hexdigest()})
+                yield name, data
+        finally:
+            for _, fut in pending: fut.cancel()
+        yield "manifest.json", json.dumps({
+            "creator_id": uid, "creator_name": creator.get("name"), "issued_by": "TrustInk",
+            "exported_at": datetime.now(timezone.utc).isoformat(), "count": len(manifest),
+            "certificates": manifest}, indent=2).encode()
+
+    return StreamingResponse(zip_stream(entries()), media_type="application/zip", headers={
+        "Content-Disposition": f'attachment; filename="TrustInk-certificates-{uid[:8]}.zip"'})
+
 @r.post("/seed")
 async def seed_demo():
     count = await db.users.count_documents({})
     if count > 0:
         return {"message": "Already seeded"}
+    hashes = await asyncio.gather(*(hash_pw(pw) for pw in ("admin123", "review123", "creator123")))
     users = [
         {"id": str(uuid.uuid4()), "name": "Admin User", "email": "admin@vhccs.com",
-         "password_hash": hash_pw("admin123"), "role": "admin", "trust_score": 100,
+         "password_hash": hashes[0], "role": "admin", "trust_score": 100,
          "verified_posts": 0, "rejected_posts": 0, "identity_verified": True, "status": "active",
          "created_at": datetime.now(timezone.utc).isoformat()},
         {"id": str(uuid.uuid4()), "name": "Reviewer Jane", "email": "reviewer@vhccs.com",
-         "password_hash": hash_pw("review123"), "role": "reviewer", "trust_score": 85,
+         "password_hash": hashes[1], "role": "reviewer", "trust_score": 85,
          "verified_posts": 0, "rejected_posts": 0, "identity_verified": True, "status": "active",
          "created_at": datetime.now(timezone.utc).isoformat()},
         {"id": str(uuid.uuid4()), "name": "Creator Alice", "email": "creator@vhccs.com",
-         "password_hash": hash_pw("creator123"), "role": "creator", "trust_score": 50,
+         "password_hash": hashes[2], "role": "creator", "trust_score": 50,
          "verified_posts": 0, "rejected_posts": 0, "identity_verified": False, "status": "active",
          "created_at": datetime.now(timezone.utc).isoformat()}
     ]
     await db.users.insert_many(users)
+    await counters.invalidate("users")
     return {"message": "Demo accounts created", "accounts": [
         {"email": "admin@vhccs.com", "password": "admin123", "role": "admin"},
         {"email": "reviewer@vhccs.com", "password": "review123", "role": "reviewer"},
@@ -636,16 +1162,14 @@ async def seed_demo():
 
 # CERTIFICATE PDF DOWNLOAD
 @r.get("/certificates/{cid}/pdf")
-async def cert_pdf(cid: str):
-    c = await db.certificates.find_one({"id": cid}, {"_id": 0})
+async def cert_pdf(cid: str, request: Request):
+    c = await cached_cert("id", cid)
     if not c: raise HTTPException(404, "Certificate not found")
-    pdf_bytes = await asyncio.to_thread(build_cert_pdf, c)
+    path = await pdf_store.get(c)
     vid = c.get("verification_id", "certificate")
-    return StreamingResponse(
-        BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="TrustInk-{vid}.pdf"'}
-    )
+    return file_response(path, request, {
+        "ETag": f'"{pdf_store.key(c)}"', "Cache-Control": f"public, max-age={VERIFY_MAX_AGE}, must-revalidate",
+        "Content-Disposition": f'attachment; filename="TrustInk-{vid}.pdf"'})
 
 # API KEY SYSTEM
 @r.post("/apikeys")
@@ -663,9 +1187,12 @@ async def create_api_key(d: APIKeyCreate, u=Depends(current_user)):
         "created_at": datetime.now(timezone.utc).isoformat(),
         "last_used_at": None,
         "is_active": True,
-        "usage_count": 0
+        "usage_count": 0,
+        "tier": DEFAULT_API_TIER
     }
-    await db.api_keys.insert_one(key_doc.copy())
+    async with counters.writing("api_keys") as deltas:
+        await db.api_keys.insert_one(key_doc.copy())
+        deltas["api_keys"] = {"total": 1, "active_true": 1}
     key_doc.pop("_id", None)
     return key_doc
 
@@ -684,34 +1211,78 @@ async def delete_api_key(key_id: str, u=Depends(current_user)):
     if not k: raise HTTPException(404, "Key not found")
     if k["owner_id"] != u["id"] and u["role"] != "admin":
         raise HTTPException(403, "Access denied")
-    await db.api_keys.update_one({"id": key_id}, {"$set": {"is_active": False}})
+    async with counters.writing("api_keys") as deltas:
+        await db.api_keys.update_one({"id": key_id}, {"$set": {
+            "is_active": False, "changed_at": datetime.now(timezone.utc).isoformat()}})
+        if k.get("is_active"): add_transition(deltas, "api_keys", "true", "false", "active")
+    api_keys.forget(k["key_value"])
     return {"message": "API key revoked"}
 
 # THIRD-PARTY VALIDATION ENDPOINT (requires API key)
-@r.get("/v1/verify/{vid}")
-async def third_party_verify(vid: str, x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
-                              api_key: Optional[str] = Query(None)):
-    raw_key = x_api_key or api_key
+api_keys = ApiKeyStore(db.api_keys, ttl=API_KEY_CACHE_TTL)
+rate_limiter = RateLimiter(MongoBackend(db.rate_limits) if RATE_LIMIT_BACKEND == "mongo" else MemoryBackend())
+
+async def partner_key(request: Request, response: Response, raw_key: Optional[str], cost: int = 1) -> dict:
+    """Authenticate a partner API key, charging the request to its client IP and `cost` verifications
+    to the key's tier bucket. Usage is recorded once per call."""
+    ip = client_ip(request.headers, request.client.host if request.client else None, TRUST_PROXY)
+    d = await rate_limiter.take(f"ip:{ip}", *IP_RATE_LIMIT)
+    if not d.allowed:
+        raise HTTPException(429, "Too many requests from this address", headers=d.headers())
     if not raw_key:
         raise HTTPException(401, "API key required. Pass via X-API-Key header or ?api_key= query param")
-    k = await db.api_keys.find_one({"key_value": raw_key, "is_active": True})
+    k = await api_keys.lookup(raw_key)
     if not k:
         raise HTTPException(403, "Invalid or revoked API key")
-    # Track usage
-    await db.api_keys.update_one({"key_value": raw_key}, {
-        "$set": {"last_used_at": datetime.now(timezone.utc).isoformat()},
-        "$inc": {"usage_count": 1}
-    })
-    c = await db.certificates.find_one({"verification_id": vid}, {"_id": 0})
-    if not c: raise HTTPException(404, "Verification ID not found")
+    rate, burst = RATE_TIERS.get(k.get("tier") or DEFAULT_API_TIER, RATE_TIERS[DEFAULT_API_TIER])
+    if cost > burst:
+        raise HTTPException(413, f"Batch of {cost} exceeds this key's limit of {burst} verifications per request")
+    d = await rate_limiter.take(f"key:{k['id']}", rate, burst, cost=cost)
+    if not d.allowed:
+        raise HTTPException(429, "Rate limit exceeded for this API key", headers=d.headers())
+    response.headers.update(d.headers())
+    api_keys.record(raw_key, cost)  # flushed in bulk by api_keys.run()
+    return k
+
+def verification(c: dict) -> dict:
     return {
-        "valid": c["status"] == "active", "verification_id": vid,
+        "valid": c["status"] == "active", "verification_id": c["verification_id"],
         "status": c["status"], "creator_name": c.get("creator_name"),
         "content_title": c.get("content_title"), "content_hash": c.get("content_hash"),
         "timestamp": c.get("timestamp"), "issued_by": "TrustInk",
         "api_version": "v1"
     }
 
+@r.get("/v1/verify/{vid}")
+async def third_party_verify(vid: str, request: Request, response: Response,
+                              x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
+                              api_key: Optional[str] = Query(None)):
+    await partner_key(request, response, x_api_key or api_key)
+    c = await cached_cert("verification_id", vid)
+    if not c: raise HTTPException(404, "Verification ID not found")
+    return verification(c)
+
+@r.post("/v1/verify:batch")
+async def third_party_verify_batch(d: VerifyBatch, request: Request, response: Response,
+                                   x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
+                                   api_key: Optional[str] = Query(None),
+                                   format: str = Query("json", pattern="^(json|ndjson)$")):
+    vids = list(dict.fromkeys(d.verification_ids))
+    if not vids: raise HTTPException(400, "verification_ids must not be empty")
+    if len(vids) > VERIFY_BATCH_MAX:
+        raise HTTPException(413, f"At most {VERIFY_BATCH_MAX} verification IDs per request")
+    await partner_key(request, response, x_api_key or api_key, cost=len(vids))
+    found = await cached_certs("verification_id", vids)
+    results = [verification(found[v]) if v in found else
+               {"valid": False, "verification_id": v, "status": "not_found", "api_version": "v1"} for v in vids]
+    if format == "ndjson":
+        async def rows():
+            for row in results: yield row
+        resp = ndjson(rows())
+        resp.headers.update({k: v for k, v in response.headers.items() if k.startswith("x-ratelimit")})
+        return resp
+    return {"results": results, "count": len(results), "found": len(found), "api_version": "v1"}
+
 # ADMIN USER MANAGEMENT
 @r.post("/admin/users/{uid}/status")
 async def update_user_status(uid: str, d: UserStatusUpdate, u=Depends(admin_only)):
@@ -721,45 +1292,190 @@ async def update_user_status(uid: str, d: UserStatusUpdate, u=Depends(admin_only
         raise HTTPException(400, "Cannot change your own account status")
     target = await db.users.find_one({"id": uid})
     if not target: raise HTTPException(404, "User not found")
-    await db.users.update_one({"id": uid}, {"$set": {"status": d.status}})
+    old = target.get("status", "active")
+    async with counters.writing("users") as deltas:
+        await update_user(uid, {"status": d.status})
+        if old != d.status: add_transition(deltas, "users", old, d.status)
     return {"message": f"User status updated to {d.status}", "user_id": uid}
 
 @r.put("/admin/users/{uid}/trust")
 async def update_user_trust(uid: str, d: TrustScoreUpdate, u=Depends(admin_only)):
     if not (0 <= d.trust_score <= 100):
         raise HTTPException(400, "Trust score must be 0-100")
-    await db.users.update_one({"id": uid}, {"$set": {"trust_score": d.trust_score}})
+    if not await trust_ledger.set(uid, d.trust_score, f"admin:{u['id']}"):
+        raise HTTPException(404, "User not found")
     return {"message": "Trust score updated", "trust_score": d.trust_score, "trust_level": tl(d.trust_score)}
 
+@r.post("/admin/trust/recompute")
+async def recompute_trust(u=Depends(admin_only)):
+    """Rebuild every creator's trust score and post counters from the trust_events log."""
+    res = await trust_ledger.recompute()
+    user_cache.clear()
+    return {**res, **trust_ledger.stats()}
+
 @r.get("/admin/stats")
 async def admin_stats(u=Depends(admin_only)):
+    users, subs, certs, keys = await asyncio.gather(
+        get_counters("users"), get_counters("submissions"), get_counters("certificates"), get_counters("api_keys"))
     return {
-        "total_users": await db.users.count_documents({}),
-        "creators": await db.users.count_documents({"role": "creator"}),
-        "reviewers": await db.users.count_documents({"role": "reviewer"}),
-        "suspended": await db.users.count_documents({"status": "suspended"}),
-        "banned": await db.users.count_documents({"status": "banned"}),
-        "total_submissions": await db.submissions.count_documents({}),
-        "total_certificates": await db.certificates.count_documents({"status": "active"}),
-        "pending_review": await db.submissions.count_documents({"status": "pending"}),
-        "api_keys_active": await db.api_keys.count_documents({"is_active": True}),
+        "total_users": users["total"],
+        "creators": users.get("role_creator", 0),
+        "reviewers": users.get("role_reviewer", 0),
+        "suspended": users.get("status_suspended", 0),
+        "banned": users.get("status_banned", 0),
+        "total_submissions": subs["total"],
+        "total_certificates": certs.get("status_active", 0),
+        "pending_review": subs.get("status_pending", 0),
+        "api_keys_active": keys.get("active_true", 0),
     }
 
+@r.post("/admin/stats/rebuild")
+async def rebuild_stats(u=Depends(admin_only)):
+    return {"message": "Stats counters reset", "removed": await counters.invalidate()}
+
+@r.get("/admin/analysis-cache")
+async def analysis_cache_stats(u=Depends(admin_only)):
+    return analysis_cache.stats()
+
+@r.post("/admin/analysis-cache/invalidate")
+async def invalidate_analysis_cache(all_versions: bool = Query(False), u=Depends(admin_only)):
+    removed = await analysis_cache.invalidate(all_versions)
+    return {"message": "Analysis cache invalidated", "removed": removed, "version": analysis_cache.version}
+
+@r.put("/admin/apikeys/{key_id}/tier")
+async def update_api_key_tier(key_id: str, d: APIKeyTierUpdate, u=Depends(admin_only)):
+    if d.tier not in RATE_TIERS:
+        raise HTTPException(400, f"Unknown tier. Available: {', '.join(RATE_TIERS)}")
+    k = await db.api_keys.find_one_and_update({"id": key_id}, {"$set": {
+        "tier": d.tier, "changed_at": datetime.now(timezone.utc).isoformat()}}, {"key_value": 1})
+    if not k: raise HTTPException(404, "Key not found")
+    api_keys.forget(k["key_value"])
+    rate, burst = RATE_TIERS[d.tier]
+    return {"message": "API key tier updated", "tier": d.tier, "rate_per_second": rate, "burst": burst}
+
+@r.get("/admin/apikeys/usage")
+async def api_key_usage_stats(u=Depends(admin_only)):
+    return {**api_keys.stats(), "rate_limiter": rate_limiter.stats()}
+
+@r.get("/admin/cpu-pool")
+async def cpu_pool_stats(u=Depends(admin_only)):
+    return {**cpu_pool.stats(), "pdf_store": pdf_store.stats()}
+
+similarity_backfill = {"running": False, "indexed": 0}
+
+@r.get("/admin/similarity")
+async def similarity_stats(u=Depends(admin_only)):
+    return {**similarity_index.stats(), "indexed": await db.fingerprints.estimated_document_count(),
+            "backfill": similarity_backfill}
+
+async def backfill_similarity():
+    """Fingerprint submissions created before the index existed (no matching, no re-routing)."""
+    similarity_backfill.update(running=True, indexed=0)
+    try:
+        fields = {"_id": 0, "id": 1, "creator_id": 1, "content_text": 1, "content_ref": 1, "verification_id": 1}
+        batch = []
+        async for sub in db.submissions.find({}, fields).sort("_id", 1):
+            batch.append(sub)
+            if len(batch) < 200: continue
+            await _backfill_batch(batch)
+            batch = []
+        if batch: await _backfill_batch(batch)
+    finally:
+        similarity_backfill["running"] = False
+
+async def _backfill_batch(batch: list):
+    done = {f["id"] async for f in db.fingerprints.find({"id": {"$in": [s["id"] for s in batch]}}, {"id": 1})}
+    for sub in batch:
+        if sub["id"] in done: continue
+        sig = await text_signature(await submission_text(sub, ANALYSIS_MAX_BYTES))
+        if sig is None: continue
+        await similarity_index.add(sub["id"], sub["creator_id"], sig, sub.get("verification_id"), match=False)
+        similarity_backfill["indexed"] += 1
+
+@r.post("/admin/similarity/backfill")
+async def start_similarity_backfill(u=Depends(admin_only)):
+    if similarity_backfill["running"]:
+        raise HTTPException(409, "Backfill already running")
+    asyncio.create_task(backfill_similarity())
+    return {"message": "Backfill started"}
+
+@r.get("/admin/jobs")
+async def job_stats(u=Depends(admin_only)):
+    return await analysis_jobs.stats()
+
 app.include_router(r)
 
+# ─── METRICS ──────────────────────────────────────────────
+thread_pool = metrics.InstrumentedThreadPool(THREAD_POOL_SIZE)  # default executor, installed at startup
+metrics.track_cache("certificates", lambda: (cert_cache.cache.hits, cert_cache.cache.misses))
+metrics.track_gauge("trustink_cert_cache_sync_age_seconds", "Seconds since this worker last evicted certificates "
+                    "revoked on other workers (their staleness window here)", cert_cache.sync_age)
+metrics.track_cache("api_keys", lambda: (api_keys.cache.hits, api_keys.cache.misses))
+metrics.track_cache("analysis", lambda: (analysis_cache.hits, analysis_cache.misses))
+metrics.track_cache("users", lambda: (user_cache.cache.hits, user_cache.cache.misses))
+metrics.track_gauge("trustink_user_cache_ttl_seconds", "Longest a cached user document is served", lambda: USER_CACHE_TTL)
+metrics.track_gauge("trustink_user_cache_sync_age_seconds", "Seconds since this worker last evicted users changed "
+                    "on other workers (their staleness window here)", user_cache.sync_age)
+metrics.track_gauge("trustink_user_cache_invalidations", "Users evicted after a status, role or trust change",
+                    lambda: user_cache.invalidations, counter=True)
+metrics.track_cache("pdf_store", lambda: (pdf_store.hits, pdf_store.renders))
+metrics.track_gauge("trustink_cpu_pool_running", "CPU pool tasks submitted and not finished", lambda: cpu_pool.running)
+metrics.track_gauge("trustink_cpu_pool_waiting", "Callers waiting for a CPU pool slot", lambda: cpu_pool.waiting)
+metrics.track_gauge("trustink_cpu_pool_rejected", "CPU pool calls rejected as busy", lambda: cpu_pool.rejected, counter=True)
+metrics.track_gauge("trustink_thread_pool_size", "Default thread pool size", lambda: thread_pool.size)
+metrics.track_gauge("trustink_thread_pool_busy", "Default thread pool threads running work", lambda: thread_pool.busy)
+metrics.track_gauge("trustink_thread_pool_queued", "Work waiting for a default pool thread", lambda: thread_pool.queued)
+metrics.track_gauge("trustink_rate_limited", "Partner API requests refused by the rate limiter",
+                    lambda: rate_limiter.limited, counter=True)
+
+if METRICS_ENABLED:
+    metrics.instrument(app)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return metrics.metrics_response()
+
+@app.exception_handler(PoolBusy)
+@app.exception_handler(PoolClosed)  # a request still running during shutdown
+async def pool_busy(request: Request, e: Exception):
+    return JSONResponse({"detail": "Server busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+# Long-running loops started at startup and cancelled at shutdown.
+background_tasks: List[asyncio.Task] = []
+
 @app.on_event("startup")
 async def startup():
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("id")
-    await db.submissions.create_index("id")
-    await db.submissions.create_index("creator_id")
-    await db.submissions.create_index("status")
-    await db.certificates.create_index("verification_id", unique=True)
-    await db.certificates.create_index("id")
-    await db.api_keys.create_index("key_value", unique=True)
-    await db.api_keys.create_index("owner_id")
+    global detector
+    try:
+        await detector.start()
+    except Exception as e:
+        logger.error(f"AI detector '{AI_DETECTOR}' failed to start: {e}, using mock fallback")
+        detector = Detector()
+    asyncio.get_running_loop().set_default_executor(thread_pool)
+    cpu_pool.start()
+    await ensure_indexes(db)
+    analysis_cache.version = analysis_version()
+    await analysis_cache.ensure_indexes()
+    await analysis_jobs.ensure_indexes()
+    await registry_index.load(db.certificates)
+    background_tasks.append(asyncio.create_task(refresh_registry_index()))
+    background_tasks.append(asyncio.create_task(api_keys.run(API_KEY_SYNC_INTERVAL)))
+    background_tasks.append(asyncio.create_task(user_cache.run(USER_CACHE_SYNC_INTERVAL)))
+    background_tasks.append(asyncio.create_task(cert_cache.run(CERT_REVOCATION_SYNC)))
+    background_tasks.append(asyncio.create_task(metrics.watch_loop_lag()))
+    if isinstance(rate_limiter.backend, MongoBackend):
+        await rate_limiter.backend.ensure_indexes()
+    await analysis_jobs.start()
+    background_tasks.append(asyncio.create_task(sweep_stranded_analyses()))
     logger.info("TrustInk API started")
 
 @app.on_event("shutdown")
 async def shutdown():
+    for t in background_tasks:
+        t.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await analysis_jobs.close()
+    await api_keys.flush()
+    await detector.close()
+    cpu_pool.close()
     client.close()
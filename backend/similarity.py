@@ -0,0 +1,125 @@
+"""Near-duplicate detection across submissions: MinHash signatures with LSH banding.
+
+Text is cut into overlapping word 5-grams; a 128-value MinHash signature estimates the Jaccard
+similarity of two shingle sets as the fraction of equal positions. The signature is split into
+32 bands of 4 values and each band is hashed to one int64 key. Documents are stored in the
+`fingerprints` collection with those keys in a multikey-indexed array, so a lookup is one
+`$in` index query for candidates sharing any band, rescored exactly on their signatures. With
+32x4 bands a pair at J=0.6 becomes a candidate with probability ~0.99, one at J=0.2 ~0.05.
+
+`signature()` is pure and picklable so large texts can go through the CPU pool. Signatures
+depend only on the fixed seed below; changing SHINGLE, NUM_PERM, BANDS or the seed needs a
+rebuild of the collection.
+"""
+import hashlib, re, zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+SHINGLE, NUM_PERM, BANDS = 5, 128, 32
+ROWS = NUM_PERM // BANDS
+CANDIDATE_LIMIT = 500  # boilerplate shared by many documents must not turn a lookup into a scan
+
+_rng = np.random.RandomState(20260101)  # fixed so signatures agree across workers and restarts
+_A = _rng.randint(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.randint(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def shingles(text: str) -> np.ndarray:
+    """Unique 32-bit hashes of the word 5-grams of text (one shingle for shorter texts)."""
+    words = TOKEN.findall((text or "").lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    vocab = {w: zlib.crc32(w.encode()) for w in set(words)}
+    w = np.fromiter((vocab[t] for t in words), dtype=np.uint64, count=len(words))
+    n = max(1, len(w) - SHINGLE + 1)
+    h = w[:n].copy()
+    for j in range(1, min(SHINGLE, len(w))):
+        h *= _MIX
+        h += w[j:j + n]
+    return np.unique((h ^ (h >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32), or None for text without words."""
+    x = shingles(text)
+    if not len(x):
+        return None
+    sig, buf = np.empty(NUM_PERM, dtype=np.uint32), np.empty_like(x)
+    for k in range(NUM_PERM):
+        # Multiply-shift hashing: the high 32 bits of a*x + b (mod 2^64).
+        np.multiply(x, _A[k], out=buf)
+        buf += _B[k]
+        buf >>= np.uint64(32)
+        sig[k] = buf.min()
+    return sig
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    keys = []
+    for b in range(BANDS):
+        d = hashlib.blake2b(sig[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8, salt=b.to_bytes(16, "little"))
+        keys.append(int.from_bytes(d.digest(), "little", signed=True))
+    return keys
+
+
+def estimate(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def fingerprint_doc(doc_id: str, creator_id: str, sig: np.ndarray, verification_id: Optional[str] = None) -> dict:
+    return {"id": doc_id, "creator_id": creator_id, "sig": Binary(sig.astype("<u4").tobytes()),
+            "bands": band_keys(sig), "verification_id": verification_id}
+
+
+def rank(sig: np.ndarray, candidates: Iterable[dict], threshold: float, limit: int) -> List[dict]:
+    """Score candidate fingerprint docs against sig; matches at or above threshold, best first."""
+    out = []
+    for c in candidates:
+        j = estimate(sig, np.frombuffer(c["sig"], dtype="<u4"))
+        if j >= threshold:
+            out.append({"submission_id": c["id"], "creator_id": c["creator_id"], "similarity": round(j, 3),
+                        "verification_id": c.get("verification_id")})
+    out.sort(key=lambda m: -m["similarity"])
+    return out[:limit]
+
+
+class SimilarityIndex:
+    def __init__(self, coll, threshold: float = 0.6, limit: int = 5):
+        self.coll, self.threshold, self.limit = coll, threshold, limit
+        self.lookups = self.candidates = self.matched = 0
+
+    async def match(self, sig: np.ndarray, exclude: Optional[str] = None) -> List[dict]:
+        q = {"bands": {"$in": band_keys(sig)}}
+        if exclude: q["id"] = {"$ne": exclude}
+        found = await self.coll.find(q, {"_id": 0, "bands": 0}).limit(CANDIDATE_LIMIT).to_list(None)
+        matches = rank(sig, found, self.threshold, self.limit)
+        self.lookups += 1
+        self.candidates += len(found)
+        self.matched += bool(matches)
+        return matches
+
+    async def add(self, doc_id: str, creator_id: str, sig: np.ndarray, verification_id: Optional[str] = None,
+                  match: bool = True) -> List[dict]:
+        """Index a document (idempotent) and return the earlier documents it nearly duplicates."""
+        matches = await self.match(sig, exclude=doc_id) if match else []
+        doc = fingerprint_doc(doc_id, creator_id, sig, verification_id)
+        await self.coll.replace_one({"id": doc_id}, doc, upsert=True)
+        return matches
+
+    async def certified(self, doc_id: str, verification_id: Optional[str]):
+        await self.coll.update_one({"id": doc_id}, {"$set": {"verification_id": verification_id}})
+
+    async def certified_many(self, vids: Dict[str, str]):
+        """certified() for {doc_id: verification_id} in one bulk write."""
+        if vids:
+            await self.coll.bulk_write([UpdateOne({"id": k}, {"$set": {"verification_id": v}}) for k, v in vids.items()],
+                                       ordered=False)
+
+    def stats(self) -> dict:
+        return {"threshold": self.threshold, "lookups": self.lookups, "matched": self.matched,
+                "avg_candidates": round(self.candidates / self.lookups, 2) if self.lookups else 0.0}
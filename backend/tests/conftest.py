@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the backend modules (server, detector, ...) importable from the test files.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
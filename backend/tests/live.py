@@ -0,0 +1,36 @@
+"""Helpers for tests that need a local mongod or a running API server."""
+import asyncio, os, time, uuid
+
+import pytest
+import requests
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def run_live(coro_fn, prefix: str = "trustink_test"):
+    """Run `coro_fn(db)` against a throwaway database on MONGO_URL; skip when no mongod is reachable."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.errors import PyMongoError
+
+    async def go():
+        client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+        try:
+            await client.admin.command("ping")
+        except PyMongoError:
+            pytest.skip(f"No mongod reachable at {MONGO_URL}")
+        db = client[f"{prefix}_{uuid.uuid4().hex[:8]}"]
+        try:
+            await coro_fn(db)
+        finally:
+            await client.drop_database(db.name)
+    asyncio.run(go())
+
+
+def wait_for_analysis(base_url: str, sub: dict, token: str, timeout: float = 30) -> dict:
+    """Submissions are analyzed in the background; poll until they leave 'analyzing'."""
+    deadline = time.time() + timeout
+    while sub["status"] == "analyzing" and time.time() < deadline:
+        time.sleep(0.5)
+        sub = requests.get(f"{base_url}/api/submissions/{sub['id']}",
+                           headers={"Authorization": f"Bearer {token}"}).json()
+    return sub
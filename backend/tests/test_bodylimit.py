@@ -0,0 +1,69 @@
+"""Offline tests for the streaming request body cap"""
+from fastapi import FastAPI, Request
+from pydantic import BaseModel
+from starlette.testclient import TestClient
+
+from bodylimit import BodySizeLimit
+
+
+class Item(BaseModel):
+    text: str
+
+
+def make_client(cap=100):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimit, limit=lambda path: cap * 10 if path == "/upload" else cap)
+    seen = []
+
+    @app.post("/json")
+    async def json_body(item: Item):
+        return {"n": len(item.text)}
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            return {"n": len(await (await request.form())["file"].read())}
+        n = 0
+        async for chunk in request.stream():
+            n += len(chunk)
+            seen.append(n)
+        return {"n": n}
+
+    return TestClient(app), seen
+
+
+def chunks(n, size=10):
+    for _ in range(n):
+        yield b"x" * size
+
+
+def test_declared_length_over_cap_is_refused_up_front():
+    c, _ = make_client()
+    r = c.post("/json", json={"text": "x" * 200})
+    assert r.status_code == 413 and "100 bytes" in r.json()["detail"]
+    assert c.post("/json", json={"text": "x" * 50}).json() == {"n": 50}
+
+
+def test_chunked_body_is_capped_while_streaming():
+    c, seen = make_client()
+    assert c.post("/upload", content=chunks(50)).json() == {"n": 500}
+    seen.clear()
+    r = c.post("/upload", content=chunks(500))
+    assert r.status_code == 413 and "1000 bytes" in r.json()["detail"]
+    assert all(n <= 1000 for n in seen)  # the handler never saw a byte past the cap
+
+
+def test_chunked_json_is_capped():
+    c, _ = make_client()
+    r = c.post("/json", content=(b'{"text": "' + b"x" * 20 + b'"}' for _ in range(10)),
+               headers={"content-type": "application/json"})
+    assert r.status_code == 413
+
+
+def test_multipart_part_is_capped_while_spooling():
+    c, _ = make_client()
+    assert c.post("/upload", files={"file": ("a.txt", b"x" * 500)}).json() == {"n": 500}
+    body = b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n\r\n" + b"x" * 5000 + b"\r\n--b--\r\n"
+    r = c.post("/upload", content=(body[i:i + 100] for i in range(0, len(body), 100)),
+               headers={"content-type": "multipart/form-data; boundary=b"})
+    assert r.status_code == 413
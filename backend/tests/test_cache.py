@@ -0,0 +1,229 @@
+"""Tests for the TTL/LRU cache, the user and certificate caches and the change feed (offline),
+and the analysis cache (against a local mongod, skipped when none is reachable)"""
+import asyncio, time
+from datetime import datetime, timedelta, timezone
+
+from cache import AnalysisCache, CertCache, ChangeFeed, TTLCache, UserCache
+from live import run_live
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        c = TTLCache(maxsize=2, ttl=60)
+        c.set("a", 1)
+        c.set("b", 2)
+        assert c.get("a") == 1  # "b" is now least recently used
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1 and c.get("c") == 3
+        assert c.evictions == 1
+
+    def test_entries_expire(self):
+        c = TTLCache(maxsize=10, ttl=0.01)
+        c.set("a", 1)
+        time.sleep(0.02)
+        assert c.get("a") is None
+        assert len(c) == 0
+
+    def test_hit_miss_counters(self):
+        c = TTLCache()
+        c.set("a", 1)
+        c.get("a")
+        c.get("missing")
+        assert c.stats()["hits"] == 1 and c.stats()["misses"] == 1
+        assert c.stats()["hit_rate"] == 0.5
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs, self.reads = {d["id"]: d for d in docs}, 0
+
+    async def find_one(self, q, projection=None):
+        self.reads += 1
+        await asyncio.sleep(0)
+        d = self.docs.get(q["id"])
+        return dict(d) if d else None
+
+    async def find(self, q, projection=None):
+        for d in list(self.docs.values()):
+            if d.get("changed_at", "") > q["changed_at"]["$gt"]:
+                yield dict(d)
+
+
+class TestUserCache:
+    def test_repeat_lookups_hit_memory(self):
+        users = FakeUsers([{"id": "u1", "status": "active"}])
+        c = UserCache(users)
+
+        async def run():
+            return [await c.get("u1") for _ in range(5)], await c.get("nobody")
+        got, missing = asyncio.run(run())
+        assert all(u == {"id": "u1", "status": "active"} for u in got) and missing is None
+        assert users.reads == 2 and c.cache.hits == 4
+
+    def test_forget_and_sync_evict(self):
+        users = FakeUsers([{"id": "u1", "status": "active"}, {"id": "u2", "status": "active"}])
+        c = UserCache(users)
+
+        async def run():
+            await c.get("u1"), await c.get("u2")
+            users.docs["u1"]["status"] = "banned"
+            c.forget("u1")
+            # Another worker bans u2 and stamps changed_at.
+            users.docs["u2"].update(status="banned", changed_at="9999")
+            before = (await c.get("u2"))["status"]
+            await c.sync()
+            return (await c.get("u1"))["status"], before, (await c.get("u2"))["status"]
+        assert asyncio.run(run()) == ("banned", "active", "banned")
+        assert c.remote_invalidations == 1
+
+    def test_read_racing_an_eviction_is_not_cached(self):
+        users = FakeUsers([{"id": "u1", "status": "active"}])
+        c = UserCache(users)
+
+        async def run():
+            read = asyncio.create_task(c.get("u1"))
+            await asyncio.sleep(0)  # the read is in flight with the pre-ban document
+            c.forget("u1")
+            await read
+            users.docs["u1"]["status"] = "banned"
+            return (await c.get("u1"))["status"]
+        assert asyncio.run(run()) == "banned"
+
+
+class TestChangeFeed:
+    def test_late_commit_behind_the_watermark_is_seen(self):
+        now = datetime.now(timezone.utc)
+        at = lambda s: (now + timedelta(seconds=s)).isoformat()
+        users = FakeUsers([{"id": "u1", "changed_at": at(2)}])
+        feed = ChangeFeed(users, "id", lookback=10)
+
+        async def run():
+            first = await feed.poll()
+            # u2 was stamped before u1 but its write committed after the poll above.
+            users.docs["u2"] = {"id": "u2", "changed_at": at(1)}
+            second = await feed.poll()
+            users.docs["u1"]["changed_at"] = at(3)
+            return first, second, await feed.poll(), await feed.poll()
+        assert [[d["id"] for d in ds] for ds in asyncio.run(run())] == [["u1"], ["u2"], ["u1"], []]
+
+
+class FakeCerts:
+    """Certificates collection that counts queries: find_one, and find with $in or $gt filters."""
+    def __init__(self, docs):
+        self.docs, self.queries = docs, 0
+
+    async def find_one(self, q, projection=None):
+        self.queries += 1
+        await asyncio.sleep(0)
+        (k, v), = q.items()
+        return next((dict(d) for d in self.docs if d.get(k) == v), None)
+
+    async def find(self, q, projection=None):
+        self.queries += 1
+        (k, cond), = q.items()
+        for d in list(self.docs):
+            if "$in" in cond and d.get(k) in cond["$in"] or "$gt" in cond and (d.get(k) or "") > cond["$gt"]:
+                yield dict(d)
+
+
+def cert(cid):
+    return {"id": cid, "verification_id": f"VH-2026-{cid.upper()}", "status": "active", "revoked_at": None}
+
+
+class TestCertCache:
+    def test_warm_hits_make_no_queries(self):
+        certs = FakeCerts([cert("c1"), cert("c2")])
+        c = CertCache(certs)
+
+        async def run():
+            await c.get("id", "c1"), await c.get_many("verification_id", ["VH-2026-C2", "VH-2026-NOPE"])
+            before = certs.queries
+            got = [await c.get("id", "c1"), await c.get("verification_id", "VH-2026-C1"),
+                   await c.get_many("verification_id", ["VH-2026-C2", "VH-2026-NOPE"]), await c.get("id", "c2")]
+            return got, certs.queries - before
+        (c1, by_vid, many, c2), queries = asyncio.run(run())
+        assert queries == 0
+        assert c1["id"] == by_vid["id"] == "c1" and list(many) == ["VH-2026-C2"] and c2["id"] == "c2"
+
+    def test_sync_evicts_revocations_from_other_workers(self):
+        certs = FakeCerts([cert("c1")])
+        c = CertCache(certs)
+
+        async def run():
+            await c.get("verification_id", "VH-2026-C1")
+            # Another worker revokes c1.
+            certs.docs[0].update(status="revoked", revoked_at=datetime.now(timezone.utc).isoformat())
+            stale = (await c.get("verification_id", "VH-2026-C1"))["status"]
+            await c.sync()
+            return stale, (await c.get("verification_id", "VH-2026-C1"))["status"], (await c.get("id", "c1"))["status"]
+        assert asyncio.run(run()) == ("active", "revoked", "revoked")
+        assert c.remote_invalidations == 1
+
+    def test_read_racing_a_revocation_is_not_cached(self):
+        certs = FakeCerts([cert("c1")])
+        c = CertCache(certs)
+
+        async def run():
+            read = asyncio.create_task(c.get("id", "c1"))
+            await asyncio.sleep(0)  # the read is in flight with the active document
+            certs.docs[0]["status"] = "revoked"
+            c.forget(certs.docs[0])
+            await read
+            return (await c.get("id", "c1"))["status"]
+        assert asyncio.run(run()) == "revoked"
+
+
+
+def analysis(source: str = "hf", score: float = 0.9) -> dict:
+    return {"ai": {"human_probability": score, "ai_probability": round(1 - score, 3), "source": source},
+            "style": {"score": 0.7}}
+
+
+class TestAnalysisCache:
+    def test_entries_are_keyed_on_detector_model_and_version(self):
+        async def check(db):
+            a = AnalysisCache(db.analysis_cache, "hf:model-a|style-3")
+            await a.put("h1", analysis())
+            assert await AnalysisCache(db.analysis_cache, "hf:model-b|style-3").get("h1") is None
+            assert await AnalysisCache(db.analysis_cache, "hf:model-a|style-4").get("h1") is None
+            assert await AnalysisCache(db.analysis_cache, "hf:model-a|style-3").get("h1") == analysis()
+        run_live(check, "trustink_analysis_cache")
+
+    def test_memory_miss_is_served_from_the_persistent_tier(self):
+        async def check(db):
+            c = AnalysisCache(db.analysis_cache, "hf:m|style-3")
+            await c.put("h1", analysis())
+            c.memory.clear()
+            assert await c.get("h1") == analysis()
+            assert await c.get("h1") == analysis()
+            assert (c.hits, c.misses, c.db_hits) == (2, 0, 1)  # the second read came from memory
+            assert await c.get("h2") is None and c.misses == 1
+        run_live(check, "trustink_analysis_cache")
+
+    def test_invalidate_drops_other_versions_then_everything(self):
+        async def check(db):
+            old, cur = AnalysisCache(db.analysis_cache, "hf:m|style-2"), AnalysisCache(db.analysis_cache, "hf:m|style-3")
+            await old.put("h1", analysis())
+            await cur.put("h1", analysis(score=0.8))
+            assert await cur.invalidate() == 1
+            assert len(cur.memory) == 0
+            assert await old.get("h1") == analysis()  # still in old's memory tier
+            old.memory.clear()
+            assert await old.get("h1") is None
+            assert await cur.get("h1") == analysis(score=0.8)
+            assert await cur.invalidate(all_versions=True) == 1
+            assert await cur.get("h1") is None
+        run_live(check, "trustink_analysis_cache")
+
+    def test_mock_fallback_is_not_cached(self):
+        async def check(db):
+            c = AnalysisCache(db.analysis_cache, "hf:m|style-3")
+            assert not await c.put("h1", analysis("mock"))
+            assert await c.get("h1") is None and await db.analysis_cache.count_documents({}) == 0
+            # With the mock detector configured, mock scores are the real result.
+            mock = AnalysisCache(db.analysis_cache, "mock|style-3")
+            assert await mock.put("h1", analysis("mock"))
+            mock.memory.clear()
+            assert await mock.get("h1") == analysis("mock")
+        run_live(check, "trustink_analysis_cache")
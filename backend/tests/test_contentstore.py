@@ -0,0 +1,106 @@
+"""Offline tests for the submission content store (GridFS replaced by an in-memory bucket)"""
+import asyncio, hashlib
+
+import pytest
+from bson import ObjectId
+
+from contentstore import PREVIEW_CHARS, ContentStore, ContentTooLarge
+
+
+class FakeUpload:
+    def __init__(self, files):
+        self._id, self.files, self.data, self.aborted = ObjectId(), files, bytearray(), False
+
+    async def write(self, chunk):
+        self.data += chunk
+
+    async def close(self):
+        self.files[self._id] = bytes(self.data)
+
+    async def abort(self):
+        self.aborted = True
+
+
+class FakeDownload:
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self, size=-1):
+        return self.data if size < 0 else self.data[:size]
+
+    async def readchunk(self):
+        chunk, self.data = self.data[:1000], self.data[1000:]
+        return chunk
+
+
+class FakeBucket:
+    def __init__(self):
+        self.files, self.uploads = {}, []
+
+    def open_upload_stream(self, filename, metadata=None):
+        self.uploads.append(FakeUpload(self.files))
+        return self.uploads[-1]
+
+    async def open_download_stream(self, oid):
+        return FakeDownload(self.files[oid])
+
+
+def make_store(**kw):
+    store = ContentStore(None, **kw)
+    store._bucket = FakeBucket()
+    return store
+
+
+async def chunked(data, n=7):
+    for i in range(0, len(data), n):
+        yield data[i:i + n]
+
+
+def test_small_body_stays_inline():
+    text = "Ünïcode split across chunk boundaries — " * 3
+
+    async def run():
+        return await make_store(inline_max=1000).receive(chunked(text.encode()), "f")
+    got = asyncio.run(run())
+    assert got.text == text and got.ref is None and got.size == len(text.encode())
+    assert got.sha256 == hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_large_body_spills_to_gridfs_and_reads_back():
+    text = "long form essay text " * 500
+
+    async def run():
+        store = make_store(inline_max=100)
+        got = await store.receive(chunked(text.encode(), 64), "f")
+        return got, await store.read(got.ref), b"".join([c async for c in store.stream(got.ref)])
+    got, read, streamed = asyncio.run(run())
+    assert got.text is None and got.ref and read == text and streamed == text.encode()
+    assert got.preview == text[:PREVIEW_CHARS] and got.sha256 == hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_read_with_limit_stops_at_a_character_boundary():
+    text = "é" * 1000  # two bytes each
+
+    async def run():
+        store = make_store(inline_max=100)
+        got = await store.receive(chunked(text.encode(), 64), "f")
+        return await store.read(got.ref, 101), await store.read(got.ref, 100)
+    assert asyncio.run(run()) == ("é" * 50, "é" * 50)
+
+
+def test_over_cap_aborts_upload():
+    async def run():
+        store = make_store(inline_max=10, max_bytes=100)
+        with pytest.raises(ContentTooLarge):
+            await store.receive(chunked(b"x" * 200), "f")
+        return store
+    store = asyncio.run(run())
+    assert store.bucket.uploads[0].aborted and not store.bucket.files
+
+
+def test_invalid_utf8_is_rejected():
+    async def run(data):
+        with pytest.raises(UnicodeDecodeError):
+            await make_store().receive(chunked(data), "f")
+    asyncio.run(run(b"valid text \xff\xfe"))
+    asyncio.run(run("é".encode()[:1]))  # truncated multi-byte sequence at the end
@@ -0,0 +1,81 @@
+"""Offline tests for the CPU process pool"""
+import asyncio, os, time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from cpupool import CpuPool, PoolBusy, PoolClosed
+
+
+def square(x):
+    return x * x
+
+
+def fail(x):
+    raise ValueError(x)
+
+
+def die_once(marker):
+    """Kill the worker process the first time, succeed on the retry."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "ok"
+
+
+def die(_):
+    os._exit(1)
+
+
+class TestCpuPool:
+    def test_runs_in_processes(self):
+        pool = CpuPool(workers=2, max_queue=4)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(pool.run(square, i, kind="sq") for i in range(10)))
+            finally:
+                pool.close()
+        assert asyncio.run(run()) == [i * i for i in range(10)]
+        assert pool.stats()["tasks"]["sq"]["count"] == 10 and pool.stats()["mode"] == "process"
+
+    def test_errors_propagate_and_are_counted(self):
+        pool = CpuPool(workers=0)
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(fail, 1, kind="f"))
+        assert pool.stats()["tasks"]["f"]["errors"] == 1
+
+    def test_backpressure_rejects_when_saturated(self):
+        pool = CpuPool(workers=0, max_queue=1, queue_timeout=0.05)  # 2 slots
+
+        async def run():
+            return await asyncio.gather(*(pool.run(time.sleep, 0.3) for _ in range(4)), return_exceptions=True)
+        results = asyncio.run(run())
+        assert sum(isinstance(r, PoolBusy) for r in results) == 2
+        assert pool.stats()["rejected"] == 2 and pool.stats()["running"] == 0
+
+    def test_run_after_close_raises_instead_of_restarting(self):
+        pool = CpuPool(workers=1)
+
+        async def run():
+            assert await pool.run(square, 3) == 9
+            pool.close()
+            with pytest.raises(PoolClosed):
+                await pool.run(square, 3)
+            assert pool.executor is None
+        asyncio.run(run())
+
+    def test_dead_worker_is_replaced_and_the_task_retried(self, tmp_path):
+        pool = CpuPool(workers=1)
+
+        async def run():
+            try:
+                assert await pool.run(die_once, str(tmp_path / "died")) == "ok"
+                assert pool.restarts == 1
+                # A task that kills every worker is retried only once, and the pool still recovers.
+                with pytest.raises(BrokenProcessPool):
+                    await pool.run(die, 0)
+                assert await pool.run(square, 4) == 16
+            finally:
+                pool.close()
+        asyncio.run(run())
@@ -0,0 +1,83 @@
+"""Offline tests for the in-process AI detector and its micro-batcher"""
+import asyncio
+import pytest
+
+from detector import Detector, LocalDetector, MicroBatcher, chunk_text, make_detector
+
+
+def fake_classifier(calls):
+    def classify(texts):
+        calls.append(len(texts))
+        return [[{"label": "Real", "score": 0.9}, {"label": "Fake", "score": 0.1}] for _ in texts]
+    return classify
+
+
+class TestMicroBatcher:
+    def test_concurrent_items_are_batched(self):
+        sizes = []
+
+        async def run():
+            b = MicroBatcher(lambda xs: (sizes.append(len(xs)), [x * 2 for x in xs])[1],
+                             max_batch_size=8, max_wait=0.05)
+            await b.start()
+            try:
+                return await asyncio.gather(*(b.submit(i) for i in range(20)))
+            finally:
+                await b.close()
+
+        assert asyncio.run(run()) == [i * 2 for i in range(20)]
+        assert sizes == [8, 8, 4]
+
+    def test_errors_propagate_to_every_caller(self):
+        def boom(xs): raise ValueError("model failed")
+
+        async def run():
+            b = MicroBatcher(boom, max_batch_size=4, max_wait=0.01)
+            await b.start()
+            try:
+                return await asyncio.gather(b.submit(1), b.submit(2), return_exceptions=True)
+            finally:
+                await b.close()
+
+        assert all(isinstance(r, ValueError) for r in asyncio.run(run()))
+
+
+class TestLocalDetector:
+    def test_long_text_is_chunked_not_truncated(self):
+        text = "word " * 2000
+        chunks = chunk_text(text, size=1500, max_chunks=16)
+        assert len(chunks) > 1
+        assert all(len(c) <= 1500 for c in chunks)
+
+    def test_detect_uses_batched_classifier(self):
+        calls = []
+
+        async def run():
+            d = LocalDetector(classifier=fake_classifier(calls), workers=1, max_batch_size=32, max_wait_ms=20)
+            await d.start()
+            try:
+                return await asyncio.gather(*(d.detect("A genuinely human sentence. " * 10) for _ in range(10)))
+            finally:
+                await d.close()
+
+        results = asyncio.run(run())
+        assert all(r["human_probability"] == 0.9 and r["confidence"] == "high" for r in results)
+        assert results[0]["source"] == "roberta-openai-detector-local"
+        assert sum(calls) == 10 and len(calls) < 10
+
+    def test_unknown_labels_fall_back(self):
+        async def run():
+            d = LocalDetector(classifier=lambda xs: [[{"label": "LABEL_0", "score": 1.0}] for _ in xs])
+            await d.start()
+            try:
+                return await d.detect("Some text that is long enough to classify.")
+            finally:
+                await d.close()
+
+        assert asyncio.run(run()) is None
+
+
+def test_mock_backend_always_defers():
+    d = make_detector("mock")
+    assert type(d) is Detector
+    assert asyncio.run(d.detect("anything")) is None
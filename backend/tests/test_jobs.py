@@ -0,0 +1,129 @@
+"""Job queue: claim, lease expiry, retry/backoff and dead-lettering, against a local mongod
+(MONGO_URL, default mongodb://localhost:27017), skipped when none is reachable."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from jobs import JobQueue
+from live import run_live
+
+
+def queue(db, handler, **kw) -> tuple:
+    failed = []
+
+    async def on_failure(job):
+        failed.append(job)
+    return JobQueue(db.jobs, handler, on_failure=on_failure, **kw), failed
+
+
+async def expire_lease(db, job_id: str):
+    await db.jobs.update_one({"id": job_id}, {"$set": {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+
+
+def test_backoff_is_exponential_and_capped():
+    q = JobQueue(None, None, backoff_base=2, backoff_max=30)
+    assert [q.backoff(n) for n in (1, 2, 3, 4, 5, 6)] == [2, 4, 8, 16, 30, 30]
+
+
+def test_claim_holds_a_lease_and_counts_the_attempt():
+    async def check(db):
+        async def handler(job): pass
+        q, _ = queue(db, handler)
+        await q.ensure_indexes()
+        jid = await q.enqueue("k", {"n": 1})
+        job = await q.claim("w1")
+        assert job["id"] == jid and job["attempts"] == 1 and job["worker"] == "w1"
+        assert await q.claim("w2") is None  # leased
+        await expire_lease(db, jid)
+        again = await q.claim("w2")
+        assert again["worker"] == "w2" and again["attempts"] == 2
+        await q.run_one(again)
+        assert (await db.jobs.find_one({"id": jid}))["status"] == "done"
+    run_live(check, "trustink_jobs")
+
+
+def test_failures_retry_with_backoff_then_dead_letter():
+    async def check(db):
+        async def handler(job): raise RuntimeError("boom")
+        q, failed = queue(db, handler, max_attempts=2, backoff_base=60)
+        jid = await q.enqueue("k", {})
+        await q.run_one(await q.claim("w"))
+        doc = await db.jobs.find_one({"id": jid})
+        assert doc["status"] == "queued" and doc["last_error"] == "boom"
+        assert doc["run_at"].replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=50)
+        assert await q.claim("w") is None  # backing off
+        await db.jobs.update_one({"id": jid}, {"$set": {"run_at": datetime.now(timezone.utc)}})
+        await q.run_one(await q.claim("w"))
+        assert (await db.jobs.find_one({"id": jid}))["status"] == "failed"
+        assert [j["id"] for j in failed] == [jid]
+    run_live(check, "trustink_jobs")
+
+
+def test_job_whose_worker_keeps_dying_is_dead_lettered():
+    async def check(db):
+        ran = []
+
+        async def handler(job): ran.append(job["id"])
+        q, failed = queue(db, handler, max_attempts=2)
+        jid = await q.enqueue("k", {})
+        for _ in range(2):  # claimed, then the worker dies and the lease runs out
+            assert await q.claim("w")
+            await expire_lease(db, jid)
+        await q.run_one(await q.claim("w"))
+        doc = await db.jobs.find_one({"id": jid})
+        assert doc["status"] == "failed" and "lease expired" in doc["last_error"]
+        assert not ran and [j["id"] for j in failed] == [jid]
+    run_live(check, "trustink_jobs")
+
+
+def test_close_releases_running_jobs_without_using_an_attempt():
+    async def check(db):
+        started = asyncio.Event()
+
+        async def handler(job):
+            started.set()
+            await asyncio.sleep(60)
+        q, failed = queue(db, handler, workers=1)
+        jid = await q.enqueue("k", {})
+        await q.start()
+        await asyncio.wait_for(started.wait(), 5)
+        await q.close()
+        doc = await db.jobs.find_one({"id": jid})
+        assert doc["status"] == "queued" and doc["attempts"] == 0 and doc["lease_until"] is None
+        assert (await q.claim("w"))["id"] == jid and not failed
+    run_live(check, "trustink_jobs")
+
+
+class FlakyJobs:
+    """The jobs collection, with the first status update after a run raising."""
+    def __init__(self, coll):
+        self.coll, self.failed = coll, False
+
+    def __getattr__(self, name):
+        return getattr(self.coll, name)
+
+    async def update_one(self, *args, **kw):
+        if not self.failed:
+            self.failed = True
+            raise ConnectionError("connection reset")
+        return await self.coll.update_one(*args, **kw)
+
+
+def test_worker_survives_a_failed_status_update():
+    async def check(db):
+        ran, done = [], asyncio.Event()
+
+        async def handler(job):
+            ran.append(job["payload"]["n"])
+            if len(ran) == 2: done.set()
+        jobs = FlakyJobs(db.jobs)
+        q = JobQueue(jobs, handler, workers=1, poll_interval=0.05)
+        first = await q.enqueue("k", {"n": 1})
+        await q.enqueue("k", {"n": 2})
+        await q.start()
+        await asyncio.wait_for(done.wait(), 5)
+        await q.close()
+        assert ran == [1, 2] and jobs.failed
+        # The job whose outcome was lost is still leased, to be claimed again when the lease runs out.
+        doc = await db.jobs.find_one({"id": first})
+        assert doc["status"] == "running" and doc["lease_until"] is not None
+    run_live(check, "trustink_jobs")
@@ -0,0 +1,45 @@
+"""Offline tests for the Prometheus metrics helpers"""
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+
+
+def sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_stage_records_duration_and_errors():
+    before = sample("trustink_stage_duration_seconds_count", stage="t1")
+    with metrics.stage("t1"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.stage("t1"):
+            raise ValueError()
+    assert sample("trustink_stage_duration_seconds_count", stage="t1") == before + 2
+    assert sample("trustink_stage_errors_total", stage="t1") == 1
+
+
+def test_scrape_time_collectors():
+    metrics.track_cache("t_cache", lambda: (3, 1))
+    metrics.track_gauge("trustink_t_depth", "test", lambda: 7)
+    assert sample("trustink_cache_lookups_total", cache="t_cache", result="hit") == 3
+    assert sample("trustink_cache_lookups_total", cache="t_cache", result="miss") == 1
+    assert sample("trustink_t_depth") == 7
+
+
+def test_mongo_listener_times_commands_by_collection():
+    timer = metrics.MongoCommandTimer()
+    ev = dict(request_id=1, connection_id=("h", 1), command_name="find")
+    timer.started(SimpleNamespace(command={"find": "t_users", "filter": {}}, **ev))
+    timer.succeeded(SimpleNamespace(duration_micros=1500, **ev))
+    assert sample("trustink_mongo_command_duration_seconds_sum", command="find", collection="t_users") == 0.0015
+    assert not timer.pending
+
+
+def test_thread_pool_counts_busy_work():
+    pool = metrics.InstrumentedThreadPool(2)
+    seen = pool.submit(lambda: (pool.busy, pool.queued)).result()
+    pool.shutdown()
+    assert seen == (1, 0) and pool.busy == 0
@@ -2,6 +2,9 @@
 import pytest
 import requests
 import os
+from functools import partial
+
+import live
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://content-cert.preview.emergentagent.com').rstrip('/')
 
@@ -31,6 +34,8 @@ def reviewer_token():
 def auth_headers(token):
     return {"Authorization": f"Bearer {token}"}
 
+wait_for_analysis = partial(live.wait_for_analysis, BASE_URL)
+
 
 # ─── ADMIN ENDPOINTS ────────────────────────────────────────
 
@@ -190,6 +195,20 @@ class TestAPIKeys:
             assert "api_version" in data
             assert data["api_version"] == "v1"
 
+    def test_third_party_verify_batch(self):
+        if not TestAPIKeys.created_key_value:
+            pytest.skip("API key not created")
+        certs = requests.get(f"{BASE_URL}/api/registry").json().get("certificates", [])
+        vids = [c["verification_id"] for c in certs[:3]] + ["VH-2026-XXXXXX"]
+        r = requests.post(f"{BASE_URL}/api/v1/verify:batch", json={"verification_ids": vids},
+                          headers={"X-API-Key": TestAPIKeys.created_key_value})
+        assert r.status_code == 200
+        data = r.json()
+        assert [x["verification_id"] for x in data["results"]] == vids
+        assert data["found"] == len(vids) - 1
+        assert data["results"][-1]["status"] == "not_found"
+        assert "X-RateLimit-Remaining" in r.headers
+
     def test_third_party_verify_requires_api_key(self):
         r = requests.get(f"{BASE_URL}/api/v1/verify/VH-2026-XXXXXX")
         assert r.status_code == 401
@@ -253,10 +272,56 @@ class TestSubmissionAIDetection:
                           json={"title": "TEST_AI Detection Test", "content_text": content},
                           headers=auth_headers(creator_token))
         assert r.status_code == 200
-        data = r.json()
+        data = wait_for_analysis(r.json(), creator_token)
+        assert data["status"] != "analyzing"
         assert "ai_human_probability" in data
         assert "ai_ai_probability" in data
         assert "ai_confidence" in data
         assert isinstance(data["ai_human_probability"], float)
         assert 0 <= data["ai_human_probability"] <= 1
         # source is not returned in submission response but probability should exist
+
+
+# ─── MODERATION REVIEW ───────────────────────────────────────
+
+class TestModerationReview:
+    """A submission can be reviewed once; a second decision is refused"""
+    def test_double_review_is_rejected(self, creator_token, reviewer_token):
+        content = "A short personal essay about learning to bake bread with my grandmother, written for this test. " * 2
+        r = requests.post(f"{BASE_URL}/api/submissions",
+                          json={"title": "TEST_Double Review", "content_text": content},
+                          headers=auth_headers(creator_token))
+        assert r.status_code == 200
+        sub = wait_for_analysis(r.json(), creator_token)
+        if sub["status"] not in ["pending", "flagged"]:
+            pytest.skip(f"Submission was auto-{sub['status']}, skipping review test")
+        url = f"{BASE_URL}/api/moderation/{sub['id']}/review"
+        first = requests.post(url, json={"decision": "rejected", "notes": "first"}, headers=auth_headers(reviewer_token))
+        second = requests.post(url, json={"decision": "approved", "notes": "second"}, headers=auth_headers(reviewer_token))
+        assert first.status_code == 200 and second.status_code == 409
+        data = requests.get(f"{BASE_URL}/api/submissions/{sub['id']}", headers=auth_headers(creator_token)).json()
+        assert data["status"] == "rejected" and data.get("verification_id") is None
+
+    def test_batch_review_reports_each_item(self, creator_token, reviewer_token):
+        subs = []
+        for i in range(2):
+            content = f"Batch review essay {i}: notes from a morning walk along the canal, written for this test. " * 2
+            r = requests.post(f"{BASE_URL}/api/submissions", json={"title": f"TEST_Batch Review {i}", "content_text": content},
+                              headers=auth_headers(creator_token))
+            assert r.status_code == 200
+            subs.append(wait_for_analysis(r.json(), creator_token))
+        if any(s["status"] not in ["pending", "flagged"] for s in subs):
+            pytest.skip("A submission was auto-decided, skipping batch review test")
+        items = [{"submission_id": subs[0]["id"], "decision": "approved"},
+                 {"submission_id": subs[1]["id"], "decision": "rejected", "notes": "batch"},
+                 {"submission_id": subs[0]["id"], "decision": "rejected"},
+                 {"submission_id": "does-not-exist", "decision": "approved"}]
+        r = requests.post(f"{BASE_URL}/api/moderation/review:batch", json={"items": items}, headers=auth_headers(reviewer_token))
+        assert r.status_code == 200
+        data = r.json()
+        assert data["reviewed"] == 2 and [row["ok"] for row in data["results"]] == [True, True, False, False]
+        assert [row.get("error") for row in data["results"][2:]] == ["duplicate", "not_found"]
+        vid = data["results"][0]["verification_id"]
+        assert requests.get(f"{BASE_URL}/api/verify/{vid}").json()["valid"] is True
+        again = requests.post(f"{BASE_URL}/api/moderation/review:batch", json={"items": items[:1]}, headers=auth_headers(reviewer_token))
+        assert again.json()["results"][0]["error"] == "not_reviewable"
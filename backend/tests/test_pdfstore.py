@@ -0,0 +1,85 @@
+"""Offline tests for the rendered-PDF store and range responses"""
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from pdfstore import PdfStore, file_response
+
+
+def pdf_bytes(cert):
+    return f"%PDF {cert['id']} {cert['status']} ".encode() * 100
+
+
+async def render(cert):
+    return pdf_bytes(cert)
+
+
+class TestPdfStore:
+    def test_renders_once_per_state(self, tmp_path):
+        store = PdfStore(tmp_path, render)
+        cert = {"id": "c1", "status": "active"}
+
+        async def run():
+            paths = await asyncio.gather(*(store.get(cert) for _ in range(5)))
+            await store.get(cert)
+            return paths
+        paths = asyncio.run(run())
+        assert len(set(paths)) == 1 and paths[0].read_bytes() == pdf_bytes(cert)
+        assert store.renders == 1 and store.hits == 1
+
+    def test_new_state_replaces_old_file(self, tmp_path):
+        store = PdfStore(tmp_path, render)
+
+        async def run():
+            await store.get({"id": "c1", "status": "active"})
+            await store.get({"id": "c2", "status": "active"})
+            return await store.get({"id": "c1", "status": "revoked"})
+        p = asyncio.run(run())
+        names = sorted(f.name for f in tmp_path.rglob("*.pdf"))
+        assert names == ["c1-revoked-pdf-1.pdf", "c2-active-pdf-1.pdf"] and p.name == names[0]
+
+
+def test_file_response_etag_and_ranges(tmp_path):
+    path = tmp_path / "f.pdf"
+    path.write_bytes(bytes(range(256)) * 4)
+    headers = {"ETag": '"v1"'}
+    app = Starlette(routes=[Route("/f", lambda request: file_response(path, request, headers))])
+    c = TestClient(app)
+    full = c.get("/f")
+    assert full.status_code == 200 and full.content == path.read_bytes() and full.headers["etag"] == '"v1"'
+    assert c.get("/f", headers={"If-None-Match": '"v1"'}).status_code == 304
+    r = c.get("/f", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206 and r.content == path.read_bytes()[10:20]
+    assert r.headers["content-range"] == "bytes 10-19/1024"
+    assert c.get("/f", headers={"Range": "bytes=-4"}).content == path.read_bytes()[-4:]
+    assert c.get("/f", headers={"Range": "bytes=2000-"}).status_code == 416
+    assert c.get("/f", headers={"Range": "bytes=0-9", "If-Range": '"old"'}).status_code == 200
+
+
+def test_late_active_render_keeps_the_revoked_pdf(tmp_path):
+    release = asyncio.Event()
+
+    async def slow_render(cert):
+        if cert["status"] == "active": await release.wait()
+        return pdf_bytes(cert)
+    store = PdfStore(tmp_path, slow_render)
+
+    async def run():
+        active = asyncio.ensure_future(store.get({"id": "c1", "status": "active"}))
+        await asyncio.sleep(0)
+        revoked = await store.get({"id": "c1", "status": "revoked"})
+        release.set()
+        await active
+        return revoked
+    assert asyncio.run(run()).exists()
+
+
+def test_read_renders_again_if_the_file_disappears(tmp_path):
+    store = PdfStore(tmp_path, render)
+    cert = {"id": "c1", "status": "active"}
+
+    # Every lookup hands out a path that another worker has just removed.
+    store.get = lambda c: asyncio.sleep(0, tmp_path / "gone.pdf")
+    assert asyncio.run(store.read(cert)) == pdf_bytes(cert)
@@ -0,0 +1,65 @@
+"""Query-plan regression suite: every hot query shape must be served by an index.
+
+Runs against a local mongod (MONGO_URL, default mongodb://localhost:27017) in a throwaway
+database and is skipped when none is reachable.
+"""
+import os
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from indexes import INDEXES, QUERY_SHAPES
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+@pytest.fixture(scope="module")
+def plan_db():
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"No mongod reachable at {MONGO_URL}")
+    name = f"trustink_plans_{uuid.uuid4().hex[:8]}"
+    db = client[name]
+    for coll, models in INDEXES.items():
+        db[coll].create_indexes(models)
+    # A few documents so the planner has real plans to choose between.
+    statuses = ["pending", "flagged", "approved", "rejected"]
+    db.submissions.insert_many([{"id": f"s{i}", "creator_id": f"u{i % 5}", "status": statuses[i % 4],
+                                 "created_at": f"2026-01-{i % 28 + 1:02d}"} for i in range(200)])
+    db.certificates.insert_many([{"id": f"c{i}", "creator_id": f"u{i % 5}", "verification_id": f"VH-2026-{i:06d}",
+                                  "status": "active" if i % 7 else "revoked", "timestamp": f"2026-01-{i % 28 + 1:02d}",
+                                  "revoked_at": None if i % 7 else "2026-02-01"} for i in range(200)])
+    db.api_keys.insert_many([{"id": f"k{i}", "key_value": f"vhk_{i}", "owner_id": f"u{i % 5}",
+                              "is_active": bool(i % 2), "created_at": f"2026-01-{i % 28 + 1:02d}"} for i in range(50)])
+    db.users.insert_many([{"id": f"u{i}", "email": f"u{i}@x.io", "created_at": f"2026-01-{i % 28 + 1:02d}"}
+                          for i in range(50)])
+    yield db
+    client.drop_database(name)
+    client.close()
+
+
+def stages(plan):
+    """Yield every stage name in an explain plan tree (classic and SBE layouts)."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for v in plan.values():
+            yield from stages(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from stages(v)
+
+
+@pytest.mark.parametrize("name,coll,flt,sort", QUERY_SHAPES, ids=[s[0] for s in QUERY_SHAPES])
+def test_query_uses_index(plan_db, name, coll, flt, sort):
+    cursor = plan_db[coll].find(flt)
+    if sort:
+        cursor = cursor.sort(sort)
+    winning = cursor.explain()["queryPlanner"]["winningPlan"]
+    found = set(stages(winning))
+    assert "COLLSCAN" not in found, f"{name}: collection scan {winning}"
+    assert "SORT" not in found, f"{name}: in-memory sort {winning}"
@@ -0,0 +1,71 @@
+"""Offline tests for the token-bucket rate limiter"""
+import asyncio
+
+from ratelimit import MemoryBackend, RateLimiter, client_ip, parse_tiers
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def take_all(limiter, key, n, rate=1, burst=5, cost=1):
+    async def run():
+        return [await limiter.take(key, rate, burst, cost) for _ in range(n)]
+    return asyncio.run(run())
+
+
+class TestRateLimiter:
+    def test_burst_then_refused_with_retry_after(self):
+        clock = Clock()
+        rl = RateLimiter(MemoryBackend(clock=clock))
+        ds = take_all(rl, "k", 6, rate=2, burst=5)
+        assert [d.allowed for d in ds] == [True] * 5 + [False]
+        assert ds[4].remaining == 0
+        assert ds[5].retry_after == 0.5
+        h = ds[5].headers()
+        assert h["Retry-After"] == "1" and h["X-RateLimit-Limit"] == "5" and h["X-RateLimit-Remaining"] == "0"
+        assert rl.stats()["allowed"] == 5 and rl.stats()["limited"] == 1
+
+    def test_refill_is_capped_at_burst(self):
+        clock = Clock()
+        rl = RateLimiter(MemoryBackend(clock=clock))
+        take_all(rl, "k", 5, rate=2, burst=5)
+        clock.t = 1.0
+        assert [d.allowed for d in take_all(rl, "k", 3, rate=2, burst=5)] == [True, True, False]
+        clock.t = 100.0
+        assert take_all(rl, "k", 1, rate=2, burst=5)[0].remaining == 4
+
+    def test_keys_are_independent(self):
+        rl = RateLimiter(MemoryBackend(clock=Clock()))
+        take_all(rl, "heavy", 10, burst=3)
+        assert take_all(rl, "light", 1, burst=3)[0].allowed
+
+    def test_cost_larger_than_balance_is_refused_without_spending(self):
+        rl = RateLimiter(MemoryBackend(clock=Clock()))
+        d = take_all(rl, "k", 1, burst=5, cost=8)[0]
+        assert not d.allowed and d.remaining == 5
+        assert take_all(rl, "k", 1, burst=5, cost=5)[0].allowed
+
+    def test_memory_backend_is_bounded_and_evicts_least_recently_used(self):
+        backend = MemoryBackend(max_keys=3, clock=Clock())
+        rl = RateLimiter(backend)
+        take_all(rl, "busy", 3, burst=3)
+        for i in range(10):
+            take_all(rl, f"ip{i}", 1)
+            asyncio.run(backend.take("busy", 1, 3, cost=0))  # keep it recently used
+        assert len(backend.buckets) == 3 and backend.evictions == 8
+        assert list(backend.buckets)[-1] == "busy" and not take_all(rl, "busy", 1, burst=3)[0].allowed
+
+
+def test_parse_tiers():
+    assert parse_tiers("free=5/20, partner=500/2000") == {"free": (5.0, 20), "partner": (500.0, 2000)}
+
+
+def test_client_ip_only_trusts_forwarded_header_behind_proxy():
+    headers = {"x-forwarded-for": "203.0.113.7, 10.0.0.1"}
+    assert client_ip(headers, "10.0.0.1", trust_proxy=False) == "10.0.0.1"
+    assert client_ip(headers, "10.0.0.1", trust_proxy=True) == "203.0.113.7"
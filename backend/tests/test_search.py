@@ -0,0 +1,89 @@
+"""Offline tests for the registry inverted index"""
+import asyncio
+
+from search import RegistryIndex
+
+
+def cert(cid, title, creator, ts="2026-01-01T00:00:00"):
+    return {"id": cid, "content_title": title, "creator_name": creator,
+            "verification_id": f"VH-2026-{cid.upper()}", "timestamp": ts}
+
+
+def ids(idx, q):
+    return idx.search(q)[1]
+
+
+def build():
+    idx = RegistryIndex()
+    idx.add(cert("a1", "Quantum Gardens", "Alice Smith", "2026-01-01T00:00:00"))
+    idx.add(cert("b2", "Garden of Forking Paths", "Bob Jones", "2026-01-02T00:00:00"))
+    idx.add(cert("c3", "Winter Notes", "Garry Oak", "2026-01-03T00:00:00"))
+    return idx
+
+
+class TestRegistryIndex:
+    def test_prefix_and_and_semantics(self):
+        idx = build()
+        assert set(ids(idx, "gard")) == {"a1", "b2"}
+        assert ids(idx, "forking gar") == ["b2"]
+        assert ids(idx, "zzz") == []
+
+    def test_title_match_outranks_creator_match(self):
+        idx = build()
+        # "gar" prefixes titles of a1/b2 and the creator name of c3
+        assert ids(idx, "gar")[-1] == "c3"
+
+    def test_exact_match_outranks_prefix(self):
+        idx = build()
+        assert ids(idx, "garden")[0] == "b2"
+
+    def test_query_is_not_a_regex(self):
+        idx = build()
+        assert ids(idx, ".*") == []
+        assert ids(idx, "(winter") == ["c3"]
+
+    def test_top_k_keeps_total(self):
+        idx = build()
+        total, top = idx.search("gar", k=1)
+        assert total == 3 and len(top) == 1
+
+    def test_remove_and_verification_id(self):
+        idx = build()
+        assert ids(idx, "VH-2026-C3") == ["c3"]
+        idx.remove("c3")
+        assert ids(idx, "winter") == []
+        assert len(idx) == 2
+
+
+class FakeCerts:
+    """Just enough of a collection for refresh(): equality and $gt filters, async iteration."""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, q, projection=None):
+        def match(d):
+            return all(d.get(k) is not None and d[k] > v["$gt"] if isinstance(v, dict) else d.get(k) == v
+                       for k, v in q.items())
+        rows = [dict(d) for d in self.docs if match(d)]
+
+        async def gen():
+            for row in rows:
+                yield row
+        return gen()
+
+
+def test_refresh_picks_up_late_commits_behind_the_watermark():
+    idx = RegistryIndex(lookback=10)
+    docs = [dict(cert("a1", "Quantum Gardens", "Alice", "2026-01-01T00:00:05+00:00"), status="active", revoked_at=None)]
+    coll = FakeCerts(docs)
+    asyncio.run(idx.refresh(coll))
+    assert ids(idx, "quantum") == ["a1"]
+    # Stamped before a1 but committed after the last poll.
+    docs.append(dict(cert("b2", "Winter Notes", "Bob", "2026-01-01T00:00:02+00:00"), status="active", revoked_at=None))
+    docs[0].update(status="revoked", revoked_at="2026-01-01T00:01:00+00:00")
+    assert [c["id"] for c in asyncio.run(idx.refresh(coll))] == ["a1"]
+    assert ids(idx, "winter") == ["b2"] and ids(idx, "quantum") == []
+    # A revocation stamped before the one already seen is still applied, and each is reported once.
+    docs[1].update(status="revoked", revoked_at="2026-01-01T00:00:58+00:00")
+    assert [c["id"] for c in asyncio.run(idx.refresh(coll))] == ["b2"]
+    assert asyncio.run(idx.refresh(coll)) == [] and len(idx) == 0
@@ -0,0 +1,50 @@
+"""Offline tests for MinHash/LSH near-duplicate fingerprints"""
+import random
+
+from similarity import NUM_PERM, band_keys, estimate, fingerprint_doc, rank, shingles, signature
+
+WORDS = ("garden river memory light winter quantum notes essay journey city ocean letters silence "
+         "fragments harvest machine archive echo portrait season north dream atlas voice").split()
+
+
+def essay(seed: int, n: int = 600) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def edit(text: str, every: int) -> str:
+    words = text.split()
+    for i in range(0, len(words), every):
+        words[i] = "changed"
+    return " ".join(words)
+
+
+def jaccard(a: str, b: str) -> float:
+    x, y = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(x & y) / len(x | y)
+
+
+def test_signature_is_stable_and_case_insensitive():
+    text = essay(1)
+    assert len(signature(text)) == NUM_PERM
+    assert (signature(text) == signature(text.upper())).all()
+    assert signature("") is None and signature("...") is None
+    assert signature("short") is not None  # fewer words than a shingle still fingerprints
+
+
+def test_estimate_tracks_true_jaccard():
+    text = essay(2)
+    for every in (10, 25, 60):
+        copy = edit(text, every)
+        assert abs(estimate(signature(text), signature(copy)) - jaccard(text, copy)) < 0.15
+    assert estimate(signature(text), signature(essay(3))) < 0.1
+
+
+def test_near_copies_share_bands_and_rank_above_threshold():
+    text = essay(4)
+    a, b, other = signature(text), signature(edit(text, 40)), signature(essay(5))
+    assert set(band_keys(a)) & set(band_keys(b))
+    assert not set(band_keys(a)) & set(band_keys(other))
+    docs = [fingerprint_doc("s1", "u1", b, "VH-2026-000001"), fingerprint_doc("s2", "u2", other)]
+    matches = rank(a, docs, threshold=0.6, limit=5)
+    assert [m["submission_id"] for m in matches] == ["s1"] and matches[0]["verification_id"] == "VH-2026-000001"
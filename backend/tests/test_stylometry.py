@@ -0,0 +1,27 @@
+"""Offline tests for the shared stylometric feature extractor"""
+from stylometry import FEATURE_NAMES, extract_features, feature_matrix
+
+
+class TestExtractFeatures:
+    def test_basic_counts(self):
+        f = extract_features("The cat sat. The dog ran away! Did it?")
+        assert f["word_count"] == 9
+        assert f["sentence_count"] == 3
+        assert f["avg_sentence_length"] == 3
+        assert f["expressive_punctuation"] is True
+        assert f["function_words"]["the"] == 2 / 9
+
+    def test_bare_punctuation_closes_sentence_without_counting_as_word_in_it(self):
+        f = extract_features("one two . three four")
+        assert f["sentence_count"] == 2
+
+    def test_empty_text(self):
+        f = extract_features("   ")
+        assert f["word_count"] == 0 and f["sentence_count"] == 0
+        assert f["unigram_entropy"] == 0.0
+
+
+def test_feature_matrix_shape():
+    m = feature_matrix(["Hello there. General Kenobi.", "Another document, with commas; and more."])
+    assert m.shape == (2, len(FEATURE_NAMES))
+    assert feature_matrix([]).shape == (0, len(FEATURE_NAMES))
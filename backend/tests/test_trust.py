@@ -0,0 +1,121 @@
+"""Trust ledger: fold semantics offline; atomic updates and recompute against a local mongod
+(MONGO_URL, default mongodb://localhost:27017), skipped when none is reachable."""
+import asyncio, random
+
+from live import run_live
+from trust import START_SCORE, TRUST_DELTAS, TrustLedger, compose, fold
+
+
+def test_fold_clamps_and_resets_on_set():
+    events = [{"action": "approved", "delta": 10}] * 7 + [{"action": "fraud", "delta": -50}]
+    assert fold(events) == {"s": 50, "v": 7, "r": 0}  # 50 -> 100 (clamped) -> 50
+    events += [{"action": "set", "score": 90}, {"action": "rejected", "delta": -20}]
+    assert fold(events) == {"s": 70, "v": 7, "r": 1}
+    assert fold([{"action": "set", "score": 80, "verified_posts": 3, "rejected_posts": 2}]) == {"s": 80, "v": 3, "r": 2}
+    assert fold([]) == {"s": START_SCORE, "v": 0, "r": 0}
+
+
+def test_compose_matches_clamping_each_step():
+    rng = random.Random(7)
+    for _ in range(500):
+        start, actions = rng.randint(0, 100), rng.choices(list(TRUST_DELTAS), k=rng.randint(1, 12))
+        delta, lo, hi = compose(TRUST_DELTAS[a] for a in actions)
+        expected = fold([{"action": a, "delta": TRUST_DELTAS[a]} for a in actions], {"s": start, "v": 0, "r": 0})["s"]
+        assert min(hi, max(lo, start + delta)) == expected
+
+
+def test_concurrent_changes_are_not_lost():
+    async def check(db):
+        await db.users.insert_one({"id": "u1", "trust_score": 30, "verified_posts": 2, "created_at": "2026-01-01"})
+        evicted = []
+        ledger = TrustLedger(db.users, db.trust_events, on_change=evicted.append)
+        await asyncio.gather(*[ledger.record("u1", "approved", f"s{i}") for i in range(6)],
+                             ledger.record("u1", "rejected", "s9"))
+        u = await db.users.find_one({"id": "u1"})
+        # 30 + 60 clamps to 100 in some interleavings and not others; counters never lose updates.
+        assert u["verified_posts"] == 8 and u["rejected_posts"] == 1 and 0 <= u["trust_score"] <= 100
+        assert await db.trust_events.count_documents({"user_id": "u1", "ref": "opening", "score": 30}) == 1
+        assert len(evicted) == 7 and not await ledger.record("nobody", "approved")
+    run_live(check, "trustink_trust")
+
+
+def test_racing_changes_are_logged_in_the_order_they_were_applied():
+    async def check(db):
+        # From 95, approved-then-fraud gives 50 and fraud-then-approved gives 55.
+        await db.users.insert_many([{"id": f"u{i}", "trust_score": 95, "verified_posts": 0, "rejected_posts": 0,
+                                     "created_at": "2026-01-01"} for i in range(20)])
+        ledger = TrustLedger(db.users, db.trust_events)
+        await asyncio.gather(*[ledger.record(f"u{i}", a) for i in range(20) for a in ("approved", "fraud")])
+        async for u in db.users.find({}, {"id": 1, "trust_score": 1, "trust_seq": 1}):
+            events = await db.trust_events.find({"user_id": u["id"]}).sort("seq").to_list(None)
+            assert [e["seq"] for e in events] == [0, 1, 2] and u["trust_seq"] == 2
+            assert fold(events)["s"] == u["trust_score"]
+        assert (await ledger.recompute())["corrected"] == 0
+    run_live(check, "trustink_trust")
+
+
+class FailingEvents:
+    """Wraps the events collection; the next `fail` bulk writes raise, as if the worker died there."""
+    def __init__(self, coll):
+        self.coll, self.fail = coll, 0
+
+    def __getattr__(self, name):
+        return getattr(self.coll, name)
+
+    async def bulk_write(self, ops, **kw):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("lost the primary")
+        return await self.coll.bulk_write(ops, **kw)
+
+
+def test_undelivered_events_stay_in_the_outbox():
+    async def check(db):
+        await db.users.insert_one({"id": "u1", "trust_score": 50, "created_at": "2026-01-01"})
+        events = FailingEvents(db.trust_events)
+        ledger = TrustLedger(db.users, events)
+        events.fail = 1
+        assert (await ledger.record("u1", "approved", "s1"))["trust_score"] == 60
+        u = await db.users.find_one({"id": "u1"})
+        assert [e["seq"] for e in u["trust_outbox"]] == [0, 1] and not await db.trust_events.count_documents({})
+        # The next change delivers what was left behind along with its own event.
+        await ledger.record("u1", "rejected", "s2")
+        events.fail = 1
+        await ledger.record("u1", "approved", "s3")
+        assert [e["ref"] for e in await db.trust_events.find().sort("seq").to_list(None)] == ["opening", "s1", "s2"]
+        await db.users.update_one({"id": "u1"}, {"$set": {"trust_score": 0}})  # drift
+        assert await ledger.recompute() == {"users": 1, "corrected": 1}
+        u = await db.users.find_one({"id": "u1"})
+        assert u["trust_score"] == 50 and u["trust_outbox"] == [] and await db.trust_events.count_documents({}) == 4
+    run_live(check, "trustink_trust")
+
+
+def test_record_many_applies_in_order_with_one_update():
+    async def check(db):
+        await db.users.insert_one({"id": "u1", "trust_score": 95, "created_at": "2026-01-01"})
+        ledger = TrustLedger(db.users, db.trust_events)
+        u = await ledger.record_many("u1", [("approved", "s1"), ("rejected", "s2"), ("revision_requested", "s3")])
+        assert (u["trust_score"], u["verified_posts"], u["rejected_posts"]) == (80, 1, 1)  # 95 -> 100 -> 80
+        events = await db.trust_events.find({"user_id": "u1"}).sort("seq").to_list(None)
+        assert [e["ref"] for e in events] == ["opening", "s1", "s2"] and fold(events)["s"] == 80
+        assert ledger.applied == 1 and await ledger.record_many("u1", [("revision_requested", "s4")]) is None
+    run_live(check, "trustink_trust")
+
+
+def test_recompute_rebuilds_scores_from_the_log():
+    async def check(db):
+        await db.users.insert_many([{"id": f"u{i}", "trust_score": 50 + i, "created_at": "2026-01-01"} for i in range(3)])
+        ledger = TrustLedger(db.users, db.trust_events)
+        for action in ["approved", "approved", "rejected", "fraud", "approved"]:
+            await ledger.record("u1", action)
+        await ledger.set("u2", 95)
+        await ledger.record("u2", "approved")
+        expected = {u["id"]: u["trust_score"] async for u in db.users.find({}, {"id": 1, "trust_score": 1})}
+        await db.users.update_many({}, {"$set": {"trust_score": 0}})  # drift
+        res = await ledger.recompute(batch=1)
+        got = {u["id"]: u["trust_score"] async for u in db.users.find({}, {"id": 1, "trust_score": 1})}
+        assert res == {"users": 2, "corrected": 2}
+        assert got == {**expected, "u0": 0} and expected["u2"] == 100  # u0 has no events and is left alone
+        events = await db.trust_events.find({"user_id": "u1"}).sort("seq").to_list(None)
+        assert fold(events)["s"] == got["u1"]
+    run_live(check, "trustink_trust")
@@ -2,6 +2,9 @@
 import pytest
 import requests
 import os
+from functools import partial
+
+import live
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -23,6 +26,9 @@ def get_token(creds):
     return None
 
 
+wait_for_analysis = partial(live.wait_for_analysis, BASE_URL)
+
+
 class TestAuth:
     """Auth endpoint tests"""
 
@@ -73,7 +79,8 @@ class TestSubmissions:
             headers={"Authorization": f"Bearer {token}"}
         )
         assert r.status_code == 200
-        data = r.json()
+        assert r.json()["status"] in ["analyzing", "pending", "approved", "flagged"]
+        data = wait_for_analysis(r.json(), token)
         assert "id" in data
         assert "ai_human_probability" in data
         assert "stylometry_score" in data
@@ -147,8 +154,9 @@ class TestModeration:
             headers={"Authorization": f"Bearer {creator_token}"}
         )
         assert r.status_code == 200
-        sub_id = r.json()["id"]
-        sub_status = r.json()["status"]
+        sub = wait_for_analysis(r.json(), creator_token)
+        sub_id = sub["id"]
+        sub_status = sub["status"]
         print(f"Submission status: {sub_status}, id: {sub_id}")
 
         if sub_status not in ["pending", "flagged"]:
@@ -0,0 +1,38 @@
+"""Offline tests for the streaming ZIP writer"""
+import asyncio, io, json, zipfile
+
+import pytest
+
+from zipstream import zip_stream
+
+
+def test_stream_is_a_valid_archive_emitted_per_member():
+    members = [(f"f{i}.pdf", bytes([i]) * 5000) for i in range(3)] + [("manifest.json", json.dumps({"n": 3}).encode())]
+
+    async def entries():
+        for m in members:
+            yield m
+
+    async def collect():
+        return [chunk async for chunk in zip_stream(entries())]
+    chunks = asyncio.run(collect())
+    assert len(chunks) == len(members) + 1 and all(len(c) > 5000 for c in chunks[:3])
+    z = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert z.testzip() is None
+    assert [(n, z.read(n)) for n in z.namelist()] == members
+    assert z.getinfo("f0.pdf").compress_type == zipfile.ZIP_STORED
+    assert z.getinfo("manifest.json").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_failed_member_aborts_without_a_central_directory():
+    async def entries():
+        yield "f0.pdf", b"x" * 5000
+        raise OSError("render failed")
+
+    async def collect(out):
+        async for chunk in zip_stream(entries()):
+            out.append(chunk)
+    sent = []
+    with pytest.raises(OSError):
+        asyncio.run(collect(sent))
+    assert sent and b"PK\x05\x06" not in b"".join(sent)  # no end-of-central-directory record
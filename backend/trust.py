@@ -0,0 +1,188 @@
+"""Trust engine: atomic clamped score updates with an append-only `trust_events` log.
+
+A change is applied to the user with one pipeline update that clamps the score to [0, 100]
+server-side, so concurrent approvals and revocations for one creator all land. Several actions for
+one user (a batch review) are folded into one update: clamped adds compose to a single
+`min(hi, max(lo, score + delta))`, so the result is exactly that of applying them one by one.
+
+Clamping makes the fold order-sensitive, so events are ordered by `seq`, not by time. The same
+update increments the user's `trust_seq` and appends the events, numbered from it, to the user's
+`trust_outbox`. Concurrent changes are therefore numbered in the order they were applied. The
+events are then upserted into the log by (user_id, seq) and pulled from the outbox. If that step
+fails or the process dies first, they stay in the outbox, and the user's next change or
+`recompute()` delivers them. `recompute()` also skips users whose `trust_seq` moved past the last
+event it folded, rather than overwriting a change made while it ran.
+
+Users from before the log start with an opening `set` event, seq 0, holding their score and
+counters. It is written the first time their trust changes. `recompute()` folds each user's
+events in order in one aggregation and writes back only the users whose stored values differ.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+TRUST_DELTAS = {"approved": 10, "rejected": -20, "fraud": -50, "identity_verified": 5}
+COUNTERS = {"approved": "verified_posts", "rejected": "rejected_posts"}
+START_SCORE = 50
+USER_FIELDS = {"_id": 0, "id": 1, "name": 1, "email": 1, "trust_score": 1, "verified_posts": 1, "rejected_posts": 1}
+
+
+def clamp(expr) -> dict:
+    return {"$max": [0, {"$min": [100, expr]}]}
+
+
+def compose(deltas: Iterable[int]) -> Tuple[int, int, int]:
+    """(delta, lo, hi) such that min(hi, max(lo, s + delta)) equals clamping after each delta in turn."""
+    delta, lo, hi = 0, 0, 100
+    for d in deltas:
+        delta, lo, hi = delta + d, max(0, min(100, lo + d)), max(0, min(100, hi + d))
+    return delta, lo, hi
+
+
+def fold(events: Iterable[dict], start: Optional[dict] = None) -> dict:
+    """Reference fold of a user's events in order, mirroring RECOMPUTE's $reduce."""
+    acc = dict(start or {"s": START_SCORE, "v": 0, "r": 0})
+    for e in events:
+        if e["action"] == "set":
+            acc = {"s": e["score"], "v": e.get("verified_posts", acc["v"]), "r": e.get("rejected_posts", acc["r"])}
+        else:
+            acc = {"s": max(0, min(100, acc["s"] + e["delta"])), "v": acc["v"] + (e["action"] == "approved"),
+                   "r": acc["r"] + (e["action"] == "rejected")}
+    return acc
+
+
+# Events logged before `seq` existed have none and sort first, in time order.
+RECOMPUTE = [
+    {"$sort": {"user_id": 1, "seq": 1, "created_at": 1, "_id": 1}},
+    {"$group": {"_id": "$user_id", "last": {"$max": "$seq"},
+                "events": {"$push": {"a": "$action", "d": "$delta", "s": "$score",
+                                     "v": "$verified_posts", "r": "$rejected_posts"}}}},
+    {"$project": {"last": 1, "acc": {"$reduce": {
+        "input": "$events", "initialValue": {"s": START_SCORE, "v": 0, "r": 0},
+        "in": {"$cond": [
+            {"$eq": ["$$this.a", "set"]},
+            {"s": "$$this.s", "v": {"$ifNull": ["$$this.v", "$$value.v"]}, "r": {"$ifNull": ["$$this.r", "$$value.r"]}},
+            {"s": clamp({"$add": ["$$value.s", "$$this.d"]}),
+             "v": {"$add": ["$$value.v", {"$cond": [{"$eq": ["$$this.a", "approved"]}, 1, 0]}]},
+             "r": {"$add": ["$$value.r", {"$cond": [{"$eq": ["$$this.a", "rejected"]}, 1, 0]}]}}]}}}}},
+]
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def literal(doc: dict) -> dict:
+    return {k: {"$literal": v} for k, v in doc.items()}
+
+
+class TrustLedger:
+    def __init__(self, users, events, on_change: Callable[[str], None] = lambda uid: None):
+        self.users, self.events, self.on_change = users, events, on_change
+        self.applied = self.opened = self.delivered = 0
+
+    async def record(self, uid: str, action: str, ref: Optional[str] = None) -> Optional[dict]:
+        """Apply TRUST_DELTAS[action] to uid and log it. Returns the updated user (USER_FIELDS),
+        or None for no-op actions and unknown users."""
+        return await self.record_many(uid, [(action, ref)])
+
+    async def record_many(self, uid: str, actions: List[Tuple[str, Optional[str]]]) -> Optional[dict]:
+        """Apply (action, ref) pairs to uid in order with one update and log them."""
+        actions = [(a, ref) for a, ref in actions if TRUST_DELTAS.get(a)]
+        if not actions: return None
+        ts = now()
+        delta, lo, hi = compose(TRUST_DELTAS[a] for a, _ in actions)
+        upd = {"trust_score": {"$min": [hi, {"$max": [lo, {"$add": [{"$ifNull": ["$trust_score", START_SCORE]}, delta]}]}]}}
+        for a, field in COUNTERS.items():
+            n = sum(1 for x, _ in actions if x == a)
+            if n: upd[field] = {"$add": [{"$ifNull": [f"${field}", 0]}, n]}
+        return await self._apply(uid, upd, [{"user_id": uid, "action": a, "delta": TRUST_DELTAS[a], "ref": ref,
+                                             "created_at": ts} for a, ref in actions], ts)
+
+    async def set(self, uid: str, score: int, ref: Optional[str] = None) -> Optional[dict]:
+        """Admin override: the score becomes `score` and later deltas apply on top of it."""
+        ts = now()
+        return await self._apply(uid, {"trust_score": {"$literal": score}},
+                                 [{"user_id": uid, "action": "set", "score": score, "ref": ref, "created_at": ts}], ts)
+
+    async def _apply(self, uid: str, upd: dict, events: List[dict], ts: str) -> Optional[dict]:
+        n = len(events)
+        pipeline = [
+            {"$set": {**upd, "trust_seq": {"$add": [{"$ifNull": ["$trust_seq", 0]}, n]}, "changed_at": ts}},
+            {"$set": {"trust_outbox": {"$concatArrays": [{"$ifNull": ["$trust_outbox", []]}, [
+                {**literal(e), "seq": {"$subtract": ["$trust_seq", n - 1 - i]}} for i, e in enumerate(events)]]}}},
+        ]
+        for attempt in range(2):
+            u = await self.users.find_one_and_update({"id": uid, "trust_seq": {"$exists": True}}, pipeline,
+                                                     {**USER_FIELDS, "trust_outbox": 1},
+                                                     return_document=ReturnDocument.AFTER)
+            if u:
+                self.applied += 1
+                self.on_change(uid)
+                try:
+                    await self._deliver(uid, u.pop("trust_outbox"))
+                except Exception as e:
+                    logger.warning(f"Trust events for {uid} left in the outbox: {e}")
+                return u
+            if attempt or not await self._open(uid, ts): return None
+        return None
+
+    async def _deliver(self, uid: str, outbox: List[dict]):
+        """Upsert outbox events into the log, then drop them from the user's outbox. Idempotent."""
+        if not outbox: return
+        try:
+            await self.events.bulk_write([UpdateOne({"user_id": uid, "seq": e["seq"]}, {"$setOnInsert": e}, upsert=True)
+                                          for e in outbox], ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys: a concurrent delivery of the same events won the upsert.
+            if any(err["code"] != 11000 for err in e.details["writeErrors"]): raise
+        await self.users.update_one({"id": uid}, {"$pull": {"trust_outbox": {"seq": {"$in": [e["seq"] for e in outbox]}}}})
+        self.delivered += len(outbox)
+
+    async def _open(self, uid: str, ts: str) -> bool:
+        """Queue the opening balance of a user with no events yet; False if the user does not exist."""
+        opening = {"user_id": {"$literal": uid}, "action": "set", "score": {"$ifNull": ["$trust_score", START_SCORE]},
+                   "verified_posts": {"$ifNull": ["$verified_posts", 0]},
+                   "rejected_posts": {"$ifNull": ["$rejected_posts", 0]},
+                   "ref": "opening", "created_at": {"$literal": ts}, "seq": {"$literal": 0}}
+        u = await self.users.find_one_and_update({"id": uid, "trust_seq": {"$exists": False}},
+                                                 [{"$set": {"trust_seq": {"$literal": 0}, "trust_outbox": [opening]}}],
+                                                 {"_id": 0, "id": 1})
+        if u is None:
+            # Opened concurrently by another request, or no such user.
+            return await self.users.count_documents({"id": uid}, limit=1) > 0
+        self.opened += 1
+        return True
+
+    async def recompute(self, batch: int = 1000) -> dict:
+        """Rebuild every logged user's score and counters from the event log in one pass."""
+        users = written = 0
+        ops, ts = [], now()
+        async for u in self.users.find({"trust_outbox.0": {"$exists": True}}, {"_id": 0, "id": 1, "trust_outbox": 1}):
+            await self._deliver(u["id"], u["trust_outbox"])
+
+        async def flush():
+            nonlocal ops, written
+            if ops:
+                written += (await self.users.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+        async for row in self.events.aggregate(RECOMPUTE, allowDiskUse=True):
+            users += 1
+            acc = row["acc"]
+            ops.append(UpdateOne(
+                {"id": row["_id"], "trust_seq": row["last"],
+                 "$or": [{"trust_score": {"$ne": acc["s"]}}, {"verified_posts": {"$ne": acc["v"]}},
+                         {"rejected_posts": {"$ne": acc["r"]}}]},
+                {"$set": {"trust_score": acc["s"], "verified_posts": acc["v"], "rejected_posts": acc["r"],
+                          "changed_at": ts}}))
+            if len(ops) >= batch: await flush()
+        await flush()
+        return {"users": users, "corrected": written}
+
+    def stats(self) -> dict:
+        return {"applied": self.applied, "opened": self.opened, "delivered": self.delivered}
@@ -0,0 +1,45 @@
+"""Stream a ZIP archive as it is written, without holding the whole archive in memory.
+
+`zipfile` writes to any object with `write()`; given one that can't seek or tell, it emits
+data descriptors instead of going back to patch headers, so each member's bytes can be handed
+to the client as soon as it has been added.
+
+If producing a member fails, the error propagates without the archive's central directory being
+written, so the response is aborted mid-body rather than ending as a short but well-formed zip.
+Callers should resolve what can fail (renders, capacity) before the first byte is sent.
+"""
+import zipfile
+from typing import AsyncIterator, Tuple
+
+
+class _Sink:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self.chunks)
+        self.chunks.clear()
+        return out
+
+
+async def zip_stream(entries: AsyncIterator[Tuple[str, bytes]], compress: Tuple[str, ...] = (".json", ".txt")) \
+        -> AsyncIterator[bytes]:
+    """Yield the archive bytes for (name, data) members. Names ending in `compress` are deflated;
+    everything else (e.g. PDFs, already compressed) is stored."""
+    sink = _Sink()
+    zf = zipfile.ZipFile(sink, "w")
+    async for name, data in entries:
+        method = zipfile.ZIP_DEFLATED if name.endswith(compress) else zipfile.ZIP_STORED
+        zf.writestr(name, data, compress_type=method)
+        yield sink.drain()
+    # Only a complete archive gets its central directory (ZipFile as a context manager would
+    # write one on error too).
+    zf.close()
+    yield sink.drain()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { toast } from 'sonner';
 import { useAuth, api } from '../context/AuthContext';
-import { CheckCircle, Clock, XCircle, AlertTriangle, Plus, FileText, Award, Copy, ExternalLink, TrendingUp, Key, Trash2 } from 'lucide-react';
+import { CheckCircle, Clock, XCircle, AlertTriangle, Plus, FileText, Award, Copy, ExternalLink, TrendingUp, Key, Trash2, Download } from 'lucide-react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -11,8 +11,19 @@ const statusConfig = {
   rejected: { color: 'bg-rose-100 text-rose-700', icon: XCircle, iconColor: 'text-rose-500' },
   flagged: { color: 'bg-orange-100 text-orange-700', icon: AlertTriangle, iconColor: 'text-orange-500' },
   revision_requested: { color: 'bg-gray-100 text-gray-700', icon: Clock, iconColor: 'text-gray-500' },
+  analyzing: { color: 'bg-sky-100 text-sky-700', icon: Clock, iconColor: 'text-sky-500' },
 };
 
+// Analysis runs in the background; poll until the submission leaves "analyzing".
+async function waitForAnalysis(sub, { interval = 1500, attempts = 40 } = {}) {
+  let current = sub;
+  for (let i = 0; i < attempts && current.status === 'analyzing'; i++) {
+    await new Promise(resolve => setTimeout(resolve, interval));
+    current = (await api.get(`/submissions/${sub.id}`)).data;
+  }
+  return current;
+}
+
 function TrustGauge({ score }) {
   const color = score >= 80 ? '#10b981' : score >= 50 ? '#f59e0b' : '#ef4444';
   const r = 40, circ = 2 * Math.PI * r;
@@ -59,6 +70,8 @@ export default function CreatorDashboard() {
   const [newKeyName, setNewKeyName] = useState('');
   const [creatingKey, setCreatingKey] = useState(false);
   const [revealedKeys, setRevealedKeys] = useState({});
+  const [exporting, setExporting] = useState(false);
+  const [file, setFile] = useState(null);
 
   const fetchData = useCallback(async () => {
     try {
@@ -81,15 +94,22 @@ export default function CreatorDashboard() {
 
   const handleSubmit = async e => {
     e.preventDefault();
-    if (form.content_text.trim().length < 50) { toast.error('Content must be at least 50 characters'); return; }
+    if (!file && form.content_text.trim().length < 50) { toast.error('Content must be at least 50 characters'); return; }
     setSubmitting(true);
     setResult(null);
     try {
-      const res = await api.post('/submissions', { ...form, content_url: form.content_url || null });
-      setResult(res.data);
+      // Files go up as a raw body so long-form work streams straight into storage.
+      const res = file
+        ? await api.post('/submissions/upload', file, {
+            headers: { 'Content-Type': 'text/plain; charset=utf-8' },
+            params: { title: form.title, content_url: form.content_url || undefined } })
+        : await api.post('/submissions', { ...form, content_url: form.content_url || null });
       setForm({ title: '', content_text: '', content_url: '' });
+      setFile(null);
       toast.success('Submission created!');
       fetchData();
+      setResult(await waitForAnalysis(res.data));
+      fetchData();
       refreshUser();
     } catch (e) {
       toast.error(e.response?.data?.detail || 'Submission failed');
@@ -107,6 +127,24 @@ export default function CreatorDashboard() {
     { id: 'apikeys', label: 'API Keys', icon: Key },
   ];
 
+  const exportCertificates = async () => {
+    setExporting(true);
+    try {
+      const res = await api.get(`/creators/${user.id}/certificates/export`, { responseType: 'blob' });
+      const url = window.URL.createObjectURL(new Blob([res.data], { type: 'application/zip' }));
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = 'TrustInk-certificates.zip';
+      a.click();
+      window.URL.revokeObjectURL(url);
+      toast.success('Certificates exported!');
+    } catch (e) {
+      toast.error('Failed to export certificates');
+    } finally {
+      setExporting(false);
+    }
+  };
+
   if (loading) return <div className="flex h-64 items-center justify-center"><div className="animate-spin w-8 h-8 border-4 border-gray-900 border-t-transparent rounded-full" /></div>;
 
   return (
@@ -118,7 +156,15 @@ export default function CreatorDashboard() {
             <h1 className="text-2xl font-bold text-slate-900">Welcome, {user?.name}</h1>
             <p className="text-slate-500 text-sm mt-0.5">Creator Dashboard</p>
           </div>
-          {stats && <TrustGauge score={stats.trust_score} />}
+          <div className="flex items-center gap-3">
+            {stats?.approved > 0 && (
+              <button onClick={exportCertificates} disabled={exporting} data-testid="export-certificates-btn"
+                className="flex items-center gap-2 px-4 py-2 text-sm font-medium text-slate-700 bg-white border border-slate-200 rounded-lg hover:bg-slate-50 disabled:opacity-50">
+                <Download className="w-4 h-4" /> {exporting ? 'Exporting...' : 'Export certificates'}
+              </button>
+            )}
+            {stats && <TrustGauge score={stats.trust_score} />}
+          </div>
         </div>
 
         {/* Stats */}
@@ -202,11 +248,18 @@ export default function CreatorDashboard() {
                   </div>
                   <div>
                     <label className="block text-xs font-semibold text-slate-600 uppercase tracking-wide mb-1.5">Content Text * (min 50 chars)</label>
-                    <textarea value={form.content_text} onChange={e => setForm(f => ({ ...f, content_text: e.target.value }))} required
-                      rows={8} placeholder="Paste your full article or text content here..." data-testid="submission-content"
-                      className="w-full px-4 py-3 rounded-xl border border-slate-200 text-sm focus:outline-none focus:ring-2 focus:ring-gray-300 transition-all resize-none" />
+                    <textarea value={form.content_text} onChange={e => setForm(f => ({ ...f, content_text: e.target.value }))} required={!file}
+                      disabled={!!file} rows={8} placeholder="Paste your full article or text content here..." data-testid="submission-content"
+                      className="w-full px-4 py-3 rounded-xl border border-slate-200 text-sm focus:outline-none focus:ring-2 focus:ring-gray-300 transition-all resize-none disabled:bg-slate-50" />
                     <p className="text-xs text-slate-400 mt-1">{form.content_text.length} characters</p>
                   </div>
+                  <div>
+                    <label className="block text-xs font-semibold text-slate-600 uppercase tracking-wide mb-1.5">Or upload a text file (long-form, up to 20 MB)</label>
+                    <input type="file" accept=".txt,.md,text/plain,text/markdown" data-testid="submission-file"
+                      onChange={e => setFile(e.target.files[0] || null)}
+                      className="block w-full text-sm text-slate-600 file:mr-3 file:px-4 file:py-2 file:rounded-lg file:border-0 file:bg-slate-100 file:text-slate-700 file:font-semibold" />
+                    {file && <p className="text-xs text-slate-400 mt-1">{file.name} · {(file.size / 1024).toFixed(0)} KB</p>}
+                  </div>
                   <button type="submit" disabled={submitting} data-testid="submit-content-button"
                     className="px-6 py-3 bg-gray-900 text-white font-semibold rounded-xl hover:bg-black disabled:opacity-60 transition-colors">
                     {submitting ? 'Analyzing...' : 'Submit for Certification'}
@@ -34,6 +34,12 @@ function ReviewModal({ sub, onClose, onDecision }) {
   const [decision, setDecision] = useState('');
   const [notes, setNotes] = useState('');
   const [submitting, setSubmitting] = useState(false);
+  const [content, setContent] = useState(sub.content_preview || '');
+
+  // The queue only carries a preview; load the full text for review.
+  useEffect(() => {
+    api.get(`/submissions/${sub.id}/content`, { responseType: 'text' }).then(res => setContent(res.data)).catch(() => {});
+  }, [sub.id]);
 
   const handleSubmit = async () => {
     if (!decision) { toast.error('Please select a decision'); return; }
@@ -99,11 +105,31 @@ function ReviewModal({ sub, onClose, onDecision }) {
             </div>
           </div>
 
+          {/* Near-duplicates */}
+          {sub.similar_submissions?.length > 0 && (
+            <div className="bg-orange-50 border border-orange-200 rounded-xl p-4" data-testid="similar-submissions">
+              <p className="text-xs font-semibold text-orange-700 uppercase tracking-wide mb-2 flex items-center gap-1.5">
+                <AlertTriangle className="w-4 h-4" />Similar to {sub.similar_submissions.length} earlier submission{sub.similar_submissions.length > 1 ? 's' : ''}
+              </p>
+              <div className="space-y-1">
+                {sub.similar_submissions.map(m => (
+                  <div key={m.submission_id} className="flex justify-between text-xs">
+                    <span className="text-slate-600">
+                      {m.verification_id ? <a href={`/verify/${m.verification_id}`} target="_blank" rel="noreferrer" className="font-mono underline">{m.verification_id}</a> : <span className="font-mono">{m.submission_id.slice(0, 8)}</span>}
+                      {m.creator_id === sub.creator_id ? ' · same creator' : ' · another creator'}
+                    </span>
+                    <span className="font-semibold text-orange-700">{Math.round(m.similarity * 100)}% overlap</span>
+                  </div>
+                ))}
+              </div>
+            </div>
+          )}
+
           {/* Content Preview */}
           <div>
             <p className="text-xs font-semibold text-slate-500 uppercase tracking-wide mb-2">Content Preview</p>
             <div className="bg-slate-50 rounded-xl p-4 max-h-40 overflow-y-auto">
-              <p className="text-sm text-slate-700 leading-relaxed whitespace-pre-wrap">{sub.content_text}</p>
+              <p className="text-sm text-slate-700 leading-relaxed whitespace-pre-wrap">{content}</p>
             </div>
           </div>
 
@@ -146,6 +172,8 @@ export default function ReviewerPanel() {
   const [queue, setQueue] = useState([]);
   const [stats, setStats] = useState(null);
   const [selected, setSelected] = useState(null);
+  const [checked, setChecked] = useState([]);
+  const [batching, setBatching] = useState(false);
   const [loading, setLoading] = useState(true);
 
   const fetchData = useCallback(async () => {
@@ -154,6 +182,7 @@ export default function ReviewerPanel() {
       const [qRes, sRes] = await Promise.all([api.get('/moderation/queue'), api.get('/moderation/stats')]);
       setQueue(qRes.data);
       setStats(sRes.data);
+      setChecked([]);
     } catch (e) {
       toast.error('Failed to load queue');
     } finally {
@@ -163,6 +192,25 @@ export default function ReviewerPanel() {
 
   useEffect(() => { fetchData(); }, [fetchData]);
 
+  const toggle = (id) => setChecked(c => c.includes(id) ? c.filter(x => x !== id) : [...c, id]);
+
+  const reviewChecked = async (decision) => {
+    setBatching(true);
+    try {
+      const { data } = await api.post('/moderation/review:batch', {
+        items: checked.map(id => ({ submission_id: id, decision })),
+      });
+      const failed = data.count - data.reviewed;
+      if (data.reviewed) toast.success(`${data.reviewed} submission${data.reviewed === 1 ? '' : 's'} ${decision}`);
+      if (failed) toast.error(`${failed} could not be reviewed (already reviewed or missing)`);
+      fetchData();
+    } catch (e) {
+      toast.error(e.response?.data?.detail || 'Batch review failed');
+    } finally {
+      setBatching(false);
+    }
+  };
+
   if (loading) return <div className="flex h-64 items-center justify-center"><div className="animate-spin w-8 h-8 border-4 border-gray-900 border-t-transparent rounded-full" /></div>;
 
   return (
@@ -201,7 +249,21 @@ export default function ReviewerPanel() {
         <div className="bg-white rounded-2xl border border-slate-100 shadow-sm overflow-hidden">
           <div className="px-6 py-4 border-b border-slate-100 flex items-center justify-between">
             <h2 className="font-semibold text-slate-800">Moderation Queue ({queue.length})</h2>
-            {queue.length > 0 && <span className="text-xs text-amber-600 font-medium bg-amber-50 px-2 py-1 rounded-full">{queue.length} pending</span>}
+            {checked.length > 0 ? (
+              <div className="flex items-center gap-2" data-testid="batch-actions">
+                <span className="text-xs text-slate-500 font-medium">{checked.length} selected</span>
+                <button onClick={() => reviewChecked('approved')} disabled={batching}
+                  className="flex items-center gap-1.5 px-3 py-1.5 bg-emerald-600 text-white text-xs font-medium rounded-lg hover:bg-emerald-700 disabled:opacity-50 transition-colors"
+                  data-testid="batch-approve-button">
+                  <CheckCircle className="w-3.5 h-3.5" /> Approve
+                </button>
+                <button onClick={() => reviewChecked('rejected')} disabled={batching}
+                  className="flex items-center gap-1.5 px-3 py-1.5 bg-rose-600 text-white text-xs font-medium rounded-lg hover:bg-rose-700 disabled:opacity-50 transition-colors"
+                  data-testid="batch-reject-button">
+                  <XCircle className="w-3.5 h-3.5" /> Reject
+                </button>
+              </div>
+            ) : queue.length > 0 && <span className="text-xs text-amber-600 font-medium bg-amber-50 px-2 py-1 rounded-full">{queue.length} pending</span>}
           </div>
 
           {queue.length === 0 ? (
@@ -215,6 +277,11 @@ export default function ReviewerPanel() {
               <table className="w-full text-sm" data-testid="moderation-queue-table">
                 <thead>
                   <tr className="text-xs font-semibold text-slate-500 uppercase tracking-wide border-b border-slate-100 bg-slate-50">
+                    <th className="pl-6 py-3 w-4">
+                      <input type="checkbox" checked={checked.length === queue.length}
+                        onChange={() => setChecked(checked.length === queue.length ? [] : queue.map(s => s.id))}
+                        data-testid="select-all-checkbox" />
+                    </th>
                     <th className="text-left px-6 py-3">Title</th>
                     <th className="text-left px-4 py-3">Creator</th>
                     <th className="text-left px-4 py-3">Trust</th>
@@ -227,6 +294,10 @@ export default function ReviewerPanel() {
                 <tbody className="divide-y divide-slate-50">
                   {queue.map(sub => (
                     <tr key={sub.id} className="hover:bg-slate-50 transition-colors">
+                      <td className="pl-6 py-4">
+                        <input type="checkbox" checked={checked.includes(sub.id)} onChange={() => toggle(sub.id)}
+                          data-testid={`select-${sub.id}`} />
+                      </td>
                       <td className="px-6 py-4 font-medium text-slate-800 max-w-[180px] truncate">{sub.title}</td>
                       <td className="px-4 py-4 text-slate-600">{sub.creator_name}</td>
                       <td className="px-4 py-4">